@@ -19,6 +19,14 @@ from app.core.database import Base  # o donde tengas tu Base
 # IMPORTA TODOS LOS MODELOS para que Alembic los vea
 import app.models.user           # noqa: F401
 import app.models.user_game      # noqa: F401
+import app.models.game_catalog   # noqa: F401
+import app.models.rawg_response  # noqa: F401
+import app.models.crawler_checkpoint  # noqa: F401
+import app.models.catalog_term   # noqa: F401
+import app.models.user_profile   # noqa: F401
+import app.models.game_neighbor  # noqa: F401
+import app.models.user_recommendation  # noqa: F401
+import app.models.game_edge      # noqa: F401
 # import app.models.friendship   # noqa si lo tienes
 # import app.models.review_like  # lo añadirás luego cuando creemos la tabla de likes
 
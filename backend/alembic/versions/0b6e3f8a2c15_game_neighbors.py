@@ -0,0 +1,38 @@
+"""game neighbors
+
+Revision ID: 0b6e3f8a2c15
+Revises: f2a7d4c91b38
+Create Date: 2026-10-17 16:48:03.552710
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e3f8a2c15'
+down_revision: Union[str, Sequence[str], None] = 'f2a7d4c91b38'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "game_neighbors",
+        sa.Column("game_rawg_id", sa.BigInteger(), primary_key=True),
+        sa.Column("neighbor_rawg_id", sa.BigInteger(), primary_key=True),
+        sa.Column("similarity", sa.Float(), nullable=False),
+        sa.Column("support", sa.Integer(), nullable=False),
+    )
+    op.create_index(
+        "ix_game_neighbors_game_sim", "game_neighbors",
+        ["game_rawg_id", sa.text("similarity DESC")],
+    )
+    # Se rellena con: python -m app.jobs.item_cf
+
+
+def downgrade() -> None:
+    op.drop_index("ix_game_neighbors_game_sim", table_name="game_neighbors")
+    op.drop_table("game_neighbors")
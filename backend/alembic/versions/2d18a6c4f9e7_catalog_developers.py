@@ -0,0 +1,37 @@
+"""catalog developers
+
+Revision ID: 2d18a6c4f9e7
+Revises: 1c94e7b5d3a0
+Create Date: 2026-10-17 18:20:51.077413
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2d18a6c4f9e7'
+down_revision: Union[str, Sequence[str], None] = '1c94e7b5d3a0'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "catalog_developers",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False, unique=True),
+    )
+    # Sin backfill: los desarrolladores solo llegan con el detalle de cada juego
+    op.add_column(
+        "game_catalog",
+        sa.Column("developer_ids", postgresql.ARRAY(sa.Integer()), nullable=False, server_default="{}"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("game_catalog", "developer_ids")
+    op.drop_table("catalog_developers")
@@ -0,0 +1,34 @@
+"""game edges
+
+Revision ID: 3e5a9c07b2d4
+Revises: 2d18a6c4f9e7
+Create Date: 2026-10-17 19:05:41.227913
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3e5a9c07b2d4'
+down_revision: Union[str, Sequence[str], None] = '2d18a6c4f9e7'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "game_edges",
+        sa.Column("src_rawg_id", sa.BigInteger(), primary_key=True),
+        sa.Column("dst_rawg_id", sa.BigInteger(), primary_key=True),
+        sa.Column("rank", sa.SmallInteger(), nullable=False),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+    )
+    op.create_index("ix_game_edges_dst", "game_edges", ["dst_rawg_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_game_edges_dst", table_name="game_edges")
+    op.drop_table("game_edges")
@@ -0,0 +1,45 @@
+"""social recommendation indexes
+
+Revision ID: 4b7d2e91c6f3
+Revises: 3e5a9c07b2d4
+Create Date: 2026-10-17 20:12:08.531764
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '4b7d2e91c6f3'
+down_revision: Union[str, Sequence[str], None] = '3e5a9c07b2d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Amigos aceptados desde cada lado del par ordenado (user_id_a < user_id_b)
+    op.create_index(
+        "ix_friendships_a_accepted", "friendships", ["user_id_a"],
+        postgresql_include=["user_id_b"],
+        postgresql_where=sa.text("status = 'accepted'"),
+    )
+    op.create_index(
+        "ix_friendships_b_accepted", "friendships", ["user_id_b"],
+        postgresql_include=["user_id_a"],
+        postgresql_where=sa.text("status = 'accepted'"),
+    )
+    # Índice cubriente de las bibliotecas para la agregación social (index-only scan)
+    op.create_index(
+        "ix_user_games_user_social", "user_games", ["user_id"],
+        postgresql_include=["game_rawg_id", "status", "score", "added_at"],
+    )
+    op.create_index("ix_user_games_game", "user_games", ["game_rawg_id"])
+
+
+def downgrade() -> None:
+    op.drop_index("ix_user_games_game", table_name="user_games")
+    op.drop_index("ix_user_games_user_social", table_name="user_games")
+    op.drop_index("ix_friendships_b_accepted", table_name="friendships")
+    op.drop_index("ix_friendships_a_accepted", table_name="friendships")
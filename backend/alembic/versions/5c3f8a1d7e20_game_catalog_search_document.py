@@ -0,0 +1,36 @@
+"""game_catalog search document index
+
+Revision ID: 5c3f8a1d7e20
+Revises: 4b7d2e91c6f3
+Create Date: 2026-10-18 10:24:51.306118
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5c3f8a1d7e20'
+down_revision: Union[str, Sequence[str], None] = '4b7d2e91c6f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Misma expresión que app.models.game_catalog.SEARCH_DOCUMENT (copiada: las migraciones no importan modelos)
+SEARCH_DOCUMENT = (
+    "(name || ' ' || coalesce(genres, '') || ' ' || coalesce(tags, '') || ' ' || coalesce(platforms, ''))"
+)
+
+
+def upgrade() -> None:
+    # Trigram sobre nombre + géneros + tags + plataformas para la búsqueda local
+    op.create_index(
+        "ix_game_catalog_search_trgm", "game_catalog",
+        [sa.text(f"{SEARCH_DOCUMENT} gin_trgm_ops")],
+        postgresql_using="gin",
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_game_catalog_search_trgm", table_name="game_catalog")
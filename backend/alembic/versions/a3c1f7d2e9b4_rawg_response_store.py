@@ -0,0 +1,32 @@
+"""rawg response store
+
+Revision ID: a3c1f7d2e9b4
+Revises: 176994d82270
+Create Date: 2026-10-17 10:12:04.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a3c1f7d2e9b4'
+down_revision: Union[str, Sequence[str], None] = '176994d82270'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "rawg_responses",
+        sa.Column("key", sa.String(), primary_key=True),
+        sa.Column("payload", sa.LargeBinary(), nullable=False),
+        sa.Column("encoding", sa.String(length=8), nullable=False, server_default="json"),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("rawg_responses")
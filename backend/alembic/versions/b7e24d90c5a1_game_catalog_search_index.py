@@ -0,0 +1,38 @@
+"""game_catalog search index
+
+Revision ID: b7e24d90c5a1
+Revises: a3c1f7d2e9b4
+Create Date: 2026-10-17 11:02:37.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b7e24d90c5a1'
+down_revision: Union[str, Sequence[str], None] = 'a3c1f7d2e9b4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Campos de preview para responder búsquedas desde el catálogo
+    op.add_column("game_catalog", sa.Column("release_year", sa.Integer(), nullable=True))
+    op.add_column("game_catalog", sa.Column("background_image", sa.String(), nullable=True))
+
+    # Índice trigram para similitud/prefijo sobre el nombre
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_game_catalog_name_trgm", "game_catalog", ["name"],
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_game_catalog_name_trgm", table_name="game_catalog")
+    op.drop_column("game_catalog", "background_image")
+    op.drop_column("game_catalog", "release_year")
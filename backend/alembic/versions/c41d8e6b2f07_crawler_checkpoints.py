@@ -0,0 +1,32 @@
+"""crawler checkpoints
+
+Revision ID: c41d8e6b2f07
+Revises: b7e24d90c5a1
+Create Date: 2026-10-17 11:40:19.201447
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c41d8e6b2f07'
+down_revision: Union[str, Sequence[str], None] = 'b7e24d90c5a1'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "crawler_checkpoints",
+        sa.Column("name", sa.String(), primary_key=True),
+        sa.Column("state", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("crawler_checkpoints")
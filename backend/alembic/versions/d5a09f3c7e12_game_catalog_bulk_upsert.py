@@ -0,0 +1,40 @@
+"""game_catalog bulk upsert
+
+Revision ID: d5a09f3c7e12
+Revises: c41d8e6b2f07
+Create Date: 2026-10-17 12:05:51.774310
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5a09f3c7e12'
+down_revision: Union[str, Sequence[str], None] = 'c41d8e6b2f07'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Control de cambios: las filas existentes quedan con hash NULL y se reescriben en el próximo upsert
+    op.add_column("game_catalog", sa.Column("content_hash", sa.String(length=32), nullable=True))
+    op.add_column(
+        "game_catalog",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+    )
+
+    # Índice cubriente para populares: ORDER BY metacritic, rating sin tocar la tabla
+    op.create_index(
+        "ix_game_catalog_popularity", "game_catalog",
+        [sa.text("metacritic DESC NULLS LAST"), sa.text("rating DESC NULLS LAST")],
+        postgresql_include=["game_rawg_id"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_game_catalog_popularity", table_name="game_catalog")
+    op.drop_column("game_catalog", "updated_at")
+    op.drop_column("game_catalog", "content_hash")
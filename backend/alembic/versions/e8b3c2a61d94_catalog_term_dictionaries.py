@@ -0,0 +1,69 @@
+"""catalog term dictionaries
+
+Revision ID: e8b3c2a61d94
+Revises: d5a09f3c7e12
+Create Date: 2026-10-17 12:48:10.602338
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e8b3c2a61d94'
+down_revision: Union[str, Sequence[str], None] = 'd5a09f3c7e12'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (tabla diccionario, columna de nombres en game_catalog, columna de ids)
+TERMS = (
+    ("catalog_genres", "genres", "genre_ids"),
+    ("catalog_tags", "tags", "tag_ids"),
+    ("catalog_platforms", "platforms", "platform_ids"),
+)
+
+
+def upgrade() -> None:
+    for table, names_col, ids_col in TERMS:
+        # 1) Diccionario de nombres internados
+        op.create_table(
+            table,
+            sa.Column("id", sa.Integer(), primary_key=True),
+            sa.Column("name", sa.String(), nullable=False, unique=True),
+        )
+
+        # 2) Array de ids en el catálogo + índice GIN
+        op.add_column(
+            "game_catalog",
+            sa.Column(ids_col, postgresql.ARRAY(sa.Integer()), nullable=False, server_default="{}"),
+        )
+        op.create_index(f"ix_game_catalog_{ids_col}", "game_catalog", [ids_col], postgresql_using="gin")
+
+        # 3) Backfill: alta de los nombres existentes y traducción a ids (conservando el orden)
+        op.execute(f"""
+            INSERT INTO {table} (name)
+            SELECT DISTINCT t.name
+            FROM game_catalog g,
+                 unnest(string_to_array(g.{names_col}, ';')) AS t(name)
+            WHERE g.{names_col} IS NOT NULL AND t.name <> ''
+            ON CONFLICT (name) DO NOTHING
+        """)
+        op.execute(f"""
+            UPDATE game_catalog g
+            SET {ids_col} = COALESCE((
+                SELECT array_agg(d.id ORDER BY t.ord)
+                FROM unnest(string_to_array(g.{names_col}, ';')) WITH ORDINALITY AS t(name, ord)
+                JOIN {table} d ON d.name = t.name
+            ), '{{}}')
+            WHERE g.{names_col} IS NOT NULL AND g.{names_col} <> ''
+        """)
+
+
+def downgrade() -> None:
+    for table, _, ids_col in reversed(TERMS):
+        op.drop_index(f"ix_game_catalog_{ids_col}", table_name="game_catalog")
+        op.drop_column("game_catalog", ids_col)
+        op.drop_table(table)
@@ -0,0 +1,37 @@
+"""user profiles
+
+Revision ID: f2a7d4c91b38
+Revises: e8b3c2a61d94
+Create Date: 2026-10-17 16:05:42.318094
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f2a7d4c91b38'
+down_revision: Union[str, Sequence[str], None] = 'e8b3c2a61d94'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "user_profiles",
+        sa.Column("user_id", sa.Integer(), sa.ForeignKey("users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("genre_aff", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("tag_aff", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("genre_norm", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("tag_norm", sa.Float(), nullable=False, server_default="0"),
+        sa.Column("games", postgresql.JSONB(), nullable=False, server_default=sa.text("'{}'::jsonb")),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()"), nullable=False),
+    )
+    # Los perfiles se rellenan con: python -m app.jobs.user_profiles
+
+
+def downgrade() -> None:
+    op.drop_table("user_profiles")
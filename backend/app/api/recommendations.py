@@ -1,46 +1,50 @@
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 import asyncio
+import logging
 from math import sqrt
-from collections import defaultdict
+from datetime import datetime, timedelta, timezone
 
 from app.core.dependencies import get_db
 from app.models.user_game import UserGame
 from app.schemas.game import GamePreview
 from app.core.rawg import get_game_details, list_games_by_genres
+from app.core.config import settings
+from app.crud.game_catalog import get_catalog_genre_ids, list_catalog_candidates, get_catalog_candidates_by_ids
+from app.crud.game_neighbor import get_cf_scores
+from app.crud.user_recommendation import get_user_recommendation, upsert_user_recommendations
+from app.recommender.cache import recommendation_cache
+from app.recommender.content_index import get_content_index
+from app.recommender.ppr import personalized_ranker
+from app.recommender.budget import Budget, start_budget, current_budget
+from app.crud.catalog_term import get_term_names
+from app.models.catalog_term import CatalogGenre
+from app.recommender.scoring import rank_candidates, score_candidates, top_k_indices
+from app.recommender.catalog_store import catalog_store, GameRow
+from app.recommender.cf import rank_blended
+from app.recommender.genre_profile import (
+    K_REPRESENTATIVE_DEFAULT, G_TOP_GENRES_DEFAULT, PAGE_SIZE, POPULAR_GENRES,
+    representative_weight, build_genre_profile, stored_genre_profile,
+    catalog_genre_profile, live_catalog_genre_profile, profile_covers,
+)
+from app.crud.user_profile import get_user_profile
+from app.crud.user import list_friend_recommendations
+from app.recommender.pipeline import (
+    RecsRequest, PipelineTrace, run_pipeline,
+    GenrePageRetriever, CatalogRetriever, CFRetriever, FriendsRetriever,
+)
 
-router = APIRouter(prefix="/recommendations", tags=["recommendations"])
+logger = logging.getLogger(__name__)
 
-# Pesos por estado de los juegos
-STATUS_WEIGHT: Dict[str, float] = {
-    "jugando": 1.0,
-    "completado": 1.0,
-    "por jugar": 0.3,
-}
-DEFAULT_STATUS_WEIGHT = 0.4
+router = APIRouter(prefix="/recommendations", tags=["recommendations"])
 
 # Parámetros por defecto
-K_REPRESENTATIVE_DEFAULT = 6
-G_TOP_GENRES_DEFAULT = 2
 PAGES_PER_GENRE_DEFAULT = 1
-PAGE_SIZE = 20
-
-# Géneros usados en cold-start (cuando el usuario no tiene juegos)
-POPULAR_GENRES = ["Action", "Adventure", "Shooter", "RPG"]
 
 # ------------------- Utilidades -------------------
 
-def _norm_score(s: int | None) -> float:
-    """Normaliza una puntuación [0,100] a [0,1]."""
-    return 0.0 if s is None else max(0, min(100, s)) / 100.0
-
-def _w(ug: UserGame) -> float:
-    """Calcula el peso de un juego del usuario para decidir representatividad."""
-    base = STATUS_WEIGHT.get((ug.status or "").strip().lower(), DEFAULT_STATUS_WEIGHT)
-    return base * (0.5 + 0.5 * _norm_score(ug.score))
-
 def _parse_year(v) -> int:
     """Extrae año en formato entero a partir de una fecha o string."""
     if v is None:
@@ -58,38 +62,16 @@ def _preview_from_candidate(c: Dict[str, Any]) -> GamePreview:
     year = _parse_year(c.get("released") or c.get("releaseDate"))
     return GamePreview(id=gid, title=str(title), imageUrl=str(img), year=year)
 
-def _build_genre_profile(owned_details: List[Dict[str, Any]], reps: List[UserGame]) -> Dict[str, float]:
-    """
-    Construye el perfil del usuario en base a géneros.
-    Cada género recibe peso positivo si los juegos fueron bien puntuados y negativo si fueron mal puntuados.
-    """
-    status = {ug.game_rawg_id: (ug.status or "").strip().lower() for ug in reps}
-    score  = {ug.game_rawg_id: ug.score for ug in reps}
-
-    g_aff: Dict[str, float] = defaultdict(float)
-    for g in owned_details:
-        gid = g.get("id")
-        if not gid:
-            continue
-        base = STATUS_WEIGHT.get(status.get(gid, ""), DEFAULT_STATUS_WEIGHT)
-        signed = base * (_norm_score(score.get(gid)) - 0.5)  # afinidad firmada [-0.5, +0.5]
-        if signed == 0:
-            continue
-        for x in g.get("genres") or []:
-            name = x["name"] if isinstance(x, dict) and "name" in x else str(x)
-            g_aff[name] += signed
-
-    # Normalización L2 sobre valores absolutos para conservar señal negativa/positiva
-    denom = sqrt(sum((abs(v) ** 2) for v in g_aff.values())) or 1.0
-    for k in list(g_aff.keys()):
-        g_aff[k] = g_aff[k] / denom
-    return g_aff
+def _preview_from_row(r: GameRow) -> GamePreview:
+    """GamePreview a partir de una fila del catálogo compacto."""
+    return GamePreview(id=r.game_id, title=r.name or f"RAWG-{r.game_id}", imageUrl=r.image, year=r.year)
 
 def _score_simple(c: Dict[str, Any], g_aff: Dict[str, float]) -> float:
     """
     Calcula la puntuación de un candidato.
     Fórmula: 85% afinidad por géneros (firmada) + 10% metacritic + 5% refuerzo si es shooter con afinidad positiva.
     Se reduce el peso de Metacritic para evitar que dominen siempre los mismos juegos muy valorados.
+    Versión de referencia escalar; el endpoint usa app.recommender.scoring, que la reproduce vectorizada.
     """
     genres = [x["name"] if isinstance(x, dict) and "name" in x else str(x)
               for x in (c.get("genres") or [])]
@@ -105,72 +87,251 @@ def _score_simple(c: Dict[str, Any], g_aff: Dict[str, float]) -> float:
 
     return 0.85 * match + 0.10 * meta + shooter_boost
 
-# ------------------- Endpoint -------------------
+# ------------------- Modo catálogo -------------------
 
-@router.get("/{user_id}", response_model=List[GamePreview])
-async def recommend_for_user(
+async def _catalog_store(db: AsyncSession):
+    """Catálogo compacto del proceso, refrescado si toca; None si está desactivado o sin instantánea."""
+    if not settings.CATALOG_STORE_ENABLED:
+        return None
+    return catalog_store if await catalog_store.refresh(db) else None
+
+async def _recommend_from_catalog(
+    db: AsyncSession,
     user_id: int,
-    top_k: int = Query(10, ge=1, le=50),
-    k_representative: int = Query(K_REPRESENTATIVE_DEFAULT, ge=3, le=20),
-    g_top_genres: int = Query(G_TOP_GENRES_DEFAULT, ge=1, le=2),
-    pages_per_genre: int = Query(PAGES_PER_GENRE_DEFAULT, ge=1, le=1),
-    db: AsyncSession = Depends(get_db),
-):
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
     """
-    Recomendador simplificado con menor influencia de Metacritic.
-    Flujo:
-      - Selección de juegos representativos del usuario (K).
-      - Obtención de detalles de esos juegos (K llamadas RAWG).
-      - Construcción de perfil por géneros con pesos positivos y negativos.
-      - Obtención de candidatos por géneros dominantes (1 llamada RAWG, ordenados por rating para reducir sesgo de Metacritic).
-      - Scoring y selección de top-k priorizando afinidad de géneros.
-    Total de llamadas: K + 1 (o 1 si el usuario no tiene juegos).
+    Misma lógica que el modo RAWG, pero perfil y candidatos salen de game_catalog
+    en unas pocas consultas por lotes y sin ninguna llamada de red:
+      1. genre_ids de los representativos (1 consulta).
+      2. diccionario de géneros id -> nombre (1 consulta, tabla pequeña).
+      3. pool de candidatos por géneros dominantes (1 consulta, hasta RECS_CATALOG_CANDIDATES).
+    Con el catálogo compacto cargado (app.recommender.catalog_store), los pasos 1 y 3 y las
+    previews salen de sus arrays en memoria y el pool se puntúa sin construir dicts.
     """
+    genre_names = await get_term_names(db, CatalogGenre)
+    genre_ids_by_name = {name: gid for gid, name in genre_names.items()}
+    store = await _catalog_store(db)
 
-    # Paso 0. Juegos del usuario
-    res = await db.execute(select(UserGame).where(UserGame.user_id == user_id))
-    ugs: List[UserGame] = list(res.scalars().all())
+    def with_names(c: Dict[str, Any]) -> Dict[str, Any]:
+        c["genres"] = [genre_names[g] for g in c.pop("genre_ids") if g in genre_names]
+        return c
+
+    async def popular_fallback(owned: set) -> List[GamePreview]:
+        ids = [genre_ids_by_name[g] for g in POPULAR_GENRES if g in genre_ids_by_name]
+        if store is not None:
+            return [_preview_from_row(r) for r in store.candidates(ids, exclude_ids=list(owned), limit=top_k).rows()]
+        page = await list_catalog_candidates(db, ids, exclude_ids=list(owned), limit=top_k)
+        return [_preview_from_candidate(c) for c in page]
+
+    # Cold-start: sin juegos -> géneros populares
+    if not ugs:
+        return await popular_fallback(set())
+
+    owned = {int(x.game_rawg_id) for x in ugs}
+
+    # Pasos 1-2. Perfil de géneros
+    g_aff = await catalog_genre_profile(db, user_id, ugs, k_representative, genre_names)
+    if not g_aff:
+        return await popular_fallback(owned)
+
+    # Paso 3. Pool de candidatos por géneros dominantes (miles en vez de una página de 20)
+    top_genres = [k for k, _ in sorted(g_aff.items(), key=lambda x: x[1], reverse=True)[:g_top_genres]]
+    top_ids = [genre_ids_by_name[g] for g in top_genres if g in genre_ids_by_name]
+    if store is not None:
+        pool = store.candidates(top_ids, exclude_ids=list(owned), limit=settings.RECS_CATALOG_CANDIDATES)
+        if not len(pool):
+            return await popular_fallback(owned)
+        best = top_k_indices(score_candidates(store.candidate_matrix(pool, genre_names), g_aff), top_k)
+        return [_preview_from_row(pool.row(int(i))) for i in best]
 
+    candidates = [
+        with_names(c)
+        for c in await list_catalog_candidates(
+            db, top_ids, exclude_ids=list(owned), limit=settings.RECS_CATALOG_CANDIDATES,
+        )
+    ]
+    if not candidates:
+        return await popular_fallback(owned)
+
+    # Paso 4. Scoring vectorizado y selección top-k
+    return [_preview_from_candidate(c) for c in rank_candidates(candidates, g_aff, top_k)]
+
+# ------------------- Modo filtrado colaborativo -------------------
+
+async def _recommend_cf(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
+    """
+    Candidatos = vecinos item-item (game_neighbors) de los juegos del usuario,
+    puntuados por suma de similitud * peso del juego; se mezclan con la afinidad
+    por géneros (RECS_CF_WEIGHT). Sin juegos o sin vecinos cae al modo catálogo.
+    """
+    if not ugs:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+
+    owned = {int(x.game_rawg_id) for x in ugs}
+    seeds = {int(ug.game_rawg_id): representative_weight(ug) for ug in ugs}
+    cf_scores = await get_cf_scores(db, seeds, exclude_ids=list(owned), limit=settings.RECS_CATALOG_CANDIDATES)
+    if not cf_scores:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+
+    genre_names = await get_term_names(db, CatalogGenre)
+    g_aff = await catalog_genre_profile(db, user_id, ugs, k_representative, genre_names)
+
+    candidates = await get_catalog_candidates_by_ids(db, list(cf_scores))
+    for c in candidates:
+        c["genres"] = [genre_names[g] for g in c.pop("genre_ids") if g in genre_names]
+    if not candidates:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+
+    selected = rank_blended(candidates, g_aff, cf_scores, settings.RECS_CF_WEIGHT, top_k)
+    return [_preview_from_candidate(c) for c in selected]
+
+# ------------------- Modo precalculado -------------------
+
+async def _recommend_precomputed(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
+    """
+    Sirve la fila de user_recommendations (app.jobs.recs_precompute). Si falta, es más
+    antigua que RECS_PRECOMPUTED_MAX_AGE, el perfil del usuario cambió después o no
+    tiene suficientes elementos, se recalcula en modo catálogo y se guarda.
+    Con parámetros distintos de los de por defecto se calcula en vivo sin guardar.
+    """
+    if k_representative != K_REPRESENTATIVE_DEFAULT or g_top_genres != G_TOP_GENRES_DEFAULT:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+
+    row, profile_updated_at = await get_user_recommendation(db, user_id)
+    if row is not None:
+        age = datetime.now(timezone.utc) - row.generated_at
+        fresh = (
+            row.top_k >= top_k
+            and age <= timedelta(seconds=settings.RECS_PRECOMPUTED_MAX_AGE)
+            and (profile_updated_at is None or profile_updated_at <= row.generated_at)
+        )
+        if fresh:
+            return [GamePreview(**it) for it in row.items[:top_k]]
+
+    k = max(top_k, settings.RECS_PRECOMPUTE_TOP_K)
+    out = await _recommend_from_catalog(db, user_id, ugs, k, k_representative, g_top_genres)
+    await upsert_user_recommendations(db, [{
+        "user_id": user_id, "items": [p.model_dump() for p in out], "top_k": k, "source": "catalog",
+    }])
+    return out[:top_k]
+
+# ------------------- Modo RAWG -------------------
+
+async def _rawg_page(db: AsyncSession, genres: List[str], owned: set) -> List[Dict[str, Any]]:
+    """
+    Página de RAWG por géneros (orden por rating), con cobertura para rezagados. Si no
+    llega dentro del plazo de la petición o RAWG falla, se usa la del catálogo y la
+    respuesta se marca como degradada (así no se cachea).
+    """
+    budget = current_budget()
+    try:
+        return await asyncio.wait_for(
+            list_games_by_genres(genres, page=1, page_size=PAGE_SIZE, ordering="-rating", hedge=True),
+            timeout=budget.remaining(settings.RECS_DEADLINE_RESERVE_MS / 1000.0),
+        )
+    except asyncio.TimeoutError:
+        budget.degrade("candidates")
+        return await _catalog_page(db, genres, owned)
+    except Exception:
+        logger.warning("Página de RAWG fallida para %s; se usa el catálogo", genres, exc_info=True)
+        budget.degrade("candidates")
+        return await _catalog_page(db, genres, owned)
+
+async def _catalog_page(db: AsyncSession, genres: List[str], owned: set) -> List[Dict[str, Any]]:
+    """Una página de candidatos del catálogo con géneros por nombre, como la de RAWG."""
+    genre_names = await get_term_names(db, CatalogGenre)
+    ids_by_name = {name: gid for gid, name in genre_names.items()}
+    page = await list_catalog_candidates(
+        db, [ids_by_name[g] for g in genres if g in ids_by_name], exclude_ids=list(owned), limit=PAGE_SIZE,
+    )
+    for c in page:
+        c["genres"] = [genre_names[g] for g in c.pop("genre_ids") if g in genre_names]
+    return page
+
+async def _recommend_from_rawg(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
+    """Flujo original: perfil a partir de K detalles de RAWG y candidatos de una página de RAWG."""
     # Cold-start: sin juegos -> géneros populares (orden por rating para no depender de Metacritic)
     if not ugs:
-        try:
-            page = await list_games_by_genres(POPULAR_GENRES, page=1, page_size=PAGE_SIZE, ordering="-rating")
-        except Exception:
-            page = []
+        page = await _rawg_page(db, POPULAR_GENRES, set())
         return [_preview_from_candidate(c) for c in page[:top_k]]
 
-    # Paso 1. Selección de representativos
-    reps = sorted(ugs, key=_w, reverse=True)[:k_representative]
     owned = {int(x.game_rawg_id) for x in ugs}
+    budget = current_budget()
+    reserve = settings.RECS_DEADLINE_RESERVE_MS / 1000.0
+
+    # Pasos 1-3. Perfil persistido (una fila); si no está al día, se calcula en vivo
+    with budget.stage("profile"):
+        g_aff = await stored_genre_profile(db, user_id, ugs)
+    if g_aff is None:
+        # Paso 1. Selección de representativos
+        reps = sorted(ugs, key=representative_weight, reverse=True)[:k_representative]
 
-    # Paso 2. Detalles de los representativos
-    sem = asyncio.Semaphore(min(6, k_representative))
-    async def get_det(gid: int) -> Dict[str, Any]:
-        async with sem:
+        # Paso 2. Detalles de los representativos (la concurrencia la limita el gobernador de RAWG;
+        # los rezagados se cubren con una petición duplicada)
+        async def get_det(gid: int) -> Dict[str, Any]:
             try:
-                d = await get_game_details(gid)
+                d = await get_game_details(gid, hedge=True)
                 return d if isinstance(d, dict) else (getattr(d, "__dict__", {}) or {})
             except Exception:
+                # Sin géneros el perfil sale incompleto: la respuesta no debe cachearse
+                budget.degrade("details")
                 return {"id": gid, "genres": []}
 
-    owned_details = await asyncio.gather(*(get_det(int(ug.game_rawg_id)) for ug in reps))
+        with budget.stage("details"):
+            tasks = {int(ug.game_rawg_id): asyncio.create_task(get_det(int(ug.game_rawg_id))) for ug in reps}
+            _, pending = await asyncio.wait(tasks.values(), timeout=budget.remaining(reserve))
+            # Al agotar el plazo se abandona lo que falta (las llamadas compartidas siguen
+            # en su single-flight y llenan la caché para la próxima vez)
+            for t in pending:
+                t.cancel()
+            arrived = {gid: t.result() for gid, t in tasks.items() if t not in pending}
 
-    # Paso 3. Perfil de géneros
-    g_aff = _build_genre_profile(owned_details, reps)
+        # Los que no llegaron se completan con sus géneros del catálogo (una consulta)
+        missing = [gid for gid in tasks if gid not in arrived]
+        if missing:
+            budget.degrade("details")
+            with budget.stage("details_catalog"):
+                genre_names = await get_term_names(db, CatalogGenre)
+                rep_genres = await get_catalog_genre_ids(db, missing)
+            for gid in missing:
+                arrived[gid] = {"id": gid, "genres": [genre_names[g] for g in rep_genres.get(gid, []) if g in genre_names]}
+
+        # Paso 3. Perfil de géneros
+        g_aff = build_genre_profile([arrived[gid] for gid in tasks], reps)
     if not g_aff:
-        try:
-            page = await list_games_by_genres(POPULAR_GENRES, page=1, page_size=PAGE_SIZE, ordering="-rating")
-        except Exception:
-            page = []
+        page = await _rawg_page(db, POPULAR_GENRES, owned)
         out = [c for c in page if int(c.get("id", 0)) not in owned][:top_k]
         return [_preview_from_candidate(c) for c in out]
 
     # Paso 4. Candidatos por géneros dominantes (orden por rating para reducir sesgo de Metacritic)
     top_genres = [k for k, _ in sorted(g_aff.items(), key=lambda x: x[1], reverse=True)[:g_top_genres]]
-    try:
-        page = await list_games_by_genres(top_genres, page=1, page_size=PAGE_SIZE, ordering="-rating")
-    except Exception:
-        page = []
+    with budget.stage("candidates"):
+        page = await _rawg_page(db, top_genres, owned)
 
     candidates: List[Dict[str, Any]] = []
     for c in page:
@@ -179,15 +340,284 @@ async def recommend_for_user(
             candidates.append(c)
 
     if not candidates:
-        try:
-            page = await list_games_by_genres(POPULAR_GENRES, page=1, page_size=PAGE_SIZE, ordering="-rating")
-        except Exception:
-            page = []
+        page = await _rawg_page(db, POPULAR_GENRES, owned)
         candidates = [c for c in page if int(c.get("id", 0)) not in owned]
 
     # Paso 5. Scoring y selección (Metacritic con peso reducido)
-    candidates.sort(key=lambda c: _score_simple(c, g_aff), reverse=True)
-    selected = candidates[:top_k]
+    with budget.stage("score"):
+        selected = rank_candidates(candidates, g_aff, top_k)
 
     # Paso 6. Previews
     return [_preview_from_candidate(c) for c in selected]
+
+# ------------------- Modo contenido (índice TF-IDF + LSH) -------------------
+
+def _content_index():
+    return get_content_index(settings.CONTENT_INDEX_PATH, settings.CONTENT_INDEX_EXACT_MAX_ITEMS)
+
+async def _previews_in_order(db: AsyncSession, ranked: List[int]) -> List[GamePreview]:
+    """Previews desde el catálogo (compacto si está cargado) respetando el orden del ranking."""
+    found = catalog_store.lookup_many(ranked) if catalog_store.ready else {}
+    previews = {gid: _preview_from_row(r) for gid, r in found.items()}
+    missing = [gid for gid in ranked if gid not in previews]
+    if missing:
+        for c in await get_catalog_candidates_by_ids(db, missing):
+            previews[c["id"]] = _preview_from_candidate(c)
+    return [previews[gid] for gid in ranked if gid in previews]
+
+async def _recommend_content(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
+    """
+    Juegos más cercanos al perfil persistido del usuario (géneros y tags) en el índice
+    de contenido. Sin índice, sin juegos o con el perfil desfasado cae al modo catálogo.
+    """
+    index = _content_index()
+    profile = await get_user_profile(db, user_id) if ugs else None
+    if index is None or not profile_covers(profile, ugs):
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+
+    owned = [int(ug.game_rawg_id) for ug in ugs]
+    near = index.near_profile(
+        {"genres": profile.genre_aff or {}, "tags": profile.tag_aff or {}}, top_k, exclude_ids=owned,
+    )
+    if not near:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+    return await _previews_in_order(db, [gid for gid, _ in near])
+
+# ------------------- Modo grafo (PageRank personalizado) -------------------
+
+async def _recommend_ppr(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
+    """
+    PageRank personalizado sobre el grafo de sugeridos de RAWG (game_edges), reiniciando
+    en los juegos del usuario con nota >= PPR_MIN_SCORE (o, si no hay, en sus K más
+    representativos), con el peso de interacción de cada uno. Sin grafo o sin semillas
+    en él cae al modo catálogo.
+    """
+    liked = [ug for ug in ugs if ug.score is not None and ug.score >= settings.PPR_MIN_SCORE]
+    seeds_ugs = liked or sorted(ugs, key=representative_weight, reverse=True)[:k_representative]
+    seeds = {int(ug.game_rawg_id): representative_weight(ug) for ug in seeds_ugs}
+
+    owned = [int(ug.game_rawg_id) for ug in ugs]
+    ranked = await personalized_ranker.rank(seeds, top_k, exclude_ids=owned) if seeds else []
+    out = await _previews_in_order(db, [gid for gid, _ in ranked]) if ranked else []
+    if not out:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+    return out
+
+# ------------------- Modo social (amigos) -------------------
+
+async def _recommend_friends(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+) -> List[GamePreview]:
+    """
+    Juegos de los amigos que el usuario no tiene, puntuados por la nota y el estado de
+    cada amigo y la fuerza de la amistad (app.crud.user.list_friend_recommendations).
+    Sin amigos o sin juegos nuevos entre ellos cae al modo catálogo.
+    """
+    rows = await list_friend_recommendations(db, user_id, limit=top_k)
+    if not rows:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+    return [GamePreview(id=r["id"], title=r["title"], imageUrl=r["imageUrl"], year=r["year"]) for r in rows]
+
+# ------------------- Pipeline componible -------------------
+
+_RETRIEVERS = {
+    "genre_page": GenrePageRetriever(page_size=PAGE_SIZE, fallback_genres=POPULAR_GENRES),
+    "catalog": CatalogRetriever(fallback_genres=POPULAR_GENRES),
+    "cf": CFRetriever(),
+    "friends": FriendsRetriever(),
+}
+_RETRIEVER_PATTERN = "^({0})(,({0}))*$".format("|".join(_RETRIEVERS))
+
+async def _pipeline_profile(db: AsyncSession, req: RecsRequest, trace: PipelineTrace) -> Dict[str, float]:
+    """Perfil persistido o, si no está al día, en vivo desde el catálogo (sin llamadas a RAWG)."""
+    g_aff = await stored_genre_profile(db, req.user_id, req.ugs, req.genre_names)
+    trace.cache_result("profile", "stored" if g_aff is not None else "live")
+    if g_aff is None:
+        g_aff = await live_catalog_genre_profile(db, req.ugs, req.k_representative, req.genre_names)
+    return g_aff
+
+async def _recommend_pipeline(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+    retrievers: List[str],
+    ranker: str,
+    trace: PipelineTrace,
+) -> List[GamePreview]:
+    """
+    Recuperadores elegidos en paralelo, fusión y ranker elegido (app.recommender.pipeline).
+    Si ningún recuperador aporta candidatos cae al modo catálogo.
+    """
+    req = RecsRequest(
+        user_id=user_id, ugs=ugs, top_k=top_k, k_representative=k_representative,
+        g_top_genres=g_top_genres, genre_names=await get_term_names(db, CatalogGenre),
+    )
+    selected = await run_pipeline(db, req, [_RETRIEVERS[n] for n in retrievers], ranker, _pipeline_profile, trace)
+    if not selected:
+        return await _recommend_from_catalog(db, user_id, ugs, top_k, k_representative, g_top_genres)
+    return [_preview_from_candidate({"id": c.game_id, **c.info}) for c in selected]
+
+_MODES = {
+    "rawg": _recommend_from_rawg,
+    "catalog": _recommend_from_catalog,
+    "cf": _recommend_cf,
+    "precomputed": _recommend_precomputed,
+    "content": _recommend_content,
+    "ppr": _recommend_ppr,
+    "friends": _recommend_friends,
+}
+
+# Modos cuyo resultado depende del usuario aunque no tenga juegos
+_PERSONAL_MODES = {"precomputed", "friends"}
+
+def _is_personal(source: str, pipeline: Optional[tuple]) -> bool:
+    if pipeline is not None:
+        return any(_RETRIEVERS[name].personal for name in pipeline[0])
+    return source in _PERSONAL_MODES
+
+# ------------------- Endpoints -------------------
+
+@router.get("/similar/{game_id}", response_model=List[GamePreview])
+async def similar_games(
+    game_id: int,
+    k: int = Query(10, ge=1, le=50),
+    db: AsyncSession = Depends(get_db),
+):
+    """Juegos parecidos a `game_id` por géneros, tags y desarrolladores (índice de contenido)."""
+    index = _content_index()
+    if index is None:
+        raise HTTPException(status_code=503, detail="Índice de contenido no disponible")
+    ranked = index.similar_to(game_id, k)
+    if not ranked and index.row_of(game_id) is None:
+        raise HTTPException(status_code=404, detail="Juego no indexado")
+    return await _previews_in_order(db, [gid for gid, _ in ranked])
+
+@router.get("/{user_id}", response_model=List[GamePreview])
+async def recommend_for_user(
+    user_id: int,
+    response: Response,
+    top_k: int = Query(10, ge=1, le=50),
+    k_representative: int = Query(K_REPRESENTATIVE_DEFAULT, ge=3, le=20),
+    g_top_genres: int = Query(G_TOP_GENRES_DEFAULT, ge=1, le=2),
+    pages_per_genre: int = Query(PAGES_PER_GENRE_DEFAULT, ge=1, le=1),
+    source: str = Query(settings.RECS_DEFAULT_SOURCE, pattern="^(rawg|catalog|cf|precomputed|content|ppr|friends|pipeline)$"),
+    deadline_ms: int = Query(settings.RECS_DEADLINE_MS, ge=0, le=30000),
+    retrievers: str = Query(settings.RECS_PIPELINE_RETRIEVERS, pattern=_RETRIEVER_PATTERN),
+    ranker: str = Query(settings.RECS_PIPELINE_RANKER, pattern="^(genre|blend|rrf)$"),
+    debug: bool = Query(False),
+    db: AsyncSession = Depends(get_db),
+):
+    """
+    Recomendador simplificado con menor influencia de Metacritic.
+    Flujo:
+      - Selección de juegos representativos del usuario (K).
+      - Obtención de detalles de esos juegos (K llamadas RAWG).
+      - Construcción de perfil por géneros con pesos positivos y negativos.
+      - Obtención de candidatos por géneros dominantes (1 llamada RAWG, ordenados por rating para reducir sesgo de Metacritic).
+      - Scoring y selección de top-k priorizando afinidad de géneros.
+    Total de llamadas: K + 1 (o 1 si el usuario no tiene juegos); con el perfil
+    persistido en user_profiles al día, solo 1 (los K detalles se sustituyen por una fila).
+    Con source=catalog, perfil y candidatos salen de game_catalog (0 llamadas a RAWG).
+    Con source=cf, los candidatos son vecinos item-item (app.jobs.item_cf) mezclados con la afinidad por géneros.
+    Con source=precomputed, se sirve user_recommendations (app.jobs.recs_precompute) y solo se
+    recalculan los usuarios sin fila o con fila obsoleta. El modo por defecto es RECS_DEFAULT_SOURCE.
+    Con source=content, juegos cercanos al perfil de géneros y tags en el índice de contenido.
+    Con source=ppr, PageRank personalizado sobre el grafo de sugeridos de RAWG (game_edges).
+    Con source=friends, juegos de los amigos puntuados por sus notas y la fuerza de la amistad.
+    Con source=pipeline, los recuperadores de `retrievers` (genre_page, catalog, cf, friends)
+    corren en paralelo, se fusionan y ordena el ranker `ranker` (genre, blend o rrf).
+    Los resultados se cachean por usuario y parámetros (app.recommender.cache).
+    `deadline_ms` acota la latencia total (0 = sin plazo, por defecto RECS_DEADLINE_MS): en modo RAWG los detalles y
+    candidatos que no llegan a tiempo se sustituyen por datos del catálogo y la respuesta
+    lleva X-Recs-Degraded. Server-Timing informa de la duración de cada etapa. Con
+    debug=true, X-Recs-Debug detalla por etapa duración, candidatos y aciertos de caché.
+    """
+    budget = start_budget(deadline_ms / 1000.0 if deadline_ms else None)
+    trace = PipelineTrace(budget)
+    pipeline = (list(dict.fromkeys(retrievers.split(","))), ranker) if source == "pipeline" else None
+    try:
+        return await _recommend(db, user_id, top_k, k_representative, g_top_genres, source, budget, trace, pipeline)
+    finally:
+        response.headers["Server-Timing"] = budget.server_timing()
+        if budget.degraded:
+            response.headers["X-Recs-Degraded"] = ",".join(budget.degraded_reasons)
+        if debug or settings.RECS_PIPELINE_DEBUG_HEADER:
+            response.headers["X-Recs-Debug"] = trace.header()
+        logger.debug("recs user=%s source=%s pipeline=%s %s", user_id, source, pipeline, trace.summary())
+
+async def _recommend(
+    db: AsyncSession,
+    user_id: int,
+    top_k: int,
+    k_representative: int,
+    g_top_genres: int,
+    source: str,
+    budget: Budget,
+    trace: PipelineTrace,
+    pipeline: Optional[tuple] = None,
+) -> List[GamePreview]:
+    # Caché de resultados: una entrada por usuario y parámetros (con la composición del pipeline)
+    params = (source, top_k, k_representative, g_top_genres)
+    if pipeline is not None:
+        params += (tuple(pipeline[0]), pipeline[1])
+    cache_key = None
+    if settings.RECS_CACHE_ENABLED:
+        with budget.stage("cache"):
+            cached = recommendation_cache.get(user_id, params)
+        trace.cache_result("result", "hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+        cache_key = recommendation_cache.key_for(user_id, params)
+
+    # Paso 0. Juegos del usuario
+    with budget.stage("user_games"):
+        res = await db.execute(select(UserGame).where(UserGame.user_id == user_id))
+        ugs: List[UserGame] = list(res.scalars().all())
+
+    # Cold-start: si el resultado no depende del usuario, se comparte entre todos los que no
+    # tienen juegos; si depende (amigos, fila precalculada...), va en su entrada por usuario
+    cold_params = params[:2] + params[4:]
+    shared_cold = not ugs and not _is_personal(source, pipeline)
+    if shared_cold and settings.RECS_CACHE_ENABLED:
+        cached = recommendation_cache.get_cold_start(cold_params)
+        trace.cache_result("cold_start", "hit" if cached is not None else "miss")
+        if cached is not None:
+            return cached
+
+    if pipeline is not None:
+        retrievers, ranker = pipeline
+        out = await _recommend_pipeline(
+            db, user_id, ugs, top_k, k_representative, g_top_genres, retrievers, ranker, trace,
+        )
+    else:
+        out = await _MODES[source](db, user_id, ugs, top_k, k_representative, g_top_genres)
+
+    # Las listas vacías suelen venir de fallos de RAWG y las degradadas tienen datos parciales: no se cachean
+    if settings.RECS_CACHE_ENABLED and out and not budget.degraded:
+        if shared_cold:
+            recommendation_cache.set_cold_start(cold_params, out)
+        else:
+            recommendation_cache.set(cache_key, out)
+    return out
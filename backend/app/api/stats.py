@@ -0,0 +1,40 @@
+from fastapi import APIRouter
+
+from app.core.rawg import get_rawg_stats
+from app.core.game_search import get_search_stats
+from app.core.catalog_writer import catalog_writer
+from app.core.database import engine
+from app.core.db_metrics import db_metrics
+from app.recommender.cache import recommendation_cache
+from app.recommender.ppr import personalized_ranker
+from app.recommender.catalog_store import catalog_store
+
+router = APIRouter(prefix="/stats", tags=["stats"])
+
+@router.get("/rawg")
+async def rawg_stats():
+    return get_rawg_stats()
+
+@router.get("/search")
+async def search_stats():
+    return get_search_stats()
+
+@router.get("/catalog-writer")
+async def catalog_writer_stats():
+    return catalog_writer.stats()
+
+@router.get("/recommendations")
+async def recommendation_cache_stats():
+    return recommendation_cache.stats()
+
+@router.get("/ppr")
+async def ppr_stats():
+    return personalized_ranker.stats()
+
+@router.get("/catalog-store")
+async def catalog_store_stats():
+    return catalog_store.stats()
+
+@router.get("/db")
+async def db_stats():
+    return db_metrics.stats(engine)
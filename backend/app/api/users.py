@@ -1,4 +1,4 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, status
 from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from app.core.database import SessionLocal
@@ -22,9 +22,12 @@ async def read_users(db: AsyncSession = Depends(get_db)):
 @router.get("/{user_id}/friends/games", response_model=List[GamePreview])
 async def friends_games_endpoint(
     user_id: int,
+    limit: int = Query(10, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
     db: AsyncSession = Depends(get_db),
 ):
-    return await get_friends_games(db, user_id=user_id, limit=10)
+    """Juegos de los amigos que el usuario no tiene, por puntuación social y paginados."""
+    return await get_friends_games(db, user_id=user_id, limit=limit, offset=offset)
 
 @router.get("/me", response_model=UserOut)
 async def get_me(current_user: User = Depends(get_current_user)):
@@ -0,0 +1,99 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Hashable, Optional
+
+
+@dataclass
+class _Entry:
+    value: Any
+    size: int
+    expires_at: float
+
+
+class TTLCache:
+    """
+    Caché en memoria con caducidad por entrada (TTL) y expulsión LRU,
+    acotada a la vez por número de entradas y por tamaño total en bytes.
+    Pensada para usarse desde un único event loop (no es thread-safe).
+
+    Las entradas caducadas no se borran al leerlas: se conservan hasta que se
+    sobrescriben o las expulsa el LRU, para poder servirlas con `allow_stale=True`
+    cuando el origen no está disponible.
+    """
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._bytes = 0
+
+        # Contadores
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, allow_stale: bool = False) -> Optional[Any]:
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        if entry.expires_at <= time.monotonic():
+            if allow_stale:
+                self.stale_hits += 1
+                return entry.value
+            self.expirations += 1
+            self.misses += 1
+            return None
+
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry.value
+
+    def set(self, key: Hashable, value: Any, ttl: float, size: int = 1) -> None:
+        # Una entrada que no cabe sola no se guarda (evita vaciar la caché entera)
+        if ttl <= 0 or size > self.max_bytes:
+            return
+        if key in self._data:
+            self._remove(key)
+
+        self._data[key] = _Entry(value=value, size=size, expires_at=time.monotonic() + ttl)
+        self._bytes += size
+
+        while len(self._data) > self.max_entries or self._bytes > self.max_bytes:
+            old_key, _ = next(iter(self._data.items()))
+            self._remove(old_key)
+            self.evictions += 1
+
+    def invalidate(self, key: Hashable) -> None:
+        if key in self._data:
+            self._remove(key)
+
+    def clear(self) -> None:
+        self._data.clear()
+        self._bytes = 0
+
+    def _remove(self, key: Hashable) -> None:
+        entry = self._data.pop(key)
+        self._bytes -= entry.size
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._data),
+            "bytes": self._bytes,
+            "max_entries": self.max_entries,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_ratio": (self.hits / lookups) if lookups else 0.0,
+        }
@@ -0,0 +1,155 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.game_catalog import bulk_upsert_game_catalog
+from app.crud.game_edge import replace_game_edges
+from app.crud.user_profile import include_catalog_games
+from app.recommender.cache import invalidate_user_recommendations
+
+logger = logging.getLogger(__name__)
+
+
+class CatalogWriter:
+    """
+    Escritura diferida (write-behind) hacia game_catalog.
+
+    Las peticiones encolan filas normalizadas en una cola acotada sin tocar la BD;
+    un worker en segundo plano la vacía por lotes (hasta `batch_size` filas o
+    `flush_interval` segundos), colapsa los juegos repetidos dentro de la ventana
+    y hace un único upsert masivo. Si la cola está llena, la fila se descarta:
+    el catálogo es best-effort y la petición nunca espera por él.
+
+    Por la misma cola llegan las aristas "suggested" de cada juego (game_edges),
+    que se vuelcan en el mismo lote. Tras cada lote, los juegos que los usuarios
+    tenían fuera de su perfil por no estar en el catálogo se suman a él.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        # Elementos: ("row", game_rawg_id, fila) o ("edges", game_rawg_id, [sugeridos])
+        self._queue: "asyncio.Queue[Tuple[str, int, Any]]" = asyncio.Queue(maxsize=maxsize)
+        self._task: Optional["asyncio.Task[None]"] = None
+        # Lote en construcción (clave = game_rawg_id, así se colapsan repetidos)
+        self._pending: Dict[int, Dict[str, Any]] = {}
+        self._pending_edges: Dict[int, List[int]] = {}
+
+        # Contadores
+        self.enqueued = 0
+        self.dropped = 0
+        self.collapsed = 0
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.flushed_edges = 0
+        self.errors = 0
+        self.high_water = 0
+        self.last_flush_ms = 0.0
+
+    def _put(self, item: Tuple[str, int, Any]) -> bool:
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        self.high_water = max(self.high_water, self._queue.qsize())
+        return True
+
+    def enqueue(self, row: Dict[str, Any]) -> bool:
+        return self._put(("row", row["game_rawg_id"], row))
+
+    def enqueue_edges(self, game_rawg_id: int, suggested: List[int]) -> bool:
+        """Aristas game_rawg_id -> sugeridos (en el orden de RAWG); sustituyen a las anteriores."""
+        return self._put(("edges", game_rawg_id, suggested))
+
+    def _add(self, item: Tuple[str, int, Any]) -> None:
+        kind, key, payload = item
+        target = self._pending if kind == "row" else self._pending_edges
+        if key in target:
+            self.collapsed += 1
+        target[key] = payload
+
+    async def _collect(self) -> None:
+        """Espera el primer elemento y junta los siguientes hasta llenar el lote o agotar la ventana."""
+        self._add(await self._queue.get())
+        deadline = time.monotonic() + self.flush_interval
+        while len(self._pending) + len(self._pending_edges) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = await asyncio.wait_for(self._queue.get(), timeout=remaining)
+            except asyncio.TimeoutError:
+                break
+            self._add(item)
+
+    async def _flush(self, batch: Dict[int, Dict[str, Any]], edges: Dict[int, List[int]]) -> None:
+        start = time.perf_counter()
+        try:
+            async with SessionLocal() as db:
+                if batch:
+                    await bulk_upsert_game_catalog(db, list(batch.values()))
+                    # Juegos que algún usuario añadió antes de que estuvieran en el catálogo
+                    for user_id in await include_catalog_games(db, list(batch)):
+                        invalidate_user_recommendations(user_id)
+                if edges:
+                    self.flushed_edges += await replace_game_edges(db, edges)
+            self.flushes += 1
+            self.flushed_rows += len(batch)
+        except Exception:
+            self.errors += 1
+            logger.warning("No se pudo volcar un lote de %d juegos al catálogo", len(batch), exc_info=True)
+        self.last_flush_ms = (time.perf_counter() - start) * 1000
+
+    async def _run(self) -> None:
+        while True:
+            await self._collect()
+            await self._flush(self._pending, self._pending_edges)
+            # Se limpia después del volcado: si nos cancelan a mitad, stop() lo reintenta
+            self._pending = {}
+            self._pending_edges = {}
+
+    def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        """Para el worker y vuelca lo que quede en la cola."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        while not self._queue.empty():
+            self._add(self._queue.get_nowait())
+        batch, self._pending = self._pending, {}
+        edges, self._pending_edges = self._pending_edges, {}
+        if batch or edges:
+            await self._flush(batch, edges)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "depth": self._queue.qsize(),
+            "pending": len(self._pending),
+            "pending_edges": len(self._pending_edges),
+            "maxsize": self._queue.maxsize,
+            "high_water": self.high_water,
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "collapsed": self.collapsed,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "flushed_edges": self.flushed_edges,
+            "errors": self.errors,
+            "last_flush_ms": round(self.last_flush_ms, 2),
+        }
+
+
+catalog_writer = CatalogWriter(
+    maxsize=settings.CATALOG_WRITER_QUEUE_SIZE,
+    batch_size=settings.CATALOG_WRITER_BATCH_SIZE,
+    flush_interval=settings.CATALOG_WRITER_FLUSH_INTERVAL,
+)
@@ -7,7 +7,174 @@ class Settings(BaseSettings):
     ALGORITHM: str
     RAWG_API_KEY: str
 
+    # Motor async de la BD (app.core.database). DB_ECHO vuelca cada sentencia al log: solo en desarrollo
+    DB_ECHO: bool = False
+    # Dimensionado: una petición a /recommendations?source=pipeline usa su propia conexión
+    # y una más por cada recuperador que consulte la BD (cada uno abre su sesión para
+    # correr en paralelo), hasta 4 con los de RECS_PIPELINE_RETRIEVERS por defecto.
+    # Con C peticiones de pipeline concurrentes por worker hacen falta ~4*C conexiones
+    # entre DB_POOL_SIZE y DB_MAX_OVERFLOW, y workers * (ambos) < max_connections de Postgres
+    DB_POOL_SIZE: int = 10
+    DB_MAX_OVERFLOW: int = 20
+    DB_POOL_TIMEOUT: float = 30.0           # segundos esperando conexión libre antes de fallar
+    DB_POOL_RECYCLE: int = 1800             # segundos; las conexiones más antiguas se reabren
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: int = 0        # statement_timeout de cada conexión (0 = sin límite)
+    # Instrumentación (app.core.db_metrics): consultas lentas por ruta y espera del pool
+    DB_METRICS_ENABLED: bool = True
+    DB_SLOW_QUERY_MS: float = 200.0         # 0 = no registrar consultas lentas
+    DB_METRICS_WINDOW: int = 1000           # muestras por ruta para los percentiles
+
+    # Cliente HTTP compartido para RAWG (pool de conexiones y keep-alive)
+    RAWG_MAX_CONNECTIONS: int = 50
+    RAWG_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    RAWG_KEEPALIVE_EXPIRY: float = 30.0
+    RAWG_HTTP2: bool = False
+    # Timeouts (segundos): conexión y lectura por defecto, y lectura por endpoint
+    RAWG_CONNECT_TIMEOUT: float = 5.0
+    RAWG_TIMEOUT: float = 20.0
+    RAWG_SEARCH_TIMEOUT: float = 8.0
+    RAWG_DETAIL_TIMEOUT: float = 10.0
+    RAWG_PREVIEW_TIMEOUT: float = 10.0
+    # Plazos de los recursos secundarios del detalle (modo parcial)
+    RAWG_SCREENSHOTS_TIMEOUT: float = 3.0
+    RAWG_MOVIES_TIMEOUT: float = 3.0
+    RAWG_SUGGESTED_TIMEOUT: float = 3.0
+
+    # Gobernador de llamadas a RAWG: cuota (token bucket), concurrencia AIMD,
+    # reintentos con backoff y circuit breaker
+    RAWG_RATE_LIMIT_PER_SEC: float = 5.0      # 0 = sin límite de tasa
+    RAWG_RATE_BURST: int = 10
+    RAWG_CONCURRENCY_MIN: int = 2
+    RAWG_CONCURRENCY_MAX: int = 32
+    RAWG_CONCURRENCY_INITIAL: int = 8
+    RAWG_LATENCY_TARGET: float = 1.5
+    RAWG_MAX_RETRIES: int = 2
+    RAWG_BACKOFF_BASE: float = 0.2
+    RAWG_BACKOFF_MAX: float = 2.0
+    RAWG_BREAKER_FAILURES: int = 5
+    RAWG_BREAKER_RESET: float = 30.0
+
+    # Peticiones con cobertura (hedging): duplicado si la llamada supera el percentil de su ruta
+    RAWG_HEDGE_ENABLED: bool = True
+    RAWG_HEDGE_PERCENTILE: float = 95.0
+    RAWG_HEDGE_MIN_DELAY: float = 0.05      # segundos; evita duplicar respuestas ya rápidas
+    RAWG_HEDGE_WINDOW: int = 200            # latencias recientes guardadas por ruta
+    RAWG_HEDGE_MIN_SAMPLES: int = 20
+
+    # Caché en memoria de respuestas de RAWG (TTL en segundos por tipo de ruta)
+    RAWG_CACHE_ENABLED: bool = True
+    RAWG_CACHE_MAX_ENTRIES: int = 5000
+    RAWG_CACHE_MAX_BYTES: int = 64 * 1024 * 1024
+    RAWG_CACHE_TTL_GENRES: float = 24 * 3600
+    RAWG_CACHE_TTL_DETAIL: float = 6 * 3600
+    RAWG_CACHE_TTL_LIST: float = 30 * 60
+    RAWG_CACHE_TTL_SEARCH: float = 5 * 60
+
+    # Almacén persistente de respuestas (stale-while-revalidate): TTL blando y duro
+    RAWG_STORE_ENABLED: bool = True
+    RAWG_STORE_COMPRESS_MIN_BYTES: int = 1024
+    RAWG_STORE_SOFT_TTL_DETAIL: float = 24 * 3600
+    RAWG_STORE_HARD_TTL_DETAIL: float = 30 * 24 * 3600
+    RAWG_STORE_SOFT_TTL_GENRES: float = 24 * 3600
+    RAWG_STORE_HARD_TTL_GENRES: float = 30 * 24 * 3600
+    RAWG_STORE_SOFT_TTL_POPULAR: float = 3600
+    RAWG_STORE_HARD_TTL_POPULAR: float = 24 * 3600
+    # Copia en memoria (L1) de las lecturas del almacén: evita la consulta a la BD en las
+    # claves calientes. El TTL nunca pasa del blando, así que no retrasa los refrescos
+    RAWG_STORE_L1_TTL: float = 300.0
+    RAWG_STORE_L1_MAX_ENTRIES: int = 2000
+    RAWG_STORE_L1_MAX_BYTES: int = 32 * 1024 * 1024
+
+    # Búsqueda local en game_catalog: mínimo de resultados antes de recurrir a RAWG
+    CATALOG_SEARCH_MIN_RESULTS: int = 5
+
+    # Crawler del catálogo de RAWG (CATALOG_CRAWL_INTERVAL=0 desactiva el refresco periódico)
+    CATALOG_CRAWL_START: str = "1980-01-01"
+    CATALOG_CRAWL_WINDOW_DAYS: int = 30
+    CATALOG_CRAWL_CONCURRENCY: int = 4
+    CATALOG_CRAWL_BATCH_SIZE: int = 500
+    CATALOG_CRAWL_INCREMENTAL_DAYS: int = 7
+    CATALOG_CRAWL_INTERVAL: float = 0.0
+    # Cuota propia del crawler, muy por debajo de RAWG_RATE_LIMIT_PER_SEC para no
+    # quitarle tokens al tráfico interactivo (cada página sigue pasando por el gobernador)
+    CATALOG_CRAWL_RATE_PER_SEC: float = 1.0   # 0 = sin cuota propia (solo la global)
+    CATALOG_CRAWL_RATE_BURST: int = 2
+    # Lease en crawler_checkpoints que reserva el refresco periódico para un solo worker;
+    # se renueva tras cada grupo de ventanas y caduca si el worker muere
+    CATALOG_CRAWL_LEASE_TTL: float = 900.0
+
+    # Escritura diferida de juegos vistos hacia game_catalog
+    CATALOG_WRITER_QUEUE_SIZE: int = 10000
+    CATALOG_WRITER_BATCH_SIZE: int = 200
+    CATALOG_WRITER_FLUSH_INTERVAL: float = 2.0
+
+    # Recomendador en modo catálogo: tamaño máximo del pool de candidatos
+    RECS_CATALOG_CANDIDATES: int = 2000
+
+    # Filtrado colaborativo item-item (job offline y modo source=cf)
+    CF_NEIGHBORS: int = 50          # vecinos guardados por juego
+    CF_SHRINKAGE: float = 10.0      # sim * n / (n + shrinkage), n = usuarios en común
+    CF_MIN_SUPPORT: int = 2         # mínimo de usuarios en común para guardar un par
+    CF_READ_CHUNK: int = 50000      # filas de user_games por lote en la lectura en streaming
+    CF_BLOCK_SIZE: int = 2048       # columnas de la matriz item-item calculadas a la vez
+    RECS_CF_WEIGHT: float = 0.5     # peso de CF frente a la afinidad por géneros al mezclar
+
+    # Recomendaciones precalculadas (app.jobs.recs_precompute y source=precomputed)
+    RECS_DEFAULT_SOURCE: str = "rawg"       # modo por defecto del endpoint
+    RECS_PRECOMPUTE_TOP_K: int = 50         # se guardan más de las que pide el endpoint (top_k <= 50)
+    RECS_PRECOMPUTE_CHUNK: int = 500        # usuarios por bloque
+    RECS_PRECOMPUTE_WORKERS: int = 0        # procesos del pool; 0 = todos los núcleos
+    RECS_PRECOMPUTED_MAX_AGE: int = 86400   # segundos; más antiguas se recalculan al pedirlas
+
+    # Caché de resultados de /recommendations (por usuario y parámetros)
+    RECS_CACHE_ENABLED: bool = True
+    RECS_CACHE_TTL: int = 300
+    RECS_CACHE_MAX_ENTRIES: int = 10000
+    RECS_COLD_START_TTL: int = 600          # resultados compartidos de usuarios sin juegos
+
+    # Plazo total por defecto de /recommendations/{user_id} (ms, 0 = sin plazo; cada petición
+    # puede fijar el suyo con deadline_ms) y margen reservado para puntuar
+    RECS_DEADLINE_MS: int = 0
+    RECS_DEADLINE_RESERVE_MS: int = 50
+
+    # Índice de similitud de contenido (app.jobs.content_index, ficheros .npy con mmap)
+    CONTENT_INDEX_PATH: str = "data/content_index"
+    CONTENT_INDEX_TABLES: int = 16          # tablas LSH
+    CONTENT_INDEX_BITS: int = 12            # bits por tabla
+    CONTENT_INDEX_EXACT_MAX_ITEMS: int = 250000  # hasta aquí, búsqueda exacta por fuerza bruta
+    CONTENT_INDEX_WEIGHT_GENRES: float = 1.0
+    CONTENT_INDEX_WEIGHT_TAGS: float = 1.0
+    CONTENT_INDEX_WEIGHT_DEVELOPERS: float = 1.0
+
+    # Catálogo compacto en memoria para el modo catálogo (app.jobs.catalog_store, .npy con mmap)
+    CATALOG_STORE_ENABLED: bool = True
+    CATALOG_STORE_PATH: str = "data/catalog_store"
+    CATALOG_STORE_REFRESH_INTERVAL: int = 60   # segundos entre lecturas de filas cambiadas
+
+    # Grafo de sugeridos (game_edges) y PageRank personalizado (source=ppr)
+    PPR_ALPHA: float = 0.15             # probabilidad de reinicio en las semillas
+    PPR_MAX_ITER: int = 50
+    PPR_TOL: float = 1e-6               # parada: norma L1 del cambio entre iteraciones
+    PPR_MIN_SCORE: int = 70             # nota mínima para que un juego sea semilla
+    PPR_GRAPH_TTL: int = 600            # segundos antes de recargar el grafo de la BD
+    PPR_CACHE_TTL: int = 900
+    PPR_CACHE_MAX_ENTRIES: int = 5000
+
+    # Recomendaciones sociales (source=friends y /users/{user_id}/friends/games)
+    SOCIAL_MUTUAL_WEIGHT: float = 0.5             # fuerza de la amistad = 1 + peso * ln(1 + amigos en común)
+    SOCIAL_RECENCY_HALF_LIFE_DAYS: float = 180.0  # vida media del peso de un juego desde que el amigo lo añadió (0 = sin decaimiento)
+    SOCIAL_MIN_SCORE: int = 50                    # juegos que un amigo puntuó por debajo no suman
+
+    # Pipeline componible (source=pipeline, app.recommender.pipeline)
+    RECS_PIPELINE_RETRIEVERS: str = "catalog,cf,friends"  # por defecto; genre_page llama a RAWG
+    RECS_PIPELINE_RANKER: str = "genre"                   # genre | blend | rrf
+    RECS_PIPELINE_RETRIEVER_LIMIT: int = 500              # candidatos por recuperador
+    RECS_PIPELINE_BLEND_GENRE_WEIGHT: float = 0.5         # ranker blend: peso de la afinidad por géneros
+    RECS_PIPELINE_RRF_K: int = 60                         # ranker rrf: 1 / (k + posición)
+    RECS_PIPELINE_DEBUG_HEADER: bool = False              # X-Recs-Debug siempre (si no, solo con debug=true)
+
     class Config:
         env_file = ".env"
 
-settings = Settings()
\ No newline at end of file
+settings = Settings()
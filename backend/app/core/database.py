@@ -1,15 +1,41 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker, declarative_base
-from typing import AsyncGenerator
+from typing import Any, AsyncGenerator, Dict
 from app.core.config import settings
+from app.core.db_metrics import TimedQueuePool, instrument_engine
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(DATABASE_URL, echo=True)
+
+def _engine_options() -> Dict[str, Any]:
+    """Parámetros del motor y del pool desde Settings (DB_*)."""
+    options: Dict[str, Any] = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+    if settings.DB_METRICS_ENABLED:
+        options["poolclass"] = TimedQueuePool
+    if settings.DB_STATEMENT_TIMEOUT_MS > 0:
+        timeout = str(settings.DB_STATEMENT_TIMEOUT_MS)
+        # asyncpg recibe los parámetros de sesión aparte; psycopg, por la cadena de opciones
+        if DATABASE_URL.startswith("postgresql+asyncpg"):
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+engine = create_async_engine(DATABASE_URL, **_engine_options())
+if settings.DB_METRICS_ENABLED:
+    instrument_engine(engine)
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, expire_on_commit=False)
 
 Base = declarative_base()
 
 async def get_async_session() -> AsyncGenerator[AsyncSession, None]:
     async with SessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
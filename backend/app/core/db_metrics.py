@@ -0,0 +1,164 @@
+"""
+Instrumentación del motor de la BD:
+
+  - espera para obtener una conexión del pool (incluida la apertura de una nueva) y
+    checkouts que agotan DB_POOL_TIMEOUT, con `TimedQueuePool`;
+  - conexiones en uso, libres y de desborde, leídas del pool al pedir las métricas;
+  - duración de las consultas por ruta y registro de las que pasan de DB_SLOW_QUERY_MS,
+    etiquetadas con la ruta de la petición que las originó.
+
+La ruta se toma del scope ASGI que `DbRouteMiddleware` deja en una ContextVar (SQLAlchemy
+ejecuta el driver en un greenlet que hereda el contexto de la corrutina); la plantilla
+(`/recommendations/{user_id}`) solo se resuelve al registrar, cuando el router ya la ha
+puesto en el scope. Fuera de una petición (jobs, scripts) la etiqueta es "-".
+"""
+import logging
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Deque, Dict, Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.config import settings
+from app.core.hedging import LatencyTracker
+
+logger = logging.getLogger(__name__)
+
+# Consultas lentas recientes que se conservan para /stats/db
+RECENT_SLOW = 50
+STATEMENT_MAX_CHARS = 500
+
+_scope: ContextVar[Optional[Dict[str, Any]]] = ContextVar("db_route_scope", default=None)
+
+
+def current_route() -> str:
+    """`MÉTODO /plantilla` de la petición en curso, o "-" fuera de una petición."""
+    scope = _scope.get()
+    if scope is None:
+        return "-"
+    path = getattr(scope.get("route"), "path", None) or scope.get("path", "")
+    return f"{scope.get('method', '')} {path}"
+
+
+class DbRouteMiddleware:
+    """Middleware ASGI que expone el scope de la petición a la instrumentación de la BD."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        token = _scope.set(scope)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _scope.reset(token)
+
+
+class DbMetrics:
+    def __init__(self, slow_query_ms: float, window: int = 1000):
+        self.slow_query_ms = slow_query_ms
+        self._checkout = LatencyTracker(window=window, min_samples=1)
+        self._queries = LatencyTracker(window=window, min_samples=1)
+        self._slow_by_route: Dict[str, Dict[str, Any]] = {}
+        self._recent_slow: Deque[Dict[str, Any]] = deque(maxlen=RECENT_SLOW)
+
+        # Contadores
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_max = 0.0
+        self.queries = 0
+        self.slow_queries = 0
+
+    def record_checkout(self, seconds: float, timed_out: bool) -> None:
+        if timed_out:
+            self.checkout_timeouts += 1
+            return
+        self.checkouts += 1
+        self.checkout_wait_max = max(self.checkout_wait_max, seconds)
+        self._checkout.record("checkout", seconds)
+
+    def record_query(self, statement: str, seconds: float) -> None:
+        route = current_route()
+        self.queries += 1
+        self._queries.record(route, seconds)
+        ms = seconds * 1000
+        if self.slow_query_ms <= 0 or ms < self.slow_query_ms:
+            return
+        self.slow_queries += 1
+        statement = " ".join(statement.split())[:STATEMENT_MAX_CHARS]
+        logger.warning("Consulta lenta (%.1f ms) [%s]: %s", ms, route, statement)
+        agg = self._slow_by_route.setdefault(route, {"count": 0, "max_ms": 0.0})
+        agg["count"] += 1
+        agg["max_ms"] = round(max(agg["max_ms"], ms), 1)
+        self._recent_slow.append({"route": route, "ms": round(ms, 1), "statement": statement, "at": time.time()})
+
+    def stats(self, engine: AsyncEngine) -> Dict[str, Any]:
+        pool = engine.sync_engine.pool
+        out: Dict[str, Any] = {
+            "checkout": {
+                "count": self.checkouts,
+                "timeouts": self.checkout_timeouts,
+                "wait_max": self.checkout_wait_max,
+                "wait": self._checkout.stats().get("checkout"),
+            },
+            "queries": {"count": self.queries, "by_route": self._queries.stats()},
+            "slow_queries": {
+                "threshold_ms": self.slow_query_ms,
+                "count": self.slow_queries,
+                "by_route": self._slow_by_route,
+                "recent": list(self._recent_slow),
+            },
+        }
+        if isinstance(pool, AsyncAdaptedQueuePool):
+            out["pool"] = {
+                "size": pool.size(),
+                "in_use": pool.checkedout(),
+                "idle": pool.checkedin(),
+                # overflow() es negativo mientras no se han abierto pool_size conexiones
+                "overflow": max(0, pool.overflow()),
+            }
+        return out
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Pool por defecto del motor async que mide cuánto tarda cada checkout."""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            conn = super()._do_get()
+        except PoolTimeoutError:
+            db_metrics.record_checkout(time.perf_counter() - start, timed_out=True)
+            raise
+        db_metrics.record_checkout(time.perf_counter() - start, timed_out=False)
+        return conn
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Mide cada consulta del motor (eventos del cursor) para el registro de lentas."""
+    sync_engine = engine.sync_engine
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_start"].pop()
+        db_metrics.record_query(statement, time.perf_counter() - started)
+
+    @event.listens_for(sync_engine, "handle_error")
+    def _error(exception_context):
+        # La consulta falló (p.ej. statement_timeout): se descarta su marca de inicio
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_start"):
+            conn.info["query_start"].pop()
+
+
+db_metrics = DbMetrics(slow_query_ms=settings.DB_SLOW_QUERY_MS, window=settings.DB_METRICS_WINDOW)
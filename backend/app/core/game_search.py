@@ -0,0 +1,73 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Set
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.rawg import search_games_raw, format_game, format_catalog_row
+from app.crud.game_catalog import search_catalog, bulk_upsert_game_catalog
+
+logger = logging.getLogger(__name__)
+
+# Referencias a las escrituras en segundo plano para que no las recoja el GC
+_background: Set["asyncio.Task[Any]"] = set()
+
+_stats: Dict[str, int] = {
+    "queries": 0,
+    "local_only": 0,
+    "rawg_fallbacks": 0,
+    "written_back": 0,
+}
+
+
+async def _write_back(raw: List[Dict[str, Any]]) -> None:
+    """Guarda en game_catalog lo que devolvió RAWG para que la próxima búsqueda sea local."""
+    try:
+        rows = [format_catalog_row(g) for g in raw if g.get("id") and g.get("name")]
+        if not rows:
+            return
+        async with SessionLocal() as db:
+            counts = await bulk_upsert_game_catalog(db, rows)
+        _stats["written_back"] += counts["inserted"] + counts["updated"]
+    except Exception:
+        logger.warning("No se pudo volcar la búsqueda de RAWG al catálogo", exc_info=True)
+
+
+async def search(db: AsyncSession, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Búsqueda de juegos: primero el índice local de game_catalog; si devuelve menos
+    de CATALOG_SEARCH_MIN_RESULTS, se completa con RAWG y lo devuelto se escribe
+    en el catálogo en segundo plano (sin añadir latencia a la respuesta).
+    """
+    _stats["queries"] += 1
+    local = await search_catalog(db, query, limit=limit)
+    if len(local) >= min(limit, settings.CATALOG_SEARCH_MIN_RESULTS):
+        _stats["local_only"] += 1
+        return local
+
+    _stats["rawg_fallbacks"] += 1
+    try:
+        raw = await search_games_raw(query, page_size=limit)
+    except Exception:
+        # Si RAWG falla pero hay algo en local, mejor eso que un error
+        if local:
+            return local
+        raise
+
+    task = asyncio.ensure_future(_write_back(raw))
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+    seen = {g["id"] for g in local}
+    merged = list(local)
+    for game in raw:
+        if game["id"] not in seen:
+            merged.append(format_game(game))
+            seen.add(game["id"])
+    return merged[:limit]
+
+
+def get_search_stats() -> Dict[str, Any]:
+    return dict(_stats)
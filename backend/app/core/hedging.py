@@ -0,0 +1,94 @@
+import asyncio
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class LatencyTracker:
+    """
+    Últimas `window` latencias (segundos) por ruta, para estimar percentiles sin
+    histogramas. Con menos de `min_samples` muestras no hay estimación.
+    """
+
+    def __init__(self, window: int, min_samples: int):
+        self.window = window
+        self.min_samples = min_samples
+        self._samples: Dict[str, Deque[float]] = {}
+
+    def record(self, route: str, seconds: float) -> None:
+        samples = self._samples.get(route)
+        if samples is None:
+            samples = self._samples[route] = deque(maxlen=self.window)
+        samples.append(seconds)
+
+    def percentile(self, route: str, q: float) -> Optional[float]:
+        samples = self._samples.get(route)
+        if samples is None or len(samples) < self.min_samples:
+            return None
+        ordered = sorted(samples)
+        return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            route: {
+                "samples": len(s),
+                "p50": self.percentile(route, 50),
+                "p95": self.percentile(route, 95),
+                "p99": self.percentile(route, 99),
+            }
+            for route, s in self._samples.items()
+        }
+
+
+class Hedger:
+    """
+    Petición con cobertura: si la primera no ha terminado tras `delay` segundos se lanza
+    un duplicado y gana la primera que termine bien; la otra se cancela. Si las dos
+    fallan se propaga el error de la original.
+    """
+
+    def __init__(self) -> None:
+        # Contadores
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+
+    async def run(self, fn: Callable[[], Awaitable[T]], delay: Optional[float]) -> T:
+        self.calls += 1
+        primary = asyncio.ensure_future(fn())
+        if delay is None:
+            return await primary
+
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            if done:
+                return primary.result()
+
+            self.hedged += 1
+            backup = asyncio.ensure_future(fn())
+            tasks.add(backup)
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for t in done:
+                    if not t.cancelled() and t.exception() is None:
+                        if t is backup:
+                            self.hedge_wins += 1
+                        return t.result()
+            return primary.result()
+        finally:
+            # Se cancela la perdedora (o ambas, si nos cancelan a nosotros)
+            for t in tasks:
+                if not t.done():
+                    t.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "hedged_ratio": (self.hedged / self.calls) if self.calls else 0.0,
+        }
+
@@ -1,6 +1,9 @@
+from sqlalchemy import text
 from app.core.database import engine, Base
 from app.models import user, user_game
 
 async def init_db():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
\ No newline at end of file
+        # El catálogo usa un índice trigram (búsqueda local de juegos)
+        await conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        await conn.run_sync(Base.metadata.create_all)
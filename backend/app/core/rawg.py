@@ -1,27 +1,234 @@
+import asyncio
+import re
+import time
 import httpx
 from fastapi import HTTPException
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+from urllib.parse import urlencode
 from app.core.config import settings
+from app.core.cache import TTLCache
+from app.core.singleflight import SingleFlight
+from app.core.hedging import Hedger, LatencyTracker
+from app.core.rawg_governor import RawgGovernor, CircuitOpenError, TokenBucket
+from app.core.rawg_store import read_through, get_rawg_store_stats
 
 RAWG_API_BASE_URL = "https://api.rawg.io/api"
 
+# Cliente HTTP compartido (se crea en el arranque de la app y se cierra al apagarla)
+_client: Optional[httpx.AsyncClient] = None
+
+# Caché en memoria de respuestas 200 de RAWG
+_cache = TTLCache(
+    max_entries=settings.RAWG_CACHE_MAX_ENTRIES,
+    max_bytes=settings.RAWG_CACHE_MAX_BYTES,
+)
+
+# Agrupación de peticiones idénticas en vuelo
+_singleflight = SingleFlight()
+
+# Límite de tasa/concurrencia, reintentos y circuit breaker para todo el proceso
+_governor = RawgGovernor()
+
+# Cuota aparte para el crawler del catálogo: sus páginas solo salen a este ritmo
+_crawl_bucket = TokenBucket(settings.CATALOG_CRAWL_RATE_PER_SEC, settings.CATALOG_CRAWL_RATE_BURST)
+
+# Latencias recientes por ruta y peticiones con cobertura (hedging) para los rezagados
+_latencies = LatencyTracker(window=settings.RAWG_HEDGE_WINDOW, min_samples=settings.RAWG_HEDGE_MIN_SAMPLES)
+_hedger = Hedger()
+
+# TTL por ruta (la primera regla que encaja gana). Las búsquedas van aparte.
+_CACHE_TTL_RULES: List[Tuple["re.Pattern[str]", float]] = [
+    (re.compile(r"^/genres$"), settings.RAWG_CACHE_TTL_GENRES),
+    (re.compile(r"^/games/\d+$"), settings.RAWG_CACHE_TTL_DETAIL),
+    (re.compile(r"^/games/\d+/(screenshots|movies|suggested)$"), settings.RAWG_CACHE_TTL_DETAIL),
+    (re.compile(r"^/games$"), settings.RAWG_CACHE_TTL_LIST),
+]
+
 # =========================
-# Helpers internos
+# Ciclo de vida del cliente
 # =========================
 
-async def _rawg_get(path: str, params: Optional[Dict[str, Any]] = None) -> httpx.Response:
+def _build_client() -> httpx.AsyncClient:
     """
-    Helper para GET a RAWG con timeout y API key.
-    NO transforma el payload; devuelve el Response para que el caller decida.
+    Construye el cliente de RAWG con pool de conexiones y keep-alive configurables,
+    para reutilizar las conexiones TCP/TLS entre peticiones.
     """
+    limits = httpx.Limits(
+        max_connections=settings.RAWG_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.RAWG_MAX_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=settings.RAWG_KEEPALIVE_EXPIRY,
+    )
+    timeout = httpx.Timeout(settings.RAWG_TIMEOUT, connect=settings.RAWG_CONNECT_TIMEOUT)
+    return httpx.AsyncClient(
+        base_url=RAWG_API_BASE_URL,
+        limits=limits,
+        timeout=timeout,
+        http2=settings.RAWG_HTTP2,
+    )
+
+async def start_rawg_client() -> httpx.AsyncClient:
+    """Crea el cliente compartido (idempotente). Se llama desde el lifespan de la app."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+async def close_rawg_client() -> None:
+    """Cierra el cliente compartido y libera las conexiones del pool."""
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+def get_rawg_client() -> httpx.AsyncClient:
+    """
+    Devuelve el cliente compartido. Si se usa fuera de la app (scripts, jobs),
+    se crea de forma perezosa y el llamador debe cerrarlo con close_rawg_client().
+    """
+    global _client
+    if _client is None or _client.is_closed:
+        _client = _build_client()
+    return _client
+
+
+# =========================
+# Caché
+# =========================
+
+def _cache_key(path: str, params: Optional[Dict[str, Any]]) -> str:
+    """Clave estable: ruta + parámetros ordenados, sin la API key."""
+    items = sorted((k, str(v)) for k, v in (params or {}).items() if k != "key" and v is not None)
+    return f"{path}?{urlencode(items)}" if items else path
+
+def _cache_ttl(path: str, params: Optional[Dict[str, Any]]) -> float:
+    """TTL (segundos) para una ruta; 0 significa no cachear."""
+    if params and params.get("search"):
+        return settings.RAWG_CACHE_TTL_SEARCH
+    for pattern, ttl in _CACHE_TTL_RULES:
+        if pattern.match(path):
+            return ttl
+    return 0.0
+
+def _response_from_cache(path: str, cached: Tuple[int, bytes, Dict[str, str]]) -> httpx.Response:
+    status_code, content, headers = cached
+    return httpx.Response(
+        status_code,
+        content=content,
+        headers=headers,
+        request=httpx.Request("GET", f"{RAWG_API_BASE_URL}{path}"),
+    )
+
+def get_rawg_stats() -> Dict[str, Any]:
+    """Métricas del cliente de RAWG para el endpoint de estadísticas."""
+    return {
+        "cache": _cache.stats(),
+        "singleflight": _singleflight.stats(),
+        "governor": _governor.stats(),
+        "crawl_tokens": round(_crawl_bucket.tokens, 2),
+        "hedging": {**_hedger.stats(), "latency": _latencies.stats()},
+        "store": get_rawg_store_stats(),
+    }
+
+
+# =========================
+# Helpers internos
+# =========================
+
+async def _send(
+    path: str,
+    params: Optional[Dict[str, Any]],
+    timeout: Optional[float],
+) -> httpx.Response:
+    """Petición real a RAWG con el cliente compartido."""
     merged = {"key": settings.RAWG_API_KEY}
     if params:
         merged.update(params)
 
-    async with httpx.AsyncClient(timeout=20) as client:
-        resp = await client.get(f"{RAWG_API_BASE_URL}{path}", params=merged)
+    client = get_rawg_client()
+    start = time.monotonic()
+    if timeout is None:
+        resp = await client.get(path, params=merged)
+    else:
+        resp = await client.get(
+            path,
+            params=merged,
+            timeout=httpx.Timeout(timeout, connect=settings.RAWG_CONNECT_TIMEOUT),
+        )
+    if resp.status_code < 500:
+        _latencies.record(_route(path), time.monotonic() - start)
     return resp
 
+def _route(path: str) -> str:
+    """Ruta sin ids, para agrupar latencias: /games/3498/movies -> /games/{id}/movies."""
+    return re.sub(r"/\d+", "/{id}", path)
+
+def _hedge_delay(path: str) -> Optional[float]:
+    """Espera antes del duplicado: el percentil RAWG_HEDGE_PERCENTILE de la ruta (None sin muestras)."""
+    p = _latencies.percentile(_route(path), settings.RAWG_HEDGE_PERCENTILE)
+    return None if p is None else max(p, settings.RAWG_HEDGE_MIN_DELAY)
+
+async def _rawg_get(
+    path: str,
+    params: Optional[Dict[str, Any]] = None,
+    timeout: Optional[float] = None,
+    cache: bool = True,
+    hedge: bool = False,
+) -> httpx.Response:
+    """
+    Helper para GET a RAWG con timeout y API key.
+    Usa el cliente compartido; `timeout` permite fijar la lectura por endpoint.
+    Las respuestas 200 se guardan en la caché en memoria con el TTL de su ruta
+    (salvo `cache=False`, p.ej. en recorridos masivos que no se van a repetir),
+    y las peticiones idénticas concurrentes comparten una sola llamada (single-flight).
+    Toda llamada de red pasa por el gobernador (cuota, concurrencia, reintentos y
+    circuit breaker); si RAWG no responde se sirve la copia caducada de la caché.
+    Con `hedge=True`, si la llamada tarda más que el percentil RAWG_HEDGE_PERCENTILE de
+    su ruta se lanza un duplicado (fuera del single-flight, que ya está en curso) y se
+    usa el primero que responda.
+    NO transforma el payload; devuelve el Response para que el caller decida.
+    """
+    ttl = _cache_ttl(path, params) if settings.RAWG_CACHE_ENABLED and cache else 0.0
+    key = _cache_key(path, params)
+    if ttl > 0:
+        cached = _cache.get(key)
+        if cached is not None:
+            return _response_from_cache(path, cached)
+
+    async def fetch() -> httpx.Response:
+        try:
+            send = lambda: _governor.call(lambda: _send(path, params, timeout))
+            if hedge and settings.RAWG_HEDGE_ENABLED:
+                resp = await _hedger.run(send, _hedge_delay(path))
+            else:
+                resp = await send()
+        except CircuitOpenError:
+            # RAWG está caído: copia caducada si la hay, y si no, 503 sin tocar la red
+            stale = _cache.get(key, allow_stale=True) if ttl > 0 else None
+            if stale is not None:
+                return _response_from_cache(path, stale)
+            return httpx.Response(
+                503,
+                json={"detail": "RAWG no disponible"},
+                request=httpx.Request("GET", f"{RAWG_API_BASE_URL}{path}"),
+            )
+        except httpx.TransportError:
+            stale = _cache.get(key, allow_stale=True) if ttl > 0 else None
+            if stale is not None:
+                return _response_from_cache(path, stale)
+            raise
+
+        if ttl > 0:
+            if resp.status_code == 200:
+                headers = {"content-type": resp.headers.get("content-type", "application/json")}
+                _cache.set(key, (resp.status_code, resp.content, headers), ttl=ttl, size=len(resp.content))
+            elif resp.status_code == 429 or resp.status_code >= 500:
+                stale = _cache.get(key, allow_stale=True)
+                if stale is not None:
+                    return _response_from_cache(path, stale)
+        return resp
+
+    return await _singleflight.do(key, fetch)
+
 
 # =========================
 # Mapeadores de salida
@@ -69,49 +276,135 @@ def format_game_detail(
     }
 
 
+# Función para mapear un juego de RAWG (listado o detalle crudo) a una fila de game_catalog
+def format_catalog_row(game: Dict[str, Any]) -> Dict[str, Any]:
+    released = game.get("released")
+    return {
+        "game_rawg_id": int(game["id"]),
+        "name": game.get("name") or "",
+        "genres": [g["name"] for g in game.get("genres") or []],
+        "tags": [t["name"] for t in game.get("tags") or []][:30],  # limitar un poco ruido
+        "platforms": [p["platform"]["name"] for p in game.get("platforms") or [] if p.get("platform")],
+        "metacritic": game.get("metacritic"),
+        "rating": game.get("rating"),
+        "release_year": int(released[:4]) if released else None,
+        "background_image": game.get("background_image"),
+    }
+
+
+# Función para mapear el detalle ya formateado (format_game_detail) a una fila de game_catalog
+def format_catalog_row_from_detail(detail: Dict[str, Any]) -> Dict[str, Any]:
+    released = detail.get("releaseDate")
+    return {
+        "game_rawg_id": int(detail["id"]),
+        "name": detail.get("title") or "",
+        "genres": list(detail.get("genres") or []),
+        "tags": list(detail.get("tags") or [])[:30],
+        "platforms": list(detail.get("platforms") or []),
+        "developers": list(detail.get("developers") or []),
+        "metacritic": detail.get("metacriticScore"),
+        "rating": detail.get("rating"),
+        "release_year": int(released[:4]) if released else None,
+        "background_image": detail.get("imageUrl") or None,
+    }
+
+
 # =========================
 # Búsquedas y detalle
 # =========================
 
-# Buscar juegos por nombre
-async def search_games(query: str) -> List[Dict[str, Any]]:
+# Buscar juegos por nombre (resultados crudos de RAWG)
+async def search_games_raw(query: str, page_size: int = 10) -> List[Dict[str, Any]]:
     params = {
         "search": query,
-        "page_size": 10
+        "page_size": page_size
     }
-    response = await _rawg_get("/games", params=params)
+    response = await _rawg_get("/games", params=params, timeout=settings.RAWG_SEARCH_TIMEOUT)
 
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="Error al conectar con RAWG API")
 
     data = response.json()
-    return [format_game(game) for game in data.get("results", [])]
+    return data.get("results", []) or []
+
+# Buscar juegos por nombre
+async def search_games(query: str) -> List[Dict[str, Any]]:
+    return [format_game(game) for game in await search_games_raw(query)]
+
+async def _rawg_get_results(path: str, timeout: float) -> Tuple[Dict[str, Any], bool]:
+    """
+    GET secundario con plazo propio: si falla, no devuelve 200 o no llega a tiempo,
+    se degrada a {"results": []} para no bloquear el detalle principal.
+    Devuelve también si la respuesta fue completa.
+    """
+    try:
+        resp = await asyncio.wait_for(_rawg_get(path, timeout=timeout), timeout=timeout)
+    except (asyncio.TimeoutError, httpx.HTTPError):
+        return {"results": []}, False
+    if resp.status_code != 200:
+        return {"results": []}, False
+    return resp.json(), True
+
+async def _fetch_game_details(game_id: int, partial: bool, hedge: bool = False) -> Tuple[Dict[str, Any], bool]:
+    """
+    Lanza en paralelo el juego principal y sus tres recursos secundarios
+    (screenshots, trailers y similares), de modo que la latencia sea la de la
+    llamada más lenta y no la suma de las cuatro.
+    Devuelve (detalle, completo); completo es False si algún secundario se degradó.
+    """
+    if partial:
+        timeouts = (
+            settings.RAWG_SCREENSHOTS_TIMEOUT,
+            settings.RAWG_MOVIES_TIMEOUT,
+            settings.RAWG_SUGGESTED_TIMEOUT,
+        )
+    else:
+        timeouts = (settings.RAWG_TIMEOUT,) * 3
+
+    secondary = [
+        asyncio.create_task(_rawg_get_results(f"/games/{game_id}/screenshots", timeouts[0])),
+        asyncio.create_task(_rawg_get_results(f"/games/{game_id}/movies", timeouts[1])),
+        asyncio.create_task(_rawg_get_results(f"/games/{game_id}/suggested", timeouts[2])),
+    ]
 
-# Obtener detalles de un juego por ID (extendido para tu frontend)
-async def get_game_details(game_id: int) -> Dict[str, Any]:
     # Juego principal
-    response = await _rawg_get(f"/games/{game_id}")
+    try:
+        response = await _rawg_get(f"/games/{game_id}", timeout=settings.RAWG_DETAIL_TIMEOUT, hedge=hedge)
+    except BaseException:
+        for t in secondary:
+            t.cancel()
+        raise
     if response.status_code != 200:
+        for t in secondary:
+            t.cancel()
         raise HTTPException(status_code=500, detail="No se pudo obtener el detalle del juego")
     game = response.json()
 
-    # Screenshots
-    screenshots_resp = await _rawg_get(f"/games/{game_id}/screenshots")
-    screenshots = screenshots_resp.json() if screenshots_resp.status_code == 200 else {"results": []}
-
-    # Trailers
-    trailers_resp = await _rawg_get(f"/games/{game_id}/movies")
-    trailers = trailers_resp.json() if trailers_resp.status_code == 200 else {"results": []}
+    # Screenshots, trailers y juegos similares (ya en curso)
+    (screenshots, ok_s), (trailers, ok_t), (similar_games, ok_g) = await asyncio.gather(*secondary)
 
-    # Juegos similares
-    similar_resp = await _rawg_get(f"/games/{game_id}/suggested")
-    similar_games = similar_resp.json() if similar_resp.status_code == 200 else {"results": []}
+    detail = format_game_detail(game, screenshots, trailers, similar_games)
+    return detail, (ok_s and ok_t and ok_g)
 
-    return format_game_detail(game, screenshots, trailers, similar_games)
+# Obtener detalles de un juego por ID (extendido para tu frontend)
+async def get_game_details(game_id: int, partial: bool = True, hedge: bool = False) -> Dict[str, Any]:
+    """
+    Detalle de un juego leído a través del almacén persistente (stale-while-revalidate).
+    Con `partial=True` cada secundario tiene su propio plazo corto y, si no llega,
+    se devuelve el detalle principal con esa lista vacía (y no se persiste).
+    Con `partial=False` los secundarios esperan hasta el timeout general del cliente.
+    Con `hedge=True` la llamada principal se cubre con un duplicado si se retrasa.
+    """
+    return await read_through(
+        f"detail:{game_id}",
+        lambda: _fetch_game_details(game_id, partial, hedge),
+        soft_ttl=settings.RAWG_STORE_SOFT_TTL_DETAIL,
+        hard_ttl=settings.RAWG_STORE_HARD_TTL_DETAIL,
+    )
 
 
 # Obtener juegos populares
-async def get_popular_games(page: int = 1, size: int = 10) -> List[Dict[str, Any]]:
+async def _fetch_popular_games(page: int, size: int) -> Tuple[List[Dict[str, Any]], bool]:
     params = {
         # Los más añadidos por usuarios → suelen ser conocidos
         "ordering": "-added",
@@ -125,14 +418,30 @@ async def get_popular_games(page: int = 1, size: int = 10) -> List[Dict[str, Any
         raise HTTPException(status_code=500, detail="No se pudieron obtener juegos populares")
 
     data = response.json()
-    return [format_game(game) for game in data.get("results", [])]
+    return [format_game(game) for game in data.get("results", [])], True
+
+async def get_popular_games(page: int = 1, size: int = 10) -> List[Dict[str, Any]]:
+    return await read_through(
+        f"popular:{page}:{size}",
+        lambda: _fetch_popular_games(page, size),
+        soft_ttl=settings.RAWG_STORE_SOFT_TTL_POPULAR,
+        hard_ttl=settings.RAWG_STORE_HARD_TTL_POPULAR,
+    )
 
 # Obtener lista de géneros
-async def get_genres() -> Dict[str, Any]:
+async def _fetch_genres() -> Tuple[Dict[str, Any], bool]:
     response = await _rawg_get("/genres")
     if response.status_code != 200:
         raise HTTPException(status_code=500, detail="No se pudieron obtener los géneros")
-    return response.json()
+    return response.json(), True
+
+async def get_genres() -> Dict[str, Any]:
+    return await read_through(
+        "genres",
+        _fetch_genres,
+        soft_ttl=settings.RAWG_STORE_SOFT_TTL_GENRES,
+        hard_ttl=settings.RAWG_STORE_HARD_TTL_GENRES,
+    )
 
 
 # =========================
@@ -144,6 +453,7 @@ async def list_games_by_genres(
     page: int = 1,
     page_size: int = 40,
     ordering: str = "-metacritic",
+    hedge: bool = False,
 ) -> List[Dict[str, Any]]:
     """
     Devuelve una lista de juegos (dicts crudos de RAWG) filtrados por varios géneros a la vez.
@@ -161,7 +471,7 @@ async def list_games_by_genres(
         "ordering": ordering,
     }
 
-    response = await _rawg_get("/games", params=params)
+    response = await _rawg_get("/games", params=params, hedge=hedge)
     if response.status_code != 200:
         # devolvemos lista vacía para que el caller pueda hacer fallback
         return []
@@ -170,3 +480,23 @@ async def list_games_by_genres(
     results = data.get("results", []) or []
     # devolvemos tal cual (sin format) para máxima info al rankear
     return results
+
+
+# =========================
+# Recorrido del catálogo (crawler)
+# =========================
+
+async def fetch_games_page(params: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """
+    Una página cruda de /games ({count, next, results}) sin pasar por la caché.
+    Devuelve None si la página no existe (RAWG responde 404 al pasarse del final).
+    Antes de entrar en el gobernador espera su turno en la cuota del crawler
+    (CATALOG_CRAWL_RATE_PER_SEC), así que nunca consume más que esa parte de la cuota global.
+    """
+    await _crawl_bucket.acquire()
+    response = await _rawg_get("/games", params=params, cache=False)
+    if response.status_code == 404:
+        return None
+    if response.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"RAWG respondió {response.status_code}")
+    return response.json() or {}
@@ -0,0 +1,272 @@
+import asyncio
+import random
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional
+
+import httpx
+
+from app.core.config import settings
+
+
+class CircuitOpenError(Exception):
+    """RAWG se considera caído: se falla rápido sin llegar a la red."""
+
+
+# =========================
+# Limitador de tasa (token bucket)
+# =========================
+
+class TokenBucket:
+    """Cubo de tokens: `rate` peticiones/segundo con ráfagas de hasta `burst` (rate <= 0: sin límite)."""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self._tokens = float(burst)
+        self._last = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(self.burst, self._tokens + (now - self._last) * self.rate)
+        self._last = now
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # El lock hace que los que esperan salgan en orden de llegada
+        async with self._lock:
+            while True:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+    @property
+    def tokens(self) -> float:
+        self._refill()
+        return self._tokens
+
+
+# =========================
+# Concurrencia adaptativa (AIMD)
+# =========================
+
+class AIMDLimiter:
+    """
+    Límite de peticiones simultáneas que crece de forma aditiva mientras la latencia
+    está por debajo del objetivo y se reduce de forma multiplicativa ante errores
+    (429/5xx/red) o latencias altas.
+    """
+
+    def __init__(self, min_limit: int, max_limit: int, initial: int,
+                 target_latency: float, decrease_factor: float = 0.5):
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.limit = float(initial)
+        self.target_latency = target_latency
+        self.decrease_factor = decrease_factor
+        self._inflight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+
+    async def acquire(self) -> None:
+        if self._inflight < int(self.limit) and not self._waiters:
+            self._inflight += 1
+            return
+        fut: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        try:
+            await fut
+        except asyncio.CancelledError:
+            if fut.done() and not fut.cancelled():
+                # Ya se nos había cedido el hueco: lo devolvemos
+                self._free_slot()
+            else:
+                # _free_slot puede haber sacado ya el futuro cancelado (lo salta) entre
+                # la cancelación y este except
+                try:
+                    self._waiters.remove(fut)
+                except ValueError:
+                    pass
+            raise
+
+    def release(self, latency: float, ok: Optional[bool]) -> None:
+        """`ok=None` indica que la llamada se canceló y no aporta señal."""
+        if ok is False:
+            self.limit = max(self.min_limit, self.limit * self.decrease_factor)
+        elif ok and latency > self.target_latency:
+            self.limit = max(self.min_limit, self.limit * 0.9)
+        elif ok:
+            self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+        self._free_slot()
+
+    def _free_slot(self) -> None:
+        self._inflight -= 1
+        while self._waiters and self._inflight < int(self.limit):
+            fut = self._waiters.popleft()
+            if not fut.done():
+                self._inflight += 1
+                fut.set_result(None)
+
+    @property
+    def inflight(self) -> int:
+        return self._inflight
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters)
+
+
+# =========================
+# Circuit breaker
+# =========================
+
+class CircuitBreaker:
+    """
+    closed -> open tras `failure_threshold` fallos seguidos; open -> half_open pasado
+    `reset_timeout`, dejando pasar una única llamada de prueba; si va bien se cierra.
+    """
+
+    def __init__(self, failure_threshold: int, reset_timeout: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self._failures = 0
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+
+    def allow(self) -> bool:
+        if self.state == "closed":
+            return True
+        if self.state == "open":
+            if time.monotonic() - self._opened_at < self.reset_timeout:
+                return False
+            self.state = "half_open"
+            self._probe_in_flight = False
+        # half_open: solo una llamada de prueba a la vez
+        if self._probe_in_flight:
+            return False
+        self._probe_in_flight = True
+        return True
+
+    def record_success(self) -> None:
+        self.state = "closed"
+        self._failures = 0
+        self._probe_in_flight = False
+
+    def abandon(self) -> None:
+        """La llamada terminó sin resultado (cancelada o con error): libera la prueba de half_open."""
+        self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        self._probe_in_flight = False
+        if self.state == "half_open" or self._failures >= self.failure_threshold:
+            self.state = "open"
+            self._opened_at = time.monotonic()
+
+
+# =========================
+# Gobernador
+# =========================
+
+def _is_retryable(resp: Optional[httpx.Response]) -> bool:
+    return resp is None or resp.status_code == 429 or resp.status_code >= 500
+
+def _backoff(attempt: int, resp: Optional[httpx.Response]) -> float:
+    """Backoff exponencial con full jitter; respeta Retry-After si RAWG lo envía."""
+    if resp is not None:
+        retry_after = resp.headers.get("retry-after")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.RAWG_BACKOFF_MAX)
+    cap = min(settings.RAWG_BACKOFF_MAX, settings.RAWG_BACKOFF_BASE * (2 ** attempt))
+    return random.uniform(0, cap)
+
+
+class RawgGovernor:
+    """
+    Envoltorio único para todas las llamadas de red a RAWG en el proceso:
+    token bucket (cuota), concurrencia AIMD, reintentos con jitter y circuit breaker.
+    """
+
+    def __init__(self) -> None:
+        self.bucket = TokenBucket(settings.RAWG_RATE_LIMIT_PER_SEC, settings.RAWG_RATE_BURST)
+        self.limiter = AIMDLimiter(
+            min_limit=settings.RAWG_CONCURRENCY_MIN,
+            max_limit=settings.RAWG_CONCURRENCY_MAX,
+            initial=settings.RAWG_CONCURRENCY_INITIAL,
+            target_latency=settings.RAWG_LATENCY_TARGET,
+        )
+        self.breaker = CircuitBreaker(
+            failure_threshold=settings.RAWG_BREAKER_FAILURES,
+            reset_timeout=settings.RAWG_BREAKER_RESET,
+        )
+
+        # Contadores
+        self.requests = 0
+        self.retries = 0
+        self.failures = 0
+        self.rejected = 0
+
+    async def call(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        """
+        Ejecuta `send` respetando cuota y concurrencia. Reintenta 429/5xx/errores de red.
+        Devuelve la última respuesta (aunque no sea 200) o relanza el último error de red.
+        Lanza CircuitOpenError si el breaker está abierto.
+        """
+        if not self.breaker.allow():
+            self.rejected += 1
+            raise CircuitOpenError()
+
+        try:
+            return await self._call_with_retries(send)
+        except BaseException:
+            # Cancelación o error no reintentable (p.ej. httpx.DecodingError): sin esto la
+            # prueba de half_open quedaría ocupada para siempre y no pasaría ninguna llamada
+            self.breaker.abandon()
+            raise
+
+    async def _call_with_retries(self, send: Callable[[], Awaitable[httpx.Response]]) -> httpx.Response:
+        resp: Optional[httpx.Response] = None
+        error: Optional[Exception] = None
+        for attempt in range(settings.RAWG_MAX_RETRIES + 1):
+            await self.bucket.acquire()
+            await self.limiter.acquire()
+            self.requests += 1
+            start = time.monotonic()
+            ok: Optional[bool] = None
+            try:
+                resp, error = await send(), None
+                ok = not _is_retryable(resp)
+            except httpx.TransportError as exc:
+                resp, error, ok = None, exc, False
+            finally:
+                self.limiter.release(time.monotonic() - start, ok)
+
+            if ok:
+                self.breaker.record_success()
+                return resp
+            if attempt < settings.RAWG_MAX_RETRIES:
+                self.retries += 1
+                await asyncio.sleep(_backoff(attempt, resp))
+
+        self.failures += 1
+        self.breaker.record_failure()
+        if resp is not None:
+            return resp
+        raise error
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": self.requests,
+            "retries": self.retries,
+            "failures": self.failures,
+            "rejected": self.rejected,
+            "tokens": round(self.bucket.tokens, 2),
+            "concurrency_limit": round(self.limiter.limit, 2),
+            "inflight": self.limiter.inflight,
+            "waiting": self.limiter.waiting,
+            "breaker": self.breaker.state,
+        }
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import logging
+import zlib
+from datetime import datetime, timezone
+from typing import Any, Awaitable, Callable, Dict, Set, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.rawg_response import get_rawg_response, put_rawg_response
+
+logger = logging.getLogger(__name__)
+
+# Un fetcher devuelve (valor, guardable). Si guardable es False (p.ej. detalle parcial),
+# el valor se sirve pero no se persiste.
+Fetcher = Callable[[], Awaitable[Tuple[Any, bool]]]
+
+# L1 del proceso: clave -> (payload, encoding) tal como está en la BD. Se guarda
+# codificado para que cada lectura devuelva un objeto nuevo que el llamador pueda modificar
+_l1 = TTLCache(max_entries=settings.RAWG_STORE_L1_MAX_ENTRIES, max_bytes=settings.RAWG_STORE_L1_MAX_BYTES)
+
+# Claves con un refresco en segundo plano en curso (evita refrescos duplicados)
+_refreshing: Set[str] = set()
+# Referencias a las tareas en segundo plano para que no las recoja el GC
+_background: Set["asyncio.Task[Any]"] = set()
+
+# Contadores
+_stats: Dict[str, int] = {
+    "l1_hits": 0,
+    "fresh_hits": 0,
+    "stale_hits": 0,
+    "misses": 0,
+    "refreshes": 0,
+    "refresh_errors": 0,
+    "store_errors": 0,
+}
+
+# =========================
+# Serialización
+# =========================
+
+def _encode(value: Any) -> Tuple[bytes, str]:
+    """JSON compacto; se comprime con zlib a partir de cierto tamaño (detalles)."""
+    raw = json.dumps(value, separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    if len(raw) >= settings.RAWG_STORE_COMPRESS_MIN_BYTES:
+        return zlib.compress(raw, 6), "zlib"
+    return raw, "json"
+
+def _decode(payload: bytes, encoding: str) -> Any:
+    if encoding == "zlib":
+        payload = zlib.decompress(payload)
+    return json.loads(payload.decode("utf-8"))
+
+# =========================
+# Persistencia
+# =========================
+
+def _remember(key: str, payload: bytes, encoding: str, ttl: float) -> None:
+    _l1.set(key, (payload, encoding), ttl=min(ttl, settings.RAWG_STORE_L1_TTL), size=len(payload))
+
+async def _save(key: str, value: Any, soft_ttl: float) -> None:
+    payload, encoding = _encode(value)
+    _remember(key, payload, encoding, soft_ttl)
+    try:
+        async with SessionLocal() as db:
+            await put_rawg_response(db, key, payload, encoding, datetime.now(timezone.utc))
+    except Exception:
+        _stats["store_errors"] += 1
+        logger.exception("No se pudo guardar la respuesta de RAWG %s", key)
+
+async def _refresh(key: str, fetch: Fetcher, soft_ttl: float) -> None:
+    try:
+        value, storable = await fetch()
+        if storable:
+            await _save(key, value, soft_ttl)
+        _stats["refreshes"] += 1
+    except Exception:
+        _stats["refresh_errors"] += 1
+        logger.warning("Fallo al refrescar en segundo plano %s", key, exc_info=True)
+    finally:
+        _refreshing.discard(key)
+
+def _spawn(coro: Awaitable[Any]) -> None:
+    task = asyncio.ensure_future(coro)
+    _background.add(task)
+    task.add_done_callback(_background.discard)
+
+# =========================
+# Lectura con stale-while-revalidate
+# =========================
+
+async def read_through(key: str, fetch: Fetcher, soft_ttl: float, hard_ttl: float) -> Any:
+    """
+    Lee `key` de la copia en memoria (L1) o, si no está, del almacén persistente:
+      - edad < soft_ttl: se sirve la copia guardada y se deja en L1 lo que le quede
+        de soft_ttl (como mucho RAWG_STORE_L1_TTL).
+      - soft_ttl <= edad < hard_ttl: se sirve la copia guardada y se refresca en segundo plano.
+      - sin copia o edad >= hard_ttl: se pide a RAWG y se guarda en segundo plano.
+    Si la BD falla, se degrada a llamar directamente a RAWG.
+    """
+    if not settings.RAWG_STORE_ENABLED:
+        value, _ = await fetch()
+        return value
+
+    cached = _l1.get(key)
+    if cached is not None:
+        _stats["l1_hits"] += 1
+        return _decode(*cached)
+
+    row = None
+    try:
+        async with SessionLocal() as db:
+            row = await get_rawg_response(db, key)
+    except Exception:
+        _stats["store_errors"] += 1
+        logger.warning("No se pudo leer %s del almacén de RAWG", key, exc_info=True)
+
+    if row is not None:
+        age = (datetime.now(timezone.utc) - row.fetched_at).total_seconds()
+        if age < hard_ttl:
+            if age < soft_ttl:
+                _stats["fresh_hits"] += 1
+                _remember(key, row.payload, row.encoding, soft_ttl - age)
+            else:
+                _stats["stale_hits"] += 1
+                if key not in _refreshing:
+                    _refreshing.add(key)
+                    _spawn(_refresh(key, fetch, soft_ttl))
+            return _decode(row.payload, row.encoding)
+
+    _stats["misses"] += 1
+    value, storable = await fetch()
+    if storable:
+        _spawn(_save(key, value, soft_ttl))
+    return value
+
+async def close_rawg_store() -> None:
+    """Espera a que terminen las escrituras y refrescos pendientes (apagado ordenado)."""
+    if _background:
+        await asyncio.gather(*list(_background), return_exceptions=True)
+
+def get_rawg_store_stats() -> Dict[str, Any]:
+    return {**_stats, "l1_entries": len(_l1), "pending_tasks": len(_background)}
@@ -0,0 +1,57 @@
+from typing import Dict, Iterable, List, Type
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.models.catalog_term import CatalogGenre, CatalogTag, CatalogPlatform, CatalogDeveloper
+
+TermModel = Type[CatalogGenre] | Type[CatalogTag] | Type[CatalogPlatform] | Type[CatalogDeveloper]
+
+# Caché de nombre -> id por tabla. Los ids no cambian una vez asignados,
+# así que se puede guardar para siempre en el proceso.
+_name_to_id: Dict[str, Dict[str, int]] = {}
+
+
+async def intern_terms(model: TermModel, names: Iterable[str], session_factory=SessionLocal) -> Dict[str, int]:
+    """
+    Devuelve {nombre: id} para `names`, creando en el diccionario los que falten.
+    Las altas van en una sesión corta propia que se confirma antes de cachear los
+    ids: no se confirma nunca la transacción del llamador, y los ids en memoria son
+    siempre de filas ya confirmadas aunque la transacción del llamador se deshaga.
+    """
+    cache = _name_to_id.setdefault(model.__tablename__, {})
+    wanted = {n for n in names if n}
+    missing = [n for n in wanted if n not in cache]
+    if missing:
+        async with session_factory() as db:
+            await db.execute(
+                pg_insert(model)
+                .values([{"name": n} for n in missing])
+                .on_conflict_do_nothing(index_elements=[model.name])
+            )
+            res = await db.execute(select(model.id, model.name).where(model.name.in_(missing)))
+            found = res.all()
+            await db.commit()
+        for term_id, name in found:
+            cache[name] = term_id
+    return {n: cache[n] for n in wanted if n in cache}
+
+
+async def resolve_term_ids(db: AsyncSession, model: TermModel, names: Iterable[str]) -> List[int]:
+    """Ids de nombres ya existentes (sin crear los que falten)."""
+    cache = _name_to_id.setdefault(model.__tablename__, {})
+    wanted = [n for n in names if n]
+    missing = [n for n in wanted if n not in cache]
+    if missing:
+        res = await db.execute(select(model.id, model.name).where(model.name.in_(missing)))
+        for term_id, name in res.all():
+            cache[name] = term_id
+    return [cache[n] for n in wanted if n in cache]
+
+
+async def get_term_names(db: AsyncSession, model: TermModel) -> Dict[int, str]:
+    """Diccionario completo id -> nombre (son tablas pequeñas)."""
+    res = await db.execute(select(model.id, model.name))
+    return {term_id: name for term_id, name in res.all()}
@@ -0,0 +1,55 @@
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from sqlalchemy import select, func, delete, literal, Interval
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.crawler_checkpoint import CrawlerCheckpoint
+
+
+async def get_checkpoint(db: AsyncSession, name: str) -> Optional[Dict[str, Any]]:
+    res = await db.execute(select(CrawlerCheckpoint.state).where(CrawlerCheckpoint.name == name))
+    return res.scalar_one_or_none()
+
+
+async def save_checkpoint(db: AsyncSession, name: str, state: Dict[str, Any]) -> None:
+    stmt = pg_insert(CrawlerCheckpoint).values(name=name, state=state)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CrawlerCheckpoint.name],
+        set_={"state": stmt.excluded.state, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+    await db.commit()
+
+
+# =========================
+# Lease (un único proceso activo)
+# =========================
+#
+# Un lease es una fila más de crawler_checkpoints con {"owner": ...}; sigue vigente
+# mientras updated_at no tenga más de `ttl` segundos. Se toma y se renueva con una
+# sola sentencia, sin dejar ninguna conexión abierta mientras dura el trabajo.
+
+async def try_acquire_lease(db: AsyncSession, name: str, owner: str, ttl: float) -> bool:
+    """Toma (o renueva, si ya es nuestro) el lease `name`. False si otro lo tiene vigente."""
+    stmt = pg_insert(CrawlerCheckpoint).values(name=name, state={"owner": owner})
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CrawlerCheckpoint.name],
+        set_={"state": stmt.excluded.state, "updated_at": func.now()},
+        where=(
+            (CrawlerCheckpoint.state["owner"].astext == owner)
+            | (CrawlerCheckpoint.updated_at < func.now() - literal(timedelta(seconds=ttl), Interval))
+        ),
+    ).returning(CrawlerCheckpoint.name)
+    got = (await db.execute(stmt)).scalar_one_or_none() is not None
+    await db.commit()
+    return got
+
+
+async def release_lease(db: AsyncSession, name: str, owner: str) -> None:
+    await db.execute(
+        delete(CrawlerCheckpoint)
+        .where(CrawlerCheckpoint.name == name, CrawlerCheckpoint.state["owner"].astext == owner)
+    )
+    await db.commit()
@@ -8,6 +8,7 @@ from sqlalchemy import select, and_, or_, func, delete
 
 from app.models.friendship import Friendship, FriendshipStatus
 from app.models.user import User
+from app.recommender.cache import invalidate_user_recommendations
 
 
 def _pair(u1: int, u2: int) -> Tuple[int, int]:
@@ -73,6 +74,9 @@ async def accept_request(db: AsyncSession, me: int, from_user: int) -> Optional[
     fr.blocker_id = None
     await db.commit()
     await db.refresh(fr)
+    # Cambian los amigos de ambos (recomendaciones sociales)
+    invalidate_user_recommendations(me)
+    invalidate_user_recommendations(from_user)
     return fr
 
 
@@ -103,6 +107,8 @@ async def unfriend(db: AsyncSession, me: int, other: int) -> Optional[Friendship
     # Igual que tu delete_user_game: devolvemos la entidad y luego borramos
     await db.delete(fr)
     await db.commit()
+    invalidate_user_recommendations(me)
+    invalidate_user_recommendations(other)
     return fr
 
 
@@ -123,11 +129,15 @@ async def block_user(db: AsyncSession, me: int, other: int) -> Friendship:
         await db.refresh(fr)
         return fr
 
+    was_friend = fr.status == FriendshipStatus.accepted
     fr.status = FriendshipStatus.blocked
     fr.blocker_id = me
     fr.responded_at = datetime.utcnow()
     await db.commit()
     await db.refresh(fr)
+    if was_friend:
+        invalidate_user_recommendations(me)
+        invalidate_user_recommendations(other)
     return fr
 
 async def cancel_request(db: AsyncSession, me: int, to: int) -> Optional[Friendship]:
@@ -1,36 +1,300 @@
-from sqlalchemy.orm import Session
-from ..models.game_catalog import GameCatalog
-
-def upsert_game_catalog(db: Session, *, rawg_id: int, name: str,
-                        genres: list[str] | None, tags: list[str] | None,
-                        platforms: list[str] | None,
-                        metacritic: int | None = None,
-                        rating: float | None = None) -> GameCatalog:
-    g = db.get(GameCatalog, rawg_id)
-    genres_str = ";".join(genres or [])
-    tags_str = ";".join(tags or [])
-    plats_str = ";".join(platforms or [])
-    if g is None:
-        g = GameCatalog(
-            game_rawg_id=rawg_id, name=name,
-            genres=genres_str, tags=tags_str, platforms=plats_str,
-            metacritic=metacritic, rating=rating
+import hashlib
+import json
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select, func, case, literal, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..models.game_catalog import GameCatalog, SEARCH_DOCUMENT
+from ..models.catalog_term import CatalogGenre, CatalogTag, CatalogPlatform, CatalogDeveloper
+from .catalog_term import intern_terms, resolve_term_ids
+
+# Filas por sentencia en los upserts masivos (límite de parámetros de asyncpg: 32767)
+UPSERT_BATCH_SIZE = 500
+
+# Columna de nombres ";"-separados -> (columna de ids, diccionario)
+_TERM_COLUMNS = (
+    ("genres", "genre_ids", CatalogGenre),
+    ("tags", "tag_ids", CatalogTag),
+    ("platforms", "platform_ids", CatalogPlatform),
+    ("developers", "developer_ids", CatalogDeveloper),
+)
+
+# Columnas de ids que solo trae el detalle: un array vacío (fila de un listado)
+# no pisa el valor guardado y no cuentan para content_hash
+_DETAIL_ONLY_COLUMNS = ("developer_ids",)
+
+# Columnas que forman el contenido de una fila (todas menos la PK y las de control)
+_CONTENT_COLUMNS = (
+    "name", "genres", "tags", "platforms",
+    "metacritic", "rating", "release_year", "background_image",
+)
+
+
+def _catalog_values(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Convierte una fila normalizada (listas de nombres) al formato de columnas, con su hash."""
+    values = {
+        "game_rawg_id": row["game_rawg_id"],
+        "name": row["name"] or "",
+        "genres": ";".join(row.get("genres") or []),
+        "tags": ";".join(row.get("tags") or []),
+        "platforms": ";".join(row.get("platforms") or []),
+        "metacritic": row.get("metacritic"),
+        "rating": row.get("rating"),
+        "release_year": row.get("release_year"),
+        "background_image": row.get("background_image"),
+    }
+    canonical = json.dumps([values[c] for c in _CONTENT_COLUMNS], separators=(",", ":"), ensure_ascii=False)
+    values["content_hash"] = hashlib.md5(canonical.encode("utf-8")).hexdigest()
+    return values
+
+async def bulk_upsert_game_catalog(db: AsyncSession, rows: List[Dict[str, Any]]) -> Dict[str, int]:
+    """
+    Inserta o actualiza en bloque filas del catálogo con una sentencia por lote
+    (INSERT ... VALUES multi-fila ... ON CONFLICT DO UPDATE). Las filas cuyo
+    content_hash no cambia no se reescriben. Las filas vienen de `format_catalog_row`.
+    Devuelve {"inserted", "updated", "unchanged"}.
+    """
+    # Si un mismo juego aparece dos veces en el lote, gana la última versión
+    dedup = {r["game_rawg_id"]: r for r in rows}
+    values = [_catalog_values(r) for r in dedup.values()]
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    # Nombres -> ids internados (genre_ids, tag_ids, platform_ids, developer_ids)
+    for names_col, ids_col, model in _TERM_COLUMNS:
+        ids = await intern_terms(model, (n for r in dedup.values() for n in r.get(names_col) or []))
+        for v, r in zip(values, dedup.values()):
+            v[ids_col] = list(dict.fromkeys(ids[n] for n in r.get(names_col) or [] if n in ids))
+
+    for i in range(0, len(values), UPSERT_BATCH_SIZE):
+        batch = values[i:i + UPSERT_BATCH_SIZE]
+        stmt = pg_insert(GameCatalog).values(batch)
+        set_ = {c: stmt.excluded[c] for c in _CONTENT_COLUMNS}
+        changed = GameCatalog.content_hash.is_distinct_from(stmt.excluded.content_hash)
+        for _, ids_col, _ in _TERM_COLUMNS:
+            if ids_col in _DETAIL_ONLY_COLUMNS:
+                new_ids, old_ids = stmt.excluded[ids_col], getattr(GameCatalog, ids_col)
+                has_new = func.cardinality(new_ids) > 0
+                set_[ids_col] = case((has_new, new_ids), else_=old_ids)
+                changed = changed | (has_new & old_ids.is_distinct_from(new_ids))
+            else:
+                set_[ids_col] = stmt.excluded[ids_col]
+        set_["content_hash"] = stmt.excluded.content_hash
+        set_["updated_at"] = func.now()
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[GameCatalog.game_rawg_id],
+            set_=set_,
+            where=changed,
+        ).returning(
+            GameCatalog.game_rawg_id,
+            # xmax = 0 solo en filas recién insertadas
+            literal_column("(xmax = 0)").label("inserted"),
+        )
+        res = await db.execute(stmt)
+        written = res.all()
+        inserted = sum(1 for r in written if r.inserted)
+        counts["inserted"] += inserted
+        counts["updated"] += len(written) - inserted
+        counts["unchanged"] += len(batch) - len(written)
+
+    await db.commit()
+    return counts
+
+async def upsert_game_catalog(db: AsyncSession, *, rawg_id: int, name: str,
+                              genres: list[str] | None, tags: list[str] | None,
+                              platforms: list[str] | None,
+                              metacritic: int | None = None,
+                              rating: float | None = None) -> Dict[str, int]:
+    """Upsert de un solo juego (atajo sobre bulk_upsert_game_catalog)."""
+    return await bulk_upsert_game_catalog(db, [{
+        "game_rawg_id": rawg_id, "name": name,
+        "genres": genres, "tags": tags, "platforms": platforms,
+        "metacritic": metacritic, "rating": rating,
+    }])
+
+async def get_popular_games(db: AsyncSession, limit: int = 20) -> list[int]:
+    """IDs del catálogo por metacritic y rating (index-only scan sobre ix_game_catalog_popularity)."""
+    q = (
+        select(GameCatalog.game_rawg_id)
+        .order_by(
+            GameCatalog.metacritic.desc().nullslast(),
+            GameCatalog.rating.desc().nullslast(),
+        )
+        .limit(limit)
+    )
+    res = await db.execute(q)
+    return list(res.scalars().all())
+
+
+# ---------- Consultas por género/tag (índices GIN sobre arrays de ids) ----------
+
+async def list_catalog_by_genres(
+    db: AsyncSession,
+    genres: List[str],
+    limit: int = 100,
+    match_all: bool = False,
+    exclude_ids: List[int] | None = None,
+) -> List[GameCatalog]:
+    """
+    Juegos del catálogo que tienen alguno (o todos, con `match_all`) de estos géneros,
+    ordenados por rating. Usa `genre_ids && ARRAY[...]` / `@>`, resueltos con el índice GIN.
+    """
+    ids = await resolve_term_ids(db, CatalogGenre, genres)
+    if not ids:
+        return []
+    cond = GameCatalog.genre_ids.contains(ids) if match_all else GameCatalog.genre_ids.overlap(ids)
+    q = select(GameCatalog).where(cond)
+    if exclude_ids:
+        q = q.where(GameCatalog.game_rawg_id.notin_(exclude_ids))
+    q = q.order_by(GameCatalog.rating.desc().nullslast()).limit(limit)
+    res = await db.execute(q)
+    return list(res.scalars().all())
+
+async def list_catalog_by_tags(
+    db: AsyncSession,
+    tags: List[str],
+    limit: int = 100,
+    match_all: bool = False,
+) -> List[GameCatalog]:
+    """Igual que list_catalog_by_genres pero sobre tag_ids."""
+    ids = await resolve_term_ids(db, CatalogTag, tags)
+    if not ids:
+        return []
+    cond = GameCatalog.tag_ids.contains(ids) if match_all else GameCatalog.tag_ids.overlap(ids)
+    q = (
+        select(GameCatalog)
+        .where(cond)
+        .order_by(GameCatalog.rating.desc().nullslast())
+        .limit(limit)
+    )
+    res = await db.execute(q)
+    return list(res.scalars().all())
+
+
+# ---------- Recomendador basado en el catálogo ----------
+
+async def get_catalog_genre_ids(db: AsyncSession, game_ids: List[int]) -> Dict[int, List[int]]:
+    """genre_ids de varios juegos en una sola consulta (los que no están en el catálogo se omiten)."""
+    if not game_ids:
+        return {}
+    res = await db.execute(
+        select(GameCatalog.game_rawg_id, GameCatalog.genre_ids)
+        .where(GameCatalog.game_rawg_id.in_(game_ids))
+    )
+    return {gid: list(ids or []) for gid, ids in res.all()}
+
+async def get_catalog_terms(db: AsyncSession, game_ids: List[int]) -> Dict[int, Tuple[List[int], List[int]]]:
+    """(genre_ids, tag_ids) de varios juegos en una sola consulta (los que no están se omiten)."""
+    if not game_ids:
+        return {}
+    res = await db.execute(
+        select(GameCatalog.game_rawg_id, GameCatalog.genre_ids, GameCatalog.tag_ids)
+        .where(GameCatalog.game_rawg_id.in_(game_ids))
+    )
+    return {gid: (list(g or []), list(t or [])) for gid, g, t in res.all()}
+
+# Columnas que usa el recomendador (y forma de juego RAWG en la que se devuelven)
+_CANDIDATE_COLUMNS = (
+    GameCatalog.game_rawg_id,
+    GameCatalog.name,
+    GameCatalog.background_image,
+    GameCatalog.release_year,
+    GameCatalog.metacritic,
+    GameCatalog.genre_ids,
+)
+
+def _candidate_dict(r: Any) -> Dict[str, Any]:
+    return {
+        "id": r.game_rawg_id,
+        "name": r.name,
+        "background_image": r.background_image or "",
+        "released": r.release_year,
+        "metacritic": r.metacritic,
+        "genre_ids": list(r.genre_ids or []),
+    }
+
+async def list_catalog_candidates(
+    db: AsyncSession,
+    genre_ids: List[int],
+    exclude_ids: List[int] | None = None,
+    limit: int = 2000,
+) -> List[Dict[str, Any]]:
+    """
+    Candidatos que comparten algún género con `genre_ids`, ordenados por rating.
+    Solo lee las columnas que usa el recomendador y devuelve dicts con la misma
+    forma que un juego de RAWG (`genres` como ids; el llamador los traduce).
+    """
+    if not genre_ids:
+        return []
+    q = select(*_CANDIDATE_COLUMNS).where(GameCatalog.genre_ids.overlap(genre_ids))
+    if exclude_ids:
+        q = q.where(GameCatalog.game_rawg_id.notin_(exclude_ids))
+    q = q.order_by(GameCatalog.rating.desc().nullslast()).limit(limit)
+    res = await db.execute(q)
+    return [_candidate_dict(r) for r in res.all()]
+
+async def get_catalog_candidates_by_ids(db: AsyncSession, game_ids: List[int]) -> List[Dict[str, Any]]:
+    """Mismo formato que `list_catalog_candidates`, para ids concretos (p.ej. vecinos CF)."""
+    if not game_ids:
+        return []
+    res = await db.execute(select(*_CANDIDATE_COLUMNS).where(GameCatalog.game_rawg_id.in_(game_ids)))
+    return [_candidate_dict(r) for r in res.all()]
+
+
+# ---------- Búsqueda local (pg_trgm) ----------
+
+def _escape_like(q: str) -> str:
+    return q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+async def search_catalog(db: AsyncSession, query: str, limit: int = 10) -> List[Dict[str, Any]]:
+    """
+    Búsqueda tipo typeahead sobre game_catalog usando los índices trigram:
+    candidatos cuyo nombre, o su texto con géneros, tags y plataformas, contiene
+    una palabra parecida a la consulta (`%>`, word_similarity: "zel" encuentra
+    "The Legend of Zelda") o cuyo nombre empieza por ella (ILIKE 'q%'). Se ordenan
+    por parecido con el nombre, con empuje al prefijo, después por parecido con el
+    resto del texto y algo de popularidad (rating y metacritic).
+    Devuelve dicts con el formato de `format_game`.
+    """
+    q = query.strip()
+    if not q:
+        return []
+    prefix = f"{_escape_like(q)}%"
+    document = literal_column(SEARCH_DOCUMENT)
+
+    name_sim = func.word_similarity(q, GameCatalog.name)
+    doc_sim = func.word_similarity(q, document)
+    prefix_match = GameCatalog.name.ilike(prefix, escape="\\")
+    popularity = (
+        func.coalesce(GameCatalog.rating, 0) / 5.0 * 0.5
+        + func.coalesce(GameCatalog.metacritic, 0) / 100.0 * 0.5
+    )
+    rank = (
+        0.7 * (name_sim + case((prefix_match, literal(0.5)), else_=literal(0.0)))
+        + 0.1 * doc_sim
+        + 0.2 * popularity
+    )
+
+    stmt = (
+        select(
+            GameCatalog.game_rawg_id,
+            GameCatalog.name,
+            GameCatalog.release_year,
+            GameCatalog.background_image,
+            GameCatalog.rating,
         )
-        db.add(g)
-    else:
-        g.name = name
-        g.genres = genres_str
-        g.tags = tags_str
-        g.platforms = plats_str
-        g.metacritic = metacritic
-        g.rating = rating
-    db.commit()
-    db.refresh(g)
-    return g
-
-def get_popular_games(db: Session, limit: int = 20) -> list[int]:
-    q = db.query(GameCatalog).order_by(
-        GameCatalog.metacritic.desc().nullslast(),
-        GameCatalog.rating.desc().nullslast()
-    ).limit(limit)
-    return [g.game_rawg_id for g in q.all()]
+        .where(GameCatalog.name.op("%>")(q) | document.op("%>")(q) | prefix_match)
+        .order_by(rank.desc())
+        .limit(limit)
+    )
+    res = await db.execute(stmt)
+    return [
+        {
+            "id": r.game_rawg_id,
+            "title": r.name,
+            "year": r.release_year or 0,
+            "imageUrl": r.background_image or "",
+            "rating": r.rating or 0,
+        }
+        for r in res.all()
+    ]
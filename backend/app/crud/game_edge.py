@@ -0,0 +1,39 @@
+from typing import AsyncIterator, Dict, List, Tuple
+
+from sqlalchemy import select, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_edge import GameEdge
+
+# 3 columnas por fila (+ updated_at por defecto)
+INSERT_BATCH_SIZE = 5000
+
+
+async def replace_game_edges(db: AsyncSession, edges: Dict[int, List[int]]) -> int:
+    """
+    Sustituye las aristas salientes de cada juego de `edges` ({src: [dst, ...]} en
+    el orden de RAWG) por las nuevas, en una transacción. Devuelve las aristas escritas.
+    """
+    if not edges:
+        return 0
+    await db.execute(delete(GameEdge).where(GameEdge.src_rawg_id.in_(list(edges))))
+    rows = [
+        {"src_rawg_id": src, "dst_rawg_id": dst, "rank": rank}
+        for src, dsts in edges.items()
+        for rank, dst in enumerate(dict.fromkeys(d for d in dsts if d != src))
+    ]
+    for i in range(0, len(rows), INSERT_BATCH_SIZE):
+        await db.execute(pg_insert(GameEdge).values(rows[i:i + INSERT_BATCH_SIZE]).on_conflict_do_nothing())
+    await db.commit()
+    return len(rows)
+
+
+async def stream_game_edges(db: AsyncSession, chunk_size: int = 50000) -> AsyncIterator[List[Tuple[int, int, int]]]:
+    """Todas las aristas (src, dst, rank) por lotes, con cursor de servidor."""
+    result = await db.stream(
+        select(GameEdge.src_rawg_id, GameEdge.dst_rawg_id, GameEdge.rank)
+        .execution_options(yield_per=chunk_size)
+    )
+    async for part in result.partitions(chunk_size):
+        yield [(int(s), int(d), int(r)) for s, d, r in part]
@@ -0,0 +1,58 @@
+from typing import Any, Dict, Iterable, List
+
+from sqlalchemy import select, func, case, delete
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.game_neighbor import GameNeighbor
+
+# 4 columnas por fila: muy por debajo del límite de parámetros de asyncpg
+INSERT_BATCH_SIZE = 5000
+
+
+async def replace_game_neighbors(db: AsyncSession, rows: Iterable[Dict[str, Any]]) -> int:
+    """
+    Sustituye la tabla de vecinos entera en una sola transacción: los lectores
+    ven la versión anterior hasta el commit. Devuelve las filas escritas.
+    """
+    await db.execute(delete(GameNeighbor))
+    written = 0
+    batch: List[Dict[str, Any]] = []
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= INSERT_BATCH_SIZE:
+            await db.execute(pg_insert(GameNeighbor).values(batch))
+            written += len(batch)
+            batch = []
+    if batch:
+        await db.execute(pg_insert(GameNeighbor).values(batch))
+        written += len(batch)
+    await db.commit()
+    return written
+
+
+async def get_cf_scores(
+    db: AsyncSession,
+    seeds: Dict[int, float],
+    exclude_ids: List[int] | None = None,
+    limit: int = 2000,
+) -> Dict[int, float]:
+    """
+    Puntuación CF de los vecinos de `seeds` ({game_rawg_id: peso del usuario}):
+    suma de similitud * peso sobre todos los juegos semilla, en una consulta.
+    """
+    if not seeds:
+        return {}
+    weight = case(seeds, value=GameNeighbor.game_rawg_id, else_=0.0)
+    score = func.sum(GameNeighbor.similarity * weight).label("score")
+    q = (
+        select(GameNeighbor.neighbor_rawg_id, score)
+        .where(GameNeighbor.game_rawg_id.in_(list(seeds)))
+        .group_by(GameNeighbor.neighbor_rawg_id)
+        .order_by(score.desc())
+        .limit(limit)
+    )
+    if exclude_ids:
+        q = q.where(GameNeighbor.neighbor_rawg_id.notin_(exclude_ids))
+    res = await db.execute(q)
+    return {int(gid): float(s) for gid, s in res.all()}
@@ -0,0 +1,35 @@
+from typing import Optional
+from datetime import datetime
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.rawg_response import RawgResponse
+
+
+async def get_rawg_response(db: AsyncSession, key: str) -> Optional[RawgResponse]:
+    res = await db.execute(select(RawgResponse).where(RawgResponse.key == key))
+    return res.scalar_one_or_none()
+
+
+async def put_rawg_response(
+    db: AsyncSession,
+    key: str,
+    payload: bytes,
+    encoding: str,
+    fetched_at: datetime,
+) -> None:
+    stmt = pg_insert(RawgResponse).values(
+        key=key, payload=payload, encoding=encoding, fetched_at=fetched_at,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[RawgResponse.key],
+        set_={
+            "payload": stmt.excluded.payload,
+            "encoding": stmt.excluded.encoding,
+            "fetched_at": stmt.excluded.fetched_at,
+        },
+    )
+    await db.execute(stmt)
+    await db.commit()
@@ -9,6 +9,8 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user_game import UserGame
 from app.models.user import User
 from app.models.review_like import ReviewLike
+from app.crud.user_profile import load_game_terms, apply_user_game_change
+from app.recommender.cache import invalidate_user_recommendations
 
 # ---------- Upsert reseña (crea o edita) ----------
 async def upsert_review(
@@ -27,6 +29,13 @@ async def upsert_review(
     res = await db.execute(q)
     ug = res.scalar_one_or_none()
 
+    # la nota cambia la afinidad del juego en el perfil de gustos; si el juego no está
+    # en game_catalog queda fuera del perfil hasta el siguiente rebuild (sin ir a RAWG)
+    affects_profile = ug is None or ug.score != score
+    terms = None
+    if affects_profile:
+        terms = (await load_game_terms(db, [game_rawg_id], fetch_missing=False)).get(game_rawg_id)
+
     if ug is None:
         ug = UserGame(
             user_id=user_id,
@@ -40,7 +49,11 @@ async def upsert_review(
     ug.contains_spoilers = bool(contains_spoilers)
     ug.review_updated_at = now
 
+    if affects_profile:
+        await apply_user_game_change(db, user_id, game_rawg_id, ug, terms)
     await db.commit()
+    if affects_profile:
+        invalidate_user_recommendations(user_id)
     await db.refresh(ug)
     return ug
 
@@ -1,8 +1,10 @@
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from sqlalchemy import select, and_, or_, func
+from sqlalchemy import select, and_, or_, func, case, exists, literal_column, true, union_all
 from sqlalchemy import update, delete
-from typing import List
+from sqlalchemy.orm import aliased
+from typing import Any, Dict, List
+import math
 from app.models.user import User
 from app.models.user_game import UserGame
 from app.schemas.user import UserCreate, UserUpdate
@@ -12,6 +14,8 @@ from typing import Optional
 from app.models.user_game import UserGame
 from app.models.friendship import Friendship, FriendshipStatus
 from app.schemas.game import GamePreview
+from app.core.config import settings
+from app.recommender.profile import STATUS_WEIGHT, DEFAULT_STATUS_WEIGHT
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
@@ -70,40 +74,132 @@ async def search_users(db: AsyncSession, query: str):
     return result.scalars().all()
 
 
-async def get_friends_games(
+def _accepted_friends(user_id: int):
+    """CTE con los ids de los amigos aceptados (una rama por lado del par, cada una con su índice)."""
+    side_a = select(Friendship.user_id_b.label("friend_id")).where(
+        Friendship.user_id_a == user_id, Friendship.status == FriendshipStatus.accepted,
+    )
+    side_b = select(Friendship.user_id_a.label("friend_id")).where(
+        Friendship.user_id_b == user_id, Friendship.status == FriendshipStatus.accepted,
+    )
+    return union_all(side_a, side_b).cte("friends")
+
+
+def _friend_strength(friends):
+    """
+    CTE (friend_id, strength): 1 + SOCIAL_MUTUAL_WEIGHT * ln(1 + amigos en común).
+    Los amigos en común son las amistades aceptadas con ambos extremos entre mis amigos.
+    """
+    fa, fb = friends.alias("fa"), friends.alias("fb")
+    pairs = (
+        select(Friendship.user_id_a.label("a"), Friendship.user_id_b.label("b"))
+        .join(fa, fa.c.friend_id == Friendship.user_id_a)
+        .join(fb, fb.c.friend_id == Friendship.user_id_b)
+        .where(Friendship.status == FriendshipStatus.accepted)
+        .cte("friend_pairs")
+    )
+    ends = union_all(select(pairs.c.a.label("friend_id")), select(pairs.c.b.label("friend_id"))).subquery("ends")
+    mutual = select(ends.c.friend_id, func.count().label("mutual")).group_by(ends.c.friend_id).cte("mutual")
+    return (
+        select(
+            friends.c.friend_id,
+            (1.0 + settings.SOCIAL_MUTUAL_WEIGHT * func.ln(1 + func.coalesce(mutual.c.mutual, 0))).label("strength"),
+        )
+        .select_from(friends.outerjoin(mutual, mutual.c.friend_id == friends.c.friend_id))
+        .cte("strength")
+    )
+
+
+def _friend_game_weight():
+    """
+    Peso de un juego de un amigo: el de interacción (app.recommender.profile) según su
+    estado y nota, con decaimiento exponencial por la antigüedad de la entrada.
+    """
+    status_w = case(
+        STATUS_WEIGHT, value=func.lower(func.trim(UserGame.status)), else_=DEFAULT_STATUS_WEIGHT,
+    )
+    score_w = 0.5 + 0.005 * func.least(func.greatest(func.coalesce(UserGame.score, 0), 0), 100)
+    weight = status_w * score_w
+    half_life = settings.SOCIAL_RECENCY_HALF_LIFE_DAYS
+    if half_life > 0:
+        age_s = func.extract("epoch", func.timezone("utc", func.now()) - UserGame.added_at)
+        weight = weight * func.coalesce(func.exp(-math.log(2) / (half_life * 86400) * age_s), 1.0)
+    return weight
+
+
+async def list_friend_recommendations(
     db: AsyncSession,
     user_id: int,
-    limit: int = 10
-) -> List[GamePreview]:
+    limit: int = 10,
+    offset: int = 0,
+) -> List[Dict[str, Any]]:
     """
-    Devuelve hasta `limit` GamePreview de juegos de los amigos aceptados del usuario,
-    tomando juegos con estado 'Completado', agrupados por game_rawg_id, en orden aleatorio.
+    Juegos de los amigos aceptados que el usuario no tiene, puntuados en una sola
+    consulta agregada: suma sobre los amigos que lo tienen de fuerza de la amistad *
+    peso del juego para ese amigo. Los que un amigo puntuó por debajo de
+    SOCIAL_MIN_SCORE no suman. Orden estable (puntuación, id) para paginar con offset.
+    Devuelve {"id", "title", "imageUrl", "year", "score", "friends"}.
     """
-    stmt = (
+    friends = _accepted_friends(user_id)
+    strength = _friend_strength(friends)
+    mine = aliased(UserGame)
+
+    page = (
         select(
             UserGame.game_rawg_id.label("id"),
-            func.max(UserGame.game_title).label("title"),
-            func.max(UserGame.image_url).label("imageUrl"),
-            func.max(UserGame.release_year).label("year"),
-        )
-        .join(
-            Friendship,
-            or_(
-                and_(Friendship.user_id_a == user_id, UserGame.user_id == Friendship.user_id_b),
-                and_(Friendship.user_id_b == user_id, UserGame.user_id == Friendship.user_id_a),
-            ),
+            func.sum(strength.c.strength * _friend_game_weight()).label("social_score"),
+            func.count().label("friends"),
         )
+        .join(strength, strength.c.friend_id == UserGame.user_id)
         .where(
-            Friendship.status == FriendshipStatus.accepted,
-            UserGame.status == "Completado",
+            or_(UserGame.score.is_(None), UserGame.score >= settings.SOCIAL_MIN_SCORE),
+            ~exists().where(mine.user_id == user_id, mine.game_rawg_id == UserGame.game_rawg_id),
         )
         .group_by(UserGame.game_rawg_id)
-        .order_by(func.random())
+        .order_by(literal_column("social_score").desc(), UserGame.game_rawg_id)
         .limit(limit)
+        .offset(offset)
+        .cte("page")
     )
 
+    # Título e imagen solo para la página: la copia de cualquier amigo que los tenga
+    shown = aliased(UserGame)
+    preview = (
+        select(shown.game_title, shown.image_url, shown.release_year)
+        .join(strength, strength.c.friend_id == shown.user_id)
+        .where(shown.game_rawg_id == page.c.id)
+        .order_by(shown.game_title.is_(None))
+        .limit(1)
+        .lateral("preview")
+    )
+    stmt = (
+        select(
+            page.c.id,
+            func.coalesce(preview.c.game_title, "").label("title"),
+            func.coalesce(preview.c.image_url, "").label("imageUrl"),
+            func.coalesce(preview.c.release_year, 0).label("year"),
+            page.c.social_score.label("score"),
+            page.c.friends,
+        )
+        .select_from(page.outerjoin(preview, true()))
+        .order_by(page.c.social_score.desc(), page.c.id)
+    )
     rows = await db.execute(stmt)
-    return [GamePreview(**m) for m in rows.mappings().all()]
+    return [dict(m) for m in rows.mappings().all()]
+
+
+async def get_friends_games(
+    db: AsyncSession,
+    user_id: int,
+    limit: int = 10,
+    offset: int = 0,
+) -> List[GamePreview]:
+    """
+    Devuelve hasta `limit` GamePreview de juegos de los amigos aceptados del usuario que
+    él no tiene, ordenados por la puntuación social de `list_friend_recommendations`.
+    """
+    rows = await list_friend_recommendations(db, user_id, limit=limit, offset=offset)
+    return [GamePreview(id=r["id"], title=r["title"], imageUrl=r["imageUrl"], year=r["year"]) for r in rows]
 
 async def set_favorite(db: AsyncSession, user_id: int, favorite_rawg_game_id: Optional[int]):
     result = await db.execute(select(User).where(User.id == user_id))
@@ -3,37 +3,50 @@ from sqlalchemy.future import select
 from app.models.user_game import UserGame
 from app.schemas.user_game import UserGameCreate, UserGameUpdate
 from app.core.config import settings
+from app.core.rawg import _rawg_get, format_catalog_row
+from app.core.catalog_writer import catalog_writer
+from app.crud.user_profile import load_game_terms, apply_user_game_change
+from app.recommender.cache import invalidate_user_recommendations
 
-import os
-import httpx
 from typing import Optional
 
 RAWG_API_KEY = settings.RAWG_API_KEY
 
 
-async def _fetch_rawg_preview(rawg_id: int) -> Optional[dict]:
+async def _fetch_rawg_game(rawg_id: int) -> Optional[dict]:
     """
-    Devuelve un dict con datos mínimos de un juego desde RAWG,
+    Payload crudo de /games/{id} (cacheado por _rawg_get),
     o None si falla o no hay API_KEY.
     """
     if not RAWG_API_KEY:
         return None
-    url = f"https://api.rawg.io/api/games/{rawg_id}"
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            r = await client.get(url, params={"key": RAWG_API_KEY})
-            r.raise_for_status()
-            data = r.json()
-
-        title = data.get("name") or ""
-        img = data.get("background_image")
-        rel = data.get("released")  # "YYYY-MM-DD"
-        year = int(rel.split("-")[0]) if rel else None
-        return {"game_title": title, "image_url": img, "release_year": year}
+        r = await _rawg_get(f"/games/{rawg_id}", timeout=settings.RAWG_PREVIEW_TIMEOUT)
+        r.raise_for_status()
+        return r.json()
     except Exception:
         return None
 
 
+def _preview_from(data: dict) -> dict:
+    """Datos mínimos de preview a partir del payload de /games/{id}."""
+    rel = data.get("released")  # "YYYY-MM-DD"
+    return {
+        "game_title": data.get("name") or "",
+        "image_url": data.get("background_image"),
+        "release_year": int(rel.split("-")[0]) if rel else None,
+    }
+
+
+def _enqueue_catalog_row(data: Optional[dict]) -> None:
+    """
+    Manda el juego al catálogo por la escritura diferida (sin tocar la sesión de la
+    petición); el siguiente rebuild del perfil ya encontrará sus géneros y tags.
+    """
+    if data and data.get("id") and data.get("name"):
+        catalog_writer.enqueue(format_catalog_row(data))
+
+
 async def get_user_games(db: AsyncSession, user_id: int):
     result = await db.execute(select(UserGame).where(UserGame.user_id == user_id))
     return result.scalars().all()
@@ -48,17 +61,26 @@ async def get_user_game(db: AsyncSession, user_id: int, game_id: int):
 
 async def create_user_game(db: AsyncSession, user_id: int, data: UserGameCreate):
     payload = data.dict(exclude_unset=True)
+    rawg_id = payload["game_rawg_id"]
 
-    # si faltan datos de preview, intentamos completarlos
-    if not all(payload.get(k) for k in ("game_title", "image_url", "release_year")):
-        preview = await _fetch_rawg_preview(payload["game_rawg_id"])
-        if preview:
-            for k, v in preview.items():
+    # géneros/tags para el perfil de gustos, solo desde game_catalog (sin ir a RAWG)
+    terms = (await load_game_terms(db, [rawg_id], fetch_missing=False)).get(rawg_id)
+
+    # si faltan datos de preview o el juego no está en el catálogo, una sola llamada a /games/{id}
+    needs_preview = not all(payload.get(k) for k in ("game_title", "image_url", "release_year"))
+    if needs_preview or terms is None:
+        rawg = await _fetch_rawg_game(rawg_id)
+        if rawg and needs_preview:
+            for k, v in _preview_from(rawg).items():
                 payload.setdefault(k, v)
+        if terms is None:
+            _enqueue_catalog_row(rawg)
 
     game = UserGame(**payload, user_id=user_id)
     db.add(game)
+    await apply_user_game_change(db, user_id, rawg_id, game, terms)
     await db.commit()
+    invalidate_user_recommendations(user_id)
     await db.refresh(game)
     return game
 
@@ -68,12 +90,25 @@ async def update_user_game(db: AsyncSession, user_id: int, game_id: int, data: U
     if not game:
         return None
 
-    for field, value in data.dict(exclude_unset=True).items():
+    changes = data.dict(exclude_unset=True)
+    affects_profile = any(
+        k in changes and changes[k] != getattr(game, k) for k in ("status", "score")
+    )
+    terms = None
+    if affects_profile:
+        terms = (await load_game_terms(db, [game.game_rawg_id], fetch_missing=False)).get(game.game_rawg_id)
+
+    for field, value in changes.items():
         setattr(game, field, value)
 
-    # si sigue faltando algún campo de preview, intenta completarlo
-    if not all(getattr(game, k) for k in ("game_title", "image_url", "release_year")):
-        preview = await _fetch_rawg_preview(game.game_rawg_id)
+    # si sigue faltando algún campo de preview o el juego no está en el catálogo, intenta completarlo
+    needs_preview = not all(getattr(game, k) for k in ("game_title", "image_url", "release_year"))
+    catalog_miss = affects_profile and terms is None
+    if needs_preview or catalog_miss:
+        rawg = await _fetch_rawg_game(game.game_rawg_id)
+        if catalog_miss:
+            _enqueue_catalog_row(rawg)
+        preview = _preview_from(rawg) if rawg and needs_preview else None
         if preview:
             if not game.game_title:
                 game.game_title = preview["game_title"]
@@ -82,7 +117,11 @@ async def update_user_game(db: AsyncSession, user_id: int, game_id: int, data: U
             if not game.release_year:
                 game.release_year = preview["release_year"]
 
+    if affects_profile:
+        await apply_user_game_change(db, user_id, game.game_rawg_id, game, terms)
     await db.commit()
+    if affects_profile:
+        invalidate_user_recommendations(user_id)
     await db.refresh(game)
     return game
 
@@ -93,5 +132,7 @@ async def delete_user_game(db: AsyncSession, user_id: int, game_id: int):
         return None
 
     await db.delete(game)
+    await apply_user_game_change(db, user_id, game.game_rawg_id, None)
     await db.commit()
+    invalidate_user_recommendations(user_id)
     return game
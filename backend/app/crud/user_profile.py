@@ -0,0 +1,170 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func, String, cast
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.rawg import get_game_details, format_catalog_row_from_detail
+from app.crud.game_catalog import bulk_upsert_game_catalog, get_catalog_terms
+from app.models.user_game import UserGame
+from app.models.user_profile import UserProfile
+from app.recommender.profile import signed_affinity, add_terms, l2_norm
+
+logger = logging.getLogger(__name__)
+
+GameTerms = Tuple[List[int], List[int]]  # (genre_ids, tag_ids)
+
+
+async def load_game_terms(
+    db: AsyncSession,
+    game_ids: List[int],
+    fetch_missing: bool = True,
+) -> Dict[int, GameTerms]:
+    """
+    Géneros y tags (ids del catálogo) de varios juegos. Con `fetch_missing`, los que
+    no están en game_catalog se piden a RAWG y se guardan en el catálogo; eso hace
+    varias llamadas por juego y confirma la transacción, así que es solo para el
+    rebuild: las rutas de escritura usan `fetch_missing=False`.
+    """
+    terms = await get_catalog_terms(db, game_ids)
+    missing = [gid for gid in game_ids if gid not in terms]
+    if missing and fetch_missing:
+        details = await asyncio.gather(*(get_game_details(gid) for gid in missing), return_exceptions=True)
+        rows = [format_catalog_row_from_detail(d) for d in details if isinstance(d, dict) and d.get("id")]
+        if rows:
+            await bulk_upsert_game_catalog(db, rows)
+            terms.update(await get_catalog_terms(db, [r["game_rawg_id"] for r in rows]))
+        if len(rows) < len(missing):
+            logger.info("Sin géneros/tags para %d juegos (RAWG no disponible)", len(missing) - len(rows))
+    return terms
+
+
+async def get_user_profile(db: AsyncSession, user_id: int) -> Optional[UserProfile]:
+    res = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+    return res.scalar_one_or_none()
+
+
+async def _locked_profile(db: AsyncSession, user_id: int) -> UserProfile:
+    """Fila del perfil bloqueada (FOR UPDATE) hasta el commit; la crea vacía si no existe."""
+    await db.execute(
+        pg_insert(UserProfile)
+        .values(user_id=user_id, genre_aff={}, tag_aff={}, genre_norm=0.0, tag_norm=0.0, games={})
+        .on_conflict_do_nothing(index_elements=[UserProfile.user_id])
+    )
+    res = await db.execute(
+        select(UserProfile)
+        .where(UserProfile.user_id == user_id)
+        .with_for_update()
+        .execution_options(populate_existing=True)
+    )
+    return res.scalar_one()
+
+
+async def apply_user_game_change(
+    db: AsyncSession,
+    user_id: int,
+    game_rawg_id: int,
+    ug: Optional[UserGame],
+    terms: Optional[GameTerms] = None,
+) -> None:
+    """
+    Actualiza el perfil tras crear, editar o borrar (`ug=None`) un juego del usuario.
+    Resta la aportación que tenía el juego (con los términos guardados al sumarla)
+    y suma la nueva. No confirma: va en la misma transacción que el cambio del juego.
+
+    Si no se conocen los términos de un juego nuevo, queda fuera del perfil; la
+    recomendación lo detecta y recalcula en vivo hasta el siguiente rebuild.
+    """
+    profile = await _locked_profile(db, user_id)
+    games: Dict[str, Any] = dict(profile.games or {})
+    genre_aff = dict(profile.genre_aff or {})
+    tag_aff = dict(profile.tag_aff or {})
+
+    key = str(game_rawg_id)
+    old = games.pop(key, None)
+    if old is not None:
+        add_terms(genre_aff, old["g"], -old["w"])
+        add_terms(tag_aff, old["t"], -old["w"])
+        if terms is None:
+            terms = (old["g"], old["t"])
+
+    if ug is not None and terms is not None:
+        w = signed_affinity(ug.status, ug.score)
+        games[key] = {"w": w, "g": list(terms[0]), "t": list(terms[1])}
+        add_terms(genre_aff, terms[0], w)
+        add_terms(tag_aff, terms[1], w)
+
+    # Diccionarios nuevos para que SQLAlchemy detecte el cambio en las columnas JSONB
+    profile.games = games
+    profile.genre_aff = genre_aff
+    profile.tag_aff = tag_aff
+    profile.genre_norm = l2_norm(genre_aff)
+    profile.tag_norm = l2_norm(tag_aff)
+
+
+async def include_catalog_games(db: AsyncSession, game_ids: List[int]) -> List[int]:
+    """
+    Suma a los perfiles los juegos de `game_ids` que sus dueños tienen fuera del perfil
+    porque no estaban en game_catalog al añadirlos. Se llama cuando llegan sus filas
+    al catálogo (app.core.catalog_writer). Confirma; devuelve los usuarios afectados.
+    """
+    if not game_ids:
+        return []
+    res = await db.execute(
+        select(UserGame)
+        .join(UserProfile, UserProfile.user_id == UserGame.user_id)
+        .where(
+            UserGame.game_rawg_id.in_(game_ids),
+            ~UserProfile.games.has_key(cast(UserGame.game_rawg_id, String)),
+        )
+        .order_by(UserGame.user_id)
+    )
+    pending = res.scalars().all()
+    if not pending:
+        return []
+    terms = await get_catalog_terms(db, list({int(ug.game_rawg_id) for ug in pending}))
+    users = []
+    for ug in pending:
+        t = terms.get(int(ug.game_rawg_id))
+        if t is not None:
+            await apply_user_game_change(db, ug.user_id, ug.game_rawg_id, ug, t)
+            users.append(ug.user_id)
+    await db.commit()
+    return list(dict.fromkeys(users))
+
+
+async def rebuild_user_profile(db: AsyncSession, user_id: int, fetch_missing: bool = False) -> Dict[str, int]:
+    """Recalcula el perfil desde cero con todos los juegos del usuario (backfill / corrección)."""
+    res = await db.execute(
+        select(UserGame.game_rawg_id, UserGame.status, UserGame.score).where(UserGame.user_id == user_id)
+    )
+    owned = res.all()
+    terms = await load_game_terms(db, [int(gid) for gid, _, _ in owned], fetch_missing=fetch_missing)
+
+    games: Dict[str, Any] = {}
+    genre_aff: Dict[str, float] = {}
+    tag_aff: Dict[str, float] = {}
+    for gid, status, score in owned:
+        t = terms.get(int(gid))
+        if t is None:
+            continue
+        w = signed_affinity(status, score)
+        games[str(gid)] = {"w": w, "g": t[0], "t": t[1]}
+        add_terms(genre_aff, t[0], w)
+        add_terms(tag_aff, t[1], w)
+
+    values = {
+        "genre_aff": genre_aff, "tag_aff": tag_aff,
+        "genre_norm": l2_norm(genre_aff), "tag_norm": l2_norm(tag_aff),
+        "games": games,
+    }
+    stmt = pg_insert(UserProfile).values(user_id=user_id, **values)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[UserProfile.user_id],
+        set_={**{k: stmt.excluded[k] for k in values}, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+    await db.commit()
+    return {"games": len(owned), "included": len(games)}
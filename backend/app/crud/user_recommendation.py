@@ -0,0 +1,42 @@
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import select, func
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.user_profile import UserProfile
+from app.models.user_recommendation import UserRecommendation
+
+# 5 columnas por fila
+UPSERT_BATCH_SIZE = 2000
+
+
+async def get_user_recommendation(
+    db: AsyncSession, user_id: int,
+) -> Tuple[Optional[UserRecommendation], Optional[datetime]]:
+    """Fila precalculada del usuario y la última modificación de su perfil (para detectar obsoletas)."""
+    res = await db.execute(
+        select(UserRecommendation, UserProfile.updated_at)
+        .outerjoin(UserProfile, UserProfile.user_id == UserRecommendation.user_id)
+        .where(UserRecommendation.user_id == user_id)
+    )
+    row = res.first()
+    return (row[0], row[1]) if row else (None, None)
+
+
+async def upsert_user_recommendations(db: AsyncSession, rows: List[Dict[str, Any]]) -> None:
+    """Inserta o sustituye filas {user_id, items, top_k, source}; generated_at = ahora."""
+    for i in range(0, len(rows), UPSERT_BATCH_SIZE):
+        stmt = pg_insert(UserRecommendation).values(rows[i:i + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[UserRecommendation.user_id],
+            set_={
+                "items": stmt.excluded["items"],
+                "top_k": stmt.excluded.top_k,
+                "source": stmt.excluded.source,
+                "generated_at": func.now(),
+            },
+        )
+        await db.execute(stmt)
+    await db.commit()
@@ -0,0 +1,237 @@
+"""
+Ingesta del catálogo de RAWG en game_catalog.
+
+Recorre /games por ventanas de fechas (RAWG no deja paginar indefinidamente una
+sola consulta), con concurrencia acotada y pasando por el gobernador de RAWG,
+normaliza cada juego y lo vuelca por lotes con upserts masivos. El avance se
+guarda en crawler_checkpoints para poder reanudar.
+
+Uso:
+    python -m app.jobs.catalog_crawler --mode full
+    python -m app.jobs.catalog_crawler --mode incremental
+"""
+import argparse
+import asyncio
+import logging
+import uuid
+from datetime import date, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.core.rawg import fetch_games_page, format_catalog_row, close_rawg_client
+from app.crud.crawler_checkpoint import get_checkpoint, save_checkpoint, try_acquire_lease, release_lease
+from app.crud.game_catalog import bulk_upsert_game_catalog
+
+logger = logging.getLogger(__name__)
+
+CHECKPOINT_FULL = "catalog:full"
+CHECKPOINT_INCREMENTAL = "catalog:incremental"
+
+# Lease del refresco periódico: un único crawler activo entre todos los workers
+LEASE_INCREMENTAL = "catalog:incremental:lease"
+
+# Tarea periódica lanzada desde el lifespan de la app
+_periodic_task: Optional["asyncio.Task[None]"] = None
+
+
+def _windows(start: date, end: date, days: int) -> List[Tuple[date, date]]:
+    """Parte [start, end] en ventanas consecutivas de `days` días (ambos extremos incluidos)."""
+    out = []
+    cur = start
+    while cur <= end:
+        stop = min(end, cur + timedelta(days=days - 1))
+        out.append((cur, stop))
+        cur = stop + timedelta(days=1)
+    return out
+
+
+class CatalogCrawler:
+    def __init__(
+        self,
+        concurrency: int = settings.CATALOG_CRAWL_CONCURRENCY,
+        batch_size: int = settings.CATALOG_CRAWL_BATCH_SIZE,
+        window_days: int = settings.CATALOG_CRAWL_WINDOW_DAYS,
+        page_size: int = 40,
+        max_pages_per_window: Optional[int] = None,
+        lease_owner: Optional[str] = None,
+    ):
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.window_days = window_days
+        self.page_size = page_size
+        self.max_pages_per_window = max_pages_per_window
+        self.lease_owner = lease_owner
+
+        self._buffer: Dict[int, Dict[str, Any]] = {}
+        self._flush_lock = asyncio.Lock()
+        self.stats: Dict[str, int] = {
+            "windows": 0, "pages": 0, "games": 0,
+            "inserted": 0, "updated": 0, "unchanged": 0,
+        }
+
+    # ---------- Volcado por lotes ----------
+
+    async def _sink(self, results: List[Dict[str, Any]]) -> None:
+        for game in results:
+            if game.get("id") and game.get("name"):
+                row = format_catalog_row(game)
+                self._buffer[row["game_rawg_id"]] = row
+        self.stats["games"] += len(results)
+        if len(self._buffer) >= self.batch_size:
+            await self._flush()
+
+    async def _flush(self) -> None:
+        async with self._flush_lock:
+            if not self._buffer:
+                return
+            rows, self._buffer = list(self._buffer.values()), {}
+            async with SessionLocal() as db:
+                counts = await bulk_upsert_game_catalog(db, rows)
+            for k, v in counts.items():
+                self.stats[k] += v
+
+    # ---------- Recorrido ----------
+
+    async def _crawl_window(self, field: str, ordering: str, start: date, end: date) -> None:
+        """Pagina una ventana de fechas (`field` = "dates" o "updated") hasta el final."""
+        page = 1
+        while True:
+            data = await fetch_games_page({
+                field: f"{start.isoformat()},{end.isoformat()}",
+                "ordering": ordering,
+                "page": page,
+                "page_size": self.page_size,
+            })
+            if not data:
+                break
+            self.stats["pages"] += 1
+            await self._sink(data.get("results") or [])
+            if not data.get("next"):
+                break
+            if self.max_pages_per_window and page >= self.max_pages_per_window:
+                break
+            page += 1
+        self.stats["windows"] += 1
+
+    async def _crawl(self, checkpoint: str, field: str, ordering: str,
+                     start: date, end: date, state: Dict[str, Any]) -> None:
+        """
+        Recorre las ventanas en grupos de `concurrency`. Tras cada grupo se vuelca
+        el buffer y se avanza el cursor, así que al reanudar solo se repite, como
+        mucho, el último grupo (los upserts son idempotentes). Con `lease_owner` se
+        renueva además el lease y se para si otro worker lo ha tomado.
+        """
+        windows = _windows(start, end, self.window_days)
+        for i in range(0, len(windows), self.concurrency):
+            group = windows[i:i + self.concurrency]
+            await asyncio.gather(*(self._crawl_window(field, ordering, s, e) for s, e in group))
+            await self._flush()
+            state["cursor"] = (group[-1][1] + timedelta(days=1)).isoformat()
+            async with SessionLocal() as db:
+                await save_checkpoint(db, checkpoint, state)
+                if self.lease_owner and not await try_acquire_lease(
+                    db, LEASE_INCREMENTAL, self.lease_owner, settings.CATALOG_CRAWL_LEASE_TTL
+                ):
+                    raise RuntimeError("Lease del crawler perdido; otro worker continúa")
+            logger.info("Crawler %s: cursor=%s %s", checkpoint, state["cursor"], self.stats)
+
+    async def run_full(self, restart: bool = False) -> Dict[str, int]:
+        """Carga completa por fecha de lanzamiento, desde CATALOG_CRAWL_START hasta hoy."""
+        async with SessionLocal() as db:
+            state = (None if restart else await get_checkpoint(db, CHECKPOINT_FULL)) or {}
+        start = date.fromisoformat(state.get("cursor") or settings.CATALOG_CRAWL_START)
+        await self._crawl(CHECKPOINT_FULL, "dates", "released", start, date.today(), state)
+        return self.stats
+
+    async def run_incremental(self) -> Dict[str, int]:
+        """Refresco de los juegos actualizados en RAWG desde la última ejecución."""
+        today = date.today()
+        async with SessionLocal() as db:
+            state = await get_checkpoint(db, CHECKPOINT_INCREMENTAL) or {}
+        since = state.get("last_updated") or (today - timedelta(days=settings.CATALOG_CRAWL_INCREMENTAL_DAYS)).isoformat()
+        start = date.fromisoformat(state.get("cursor") or since)
+        await self._crawl(CHECKPOINT_INCREMENTAL, "updated", "updated", start, today, state)
+
+        # La siguiente pasada empieza en el día de hoy (se solapa un día, a propósito)
+        async with SessionLocal() as db:
+            await save_checkpoint(db, CHECKPOINT_INCREMENTAL, {"last_updated": today.isoformat()})
+        return self.stats
+
+
+# =========================
+# Ejecución periódica dentro de la app
+# =========================
+
+async def _run_incremental_locked() -> None:
+    """
+    Refresco incremental solo si ningún otro worker lo está haciendo. El lease se
+    toma y se renueva con sesiones cortas: no se retiene ninguna conexión del pool
+    mientras se espera a RAWG.
+    """
+    owner = uuid.uuid4().hex
+    async with SessionLocal() as db:
+        if not await try_acquire_lease(db, LEASE_INCREMENTAL, owner, settings.CATALOG_CRAWL_LEASE_TTL):
+            return
+    try:
+        stats = await CatalogCrawler(lease_owner=owner).run_incremental()
+        logger.info("Crawler incremental terminado: %s", stats)
+    finally:
+        async with SessionLocal() as db:
+            await release_lease(db, LEASE_INCREMENTAL, owner)
+
+async def _run_periodic(interval: float) -> None:
+    while True:
+        try:
+            await _run_incremental_locked()
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.exception("Fallo en el crawler incremental del catálogo")
+        await asyncio.sleep(interval)
+
+def start_catalog_crawler() -> None:
+    """Lanza el refresco incremental periódico si CATALOG_CRAWL_INTERVAL > 0."""
+    global _periodic_task
+    if settings.CATALOG_CRAWL_INTERVAL > 0 and _periodic_task is None:
+        _periodic_task = asyncio.create_task(_run_periodic(settings.CATALOG_CRAWL_INTERVAL))
+
+async def stop_catalog_crawler() -> None:
+    global _periodic_task
+    if _periodic_task is not None:
+        _periodic_task.cancel()
+        await asyncio.gather(_periodic_task, return_exceptions=True)
+        _periodic_task = None
+
+
+# =========================
+# CLI
+# =========================
+
+async def _main(args: argparse.Namespace) -> None:
+    crawler = CatalogCrawler(
+        concurrency=args.concurrency,
+        batch_size=args.batch_size,
+        window_days=args.window_days,
+        max_pages_per_window=args.max_pages,
+    )
+    try:
+        if args.mode == "full":
+            stats = await crawler.run_full(restart=args.restart)
+        else:
+            stats = await crawler.run_incremental()
+        print(stats)
+    finally:
+        await close_rawg_client()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Ingesta del catálogo de RAWG en game_catalog")
+    parser.add_argument("--mode", choices=["full", "incremental"], default="incremental")
+    parser.add_argument("--restart", action="store_true", help="ignora el checkpoint de la carga completa")
+    parser.add_argument("--concurrency", type=int, default=settings.CATALOG_CRAWL_CONCURRENCY)
+    parser.add_argument("--batch-size", type=int, default=settings.CATALOG_CRAWL_BATCH_SIZE)
+    parser.add_argument("--window-days", type=int, default=settings.CATALOG_CRAWL_WINDOW_DAYS)
+    parser.add_argument("--max-pages", type=int, default=None, help="límite de páginas por ventana")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,60 @@
+"""
+Instantánea del catálogo compacto (app.recommender.catalog_store).
+
+Lee game_catalog en streaming y deja los arrays en un directorio versionado al que
+pasa a apuntar el enlace CATALOG_STORE_PATH, donde los workers de la API los abren
+con mmap (y detectan la nueva versión). Entre dos
+ejecuciones cada worker aplica por su cuenta las filas con updated_at posterior,
+así que conviene relanzarlo periódicamente para que ese delta no crezca.
+
+Uso:
+    python -m app.jobs.catalog_store
+    python -m app.jobs.catalog_store --path /srv/catalog_store
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.recommender.catalog_store import build_catalog_segment, read_catalog_rows, save_catalog_segment, segment_nbytes
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 20000
+
+
+async def run(path: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    async with SessionLocal() as db:
+        rows, watermark = await read_catalog_rows(db, chunk_size=READ_CHUNK)
+    t_load = time.perf_counter() - t0
+
+    seg = build_catalog_segment(rows, watermark)
+    t_build = time.perf_counter() - t0 - t_load
+    save_catalog_segment(seg, path)
+
+    return {
+        "games": len(seg),
+        "bytes": segment_nbytes(seg),
+        "watermark": watermark,
+        "load_s": round(t_load, 2),
+        "build_s": round(t_build, 2),
+        "total_s": round(time.perf_counter() - t0, 2),
+        "path": path,
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        print(await run(args.path))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Escribe la instantánea del catálogo compacto del recomendador")
+    parser.add_argument("--path", default=settings.CATALOG_STORE_PATH)
+    asyncio.run(_main(parser.parse_args()))
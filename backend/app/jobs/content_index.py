@@ -0,0 +1,82 @@
+"""
+Construcción del índice de similitud de contenido (app.recommender.content_index).
+
+Lee de game_catalog los ids de géneros, tags y desarrolladores en streaming,
+construye los vectores TF-IDF y las tablas LSH y los publica como versión nueva del
+enlace CONTENT_INDEX_PATH, donde los workers de la API los abren con mmap (y detectan
+la nueva versión).
+
+Uso:
+    python -m app.jobs.content_index
+    python -m app.jobs.content_index --tables 24 --bits 13 --path /srv/index
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.models.game_catalog import GameCatalog
+from app.recommender.content_index import build_content_index, save_content_index
+
+logger = logging.getLogger(__name__)
+
+READ_CHUNK = 20000
+
+
+async def run(path: str, tables: int, bits: int) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    rows = []
+    async with SessionLocal() as db:
+        result = await db.stream(
+            select(GameCatalog.game_rawg_id, GameCatalog.genre_ids, GameCatalog.tag_ids, GameCatalog.developer_ids)
+            .execution_options(yield_per=READ_CHUNK)
+        )
+        async for part in result.partitions(READ_CHUNK):
+            rows.extend(
+                (int(r.game_rawg_id), r.genre_ids or [], r.tag_ids or [], r.developer_ids or [])
+                for r in part
+            )
+    t_load = time.perf_counter() - t0
+
+    index = build_content_index(
+        rows,
+        field_weights={
+            "genres": settings.CONTENT_INDEX_WEIGHT_GENRES,
+            "tags": settings.CONTENT_INDEX_WEIGHT_TAGS,
+            "developers": settings.CONTENT_INDEX_WEIGHT_DEVELOPERS,
+        },
+        tables=tables,
+        bits=bits,
+    )
+    t_build = time.perf_counter() - t0 - t_load
+    save_content_index(index, path)
+
+    return {
+        "games": len(index),
+        "terms": index.matrix.shape[1],
+        "nnz": index.matrix.nnz,
+        "load_s": round(t_load, 2),
+        "build_s": round(t_build, 2),
+        "total_s": round(time.perf_counter() - t0, 2),
+        "path": path,
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        print(await run(args.path, args.tables, args.bits))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Construye el índice de similitud de contenido del catálogo")
+    parser.add_argument("--path", default=settings.CONTENT_INDEX_PATH)
+    parser.add_argument("--tables", type=int, default=settings.CONTENT_INDEX_TABLES)
+    parser.add_argument("--bits", type=int, default=settings.CONTENT_INDEX_BITS)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,96 @@
+"""
+Job offline de filtrado colaborativo item-item.
+
+Lee user_games en streaming (cursor de servidor, lotes de CF_READ_CHUNK filas),
+construye la matriz usuario x juego, calcula los CF_NEIGHBORS vecinos de cada
+juego y sustituye la tabla game_neighbors. El modo source=cf de
+/recommendations los mezcla con la afinidad por géneros.
+
+Uso:
+    python -m app.jobs.item_cf
+    python -m app.jobs.item_cf --adjusted --neighbors 30 --shrinkage 20
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List
+
+import numpy as np
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.crud.game_neighbor import replace_game_neighbors
+from app.models.user_game import UserGame
+from app.recommender.cf import InteractionMatrix, build_interaction_matrix, item_neighbors
+from app.recommender.profile import interaction_weight
+
+logger = logging.getLogger(__name__)
+
+
+async def load_interactions(chunk_size: int = settings.CF_READ_CHUNK) -> InteractionMatrix:
+    """Matriz de interacciones leída por lotes: nunca hay más de un lote de filas ORM en memoria."""
+    users: List[np.ndarray] = []
+    games: List[np.ndarray] = []
+    weights: List[np.ndarray] = []
+    async with SessionLocal() as db:
+        result = await db.stream(
+            select(UserGame.user_id, UserGame.game_rawg_id, UserGame.status, UserGame.score)
+            .execution_options(yield_per=chunk_size)
+        )
+        async for part in result.partitions(chunk_size):
+            users.append(np.fromiter((r.user_id for r in part), dtype=np.int64, count=len(part)))
+            games.append(np.fromiter((r.game_rawg_id for r in part), dtype=np.int64, count=len(part)))
+            weights.append(np.fromiter(
+                (interaction_weight(r.status, r.score) for r in part), dtype=np.float64, count=len(part),
+            ))
+
+    if not users:
+        empty = np.zeros(0, dtype=np.int64)
+        return build_interaction_matrix(empty, empty, np.zeros(0))
+    return build_interaction_matrix(np.concatenate(users), np.concatenate(games), np.concatenate(weights))
+
+
+async def run(
+    neighbors: int = settings.CF_NEIGHBORS,
+    shrinkage: float = settings.CF_SHRINKAGE,
+    min_support: int = settings.CF_MIN_SUPPORT,
+    adjusted: bool = False,
+    block_size: int = settings.CF_BLOCK_SIZE,
+) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    im = await load_interactions()
+    t_load = time.perf_counter() - t0
+    logger.info("Matriz CF: %d usuarios x %d juegos, %d interacciones (%.1fs)",
+                im.matrix.shape[0], im.matrix.shape[1], im.matrix.nnz, t_load)
+
+    rows = item_neighbors(im, neighbors, shrinkage, min_support, adjusted, block_size)
+    async with SessionLocal() as db:
+        written = await replace_game_neighbors(db, rows)
+
+    return {
+        "users": im.matrix.shape[0],
+        "games": im.matrix.shape[1],
+        "interactions": im.matrix.nnz,
+        "neighbors": written,
+        "load_s": round(t_load, 2),
+        "total_s": round(time.perf_counter() - t0, 2),
+    }
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        print(await run(args.neighbors, args.shrinkage, args.min_support, args.adjusted, args.block_size))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Calcula los vecinos item-item de filtrado colaborativo")
+    parser.add_argument("--neighbors", type=int, default=settings.CF_NEIGHBORS)
+    parser.add_argument("--shrinkage", type=float, default=settings.CF_SHRINKAGE)
+    parser.add_argument("--min-support", type=int, default=settings.CF_MIN_SUPPORT)
+    parser.add_argument("--adjusted", action="store_true", help="coseno ajustado (filas centradas en la media del usuario)")
+    parser.add_argument("--block-size", type=int, default=settings.CF_BLOCK_SIZE)
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,162 @@
+"""
+Precálculo de recomendaciones en lote.
+
+Recorre los usuarios por bloques (paginación por id), carga en unas pocas
+consultas por bloque sus juegos y perfiles, agrupa a los usuarios por géneros
+dominantes para compartir pool de candidatos y reparte el scoring entre todos
+los núcleos con un ProcessPoolExecutor. El resultado va a user_recommendations,
+de donde lo sirve /recommendations/{user_id}?source=precomputed.
+
+Uso:
+    python -m app.jobs.recs_precompute
+    python -m app.jobs.recs_precompute --workers 8 --chunk-size 1000 --top-k 50
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Tuple
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import SessionLocal, engine
+from app.crud.catalog_term import get_term_names
+from app.crud.game_catalog import list_catalog_candidates
+from app.crud.user_recommendation import upsert_user_recommendations
+from app.models.catalog_term import CatalogGenre
+from app.models.user import User
+from app.models.user_game import UserGame
+from app.models.user_profile import UserProfile
+from app.recommender.batch import UserTask, rank_users
+from app.recommender.genre_profile import (
+    POPULAR_GENRES, K_REPRESENTATIVE_DEFAULT, G_TOP_GENRES_DEFAULT, catalog_genre_profile, profile_covers,
+)
+from app.recommender.profile import normalized
+
+logger = logging.getLogger(__name__)
+
+SOURCE = "catalog"
+
+
+async def _prepare_chunk(
+    db, user_ids: List[int], genre_names: Dict[int, str],
+) -> List[UserTask]:
+    """Perfil y clave de pool de cada usuario del bloque (2 consultas + recálculo de perfiles desfasados)."""
+    ugs_by_user: Dict[int, List[UserGame]] = defaultdict(list)
+    res = await db.execute(select(UserGame).where(UserGame.user_id.in_(user_ids)))
+    for ug in res.scalars().all():
+        ugs_by_user[ug.user_id].append(ug)
+    res = await db.execute(select(UserProfile).where(UserProfile.user_id.in_(user_ids)))
+    profiles = {p.user_id: p for p in res.scalars().all()}
+
+    genre_ids_by_name = {name: gid for gid, name in genre_names.items()}
+    popular_key = ("popular",) + tuple(sorted(genre_ids_by_name[g] for g in POPULAR_GENRES if g in genre_ids_by_name))
+
+    tasks: List[UserTask] = []
+    for uid in user_ids:
+        ugs = ugs_by_user.get(uid, [])
+        owned = [int(ug.game_rawg_id) for ug in ugs]
+        g_aff: Dict[str, float] = {}
+        if ugs:
+            p = profiles.get(uid)
+            if profile_covers(p, ugs):
+                g_aff = normalized(p.genre_aff or {}, p.genre_norm, genre_names)
+            else:
+                g_aff = await catalog_genre_profile(db, uid, ugs, K_REPRESENTATIVE_DEFAULT, genre_names)
+        if not g_aff:
+            tasks.append((uid, {}, owned, popular_key))
+            continue
+        top = [k for k, _ in sorted(g_aff.items(), key=lambda x: x[1], reverse=True)[:G_TOP_GENRES_DEFAULT]]
+        key = tuple(sorted(genre_ids_by_name[g] for g in top if g in genre_ids_by_name))
+        tasks.append((uid, dict(g_aff), owned, key))
+    return tasks
+
+
+async def _load_pools(
+    db, keys: List[Tuple[Any, ...]], cache: Dict[Tuple[Any, ...], List[Dict[str, Any]]],
+    genre_names: Dict[int, str],
+) -> None:
+    """Pools de candidatos por combinación de géneros, compartidos entre bloques."""
+    for key in keys:
+        if key in cache:
+            continue
+        ids = [k for k in key if isinstance(k, int)]
+        pool = await list_catalog_candidates(db, ids, limit=settings.RECS_CATALOG_CANDIDATES)
+        for c in pool:
+            c["genres"] = [genre_names[g] for g in c.pop("genre_ids") if g in genre_names]
+        cache[key] = pool
+
+
+async def run(
+    workers: int = settings.RECS_PRECOMPUTE_WORKERS,
+    chunk_size: int = settings.RECS_PRECOMPUTE_CHUNK,
+    top_k: int = settings.RECS_PRECOMPUTE_TOP_K,
+) -> Dict[str, Any]:
+    workers = workers or os.cpu_count() or 1
+    loop = asyncio.get_running_loop()
+    pools: Dict[Tuple[Any, ...], List[Dict[str, Any]]] = {}
+    stats: Dict[str, Any] = {"users": 0, "chunks": 0, "pools": 0}
+    start = time.perf_counter()
+
+    async with SessionLocal() as db:
+        genre_names = await get_term_names(db, CatalogGenre)
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        last_id = 0
+        while True:
+            async with SessionLocal() as db:
+                res = await db.execute(
+                    select(User.id).where(User.id > last_id).order_by(User.id).limit(chunk_size)
+                )
+                user_ids = list(res.scalars().all())
+                if not user_ids:
+                    break
+                last_id = user_ids[-1]
+                tasks = await _prepare_chunk(db, user_ids, genre_names)
+                await _load_pools(db, list({t[3] for t in tasks}), pools, genre_names)
+
+            # Un trozo por worker; cada uno recibe solo los pools que necesita
+            step = max(1, -(-len(tasks) // workers))
+            futures = []
+            for i in range(0, len(tasks), step):
+                part = tasks[i:i + step]
+                part_pools = {t[3]: pools[t[3]] for t in part}
+                futures.append(loop.run_in_executor(executor, rank_users, part, part_pools, top_k))
+            results = [r for chunk in await asyncio.gather(*futures) for r in chunk]
+
+            async with SessionLocal() as db:
+                await upsert_user_recommendations(db, [
+                    {"user_id": uid, "items": items, "top_k": top_k, "source": SOURCE}
+                    for uid, items in results
+                ])
+
+            stats["users"] += len(results)
+            stats["chunks"] += 1
+            elapsed = time.perf_counter() - start
+            logger.info("Precálculo: %d usuarios, %.1f usuarios/s", stats["users"], stats["users"] / elapsed)
+
+    elapsed = time.perf_counter() - start
+    stats["pools"] = len(pools)
+    stats["workers"] = workers
+    stats["elapsed_s"] = round(elapsed, 2)
+    stats["users_per_sec"] = round(stats["users"] / elapsed, 1) if elapsed > 0 else 0.0
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        print(await run(args.workers, args.chunk_size, args.top_k))
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Precalcula las recomendaciones de todos los usuarios")
+    parser.add_argument("--workers", type=int, default=settings.RECS_PRECOMPUTE_WORKERS, help="0 = todos los núcleos")
+    parser.add_argument("--chunk-size", type=int, default=settings.RECS_PRECOMPUTE_CHUNK)
+    parser.add_argument("--top-k", type=int, default=settings.RECS_PRECOMPUTE_TOP_K)
+    asyncio.run(_main(parser.parse_args()))
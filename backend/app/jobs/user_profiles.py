@@ -0,0 +1,62 @@
+"""
+Reconstrucción completa de los perfiles de gustos (user_profiles).
+
+En funcionamiento normal los perfiles se actualizan de forma incremental desde
+crud/user_game.py y crud/review.py; este comando los recalcula desde cero para
+hacer backfill (usuarios anteriores a la tabla) o corregir derivas.
+
+Uso:
+    python -m app.jobs.user_profiles                 # todos los usuarios
+    python -m app.jobs.user_profiles --user-id 42
+    python -m app.jobs.user_profiles --fetch-missing # pide a RAWG los juegos que no están en el catálogo
+"""
+import argparse
+import asyncio
+import logging
+import time
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal, engine
+from app.core.rawg import close_rawg_client
+from app.crud.user_profile import rebuild_user_profile
+from app.models.user import User
+
+logger = logging.getLogger(__name__)
+
+
+async def rebuild_all(user_ids: Optional[List[int]] = None, fetch_missing: bool = False) -> Dict[str, int]:
+    async with SessionLocal() as db:
+        if user_ids is None:
+            user_ids = list((await db.execute(select(User.id).order_by(User.id))).scalars().all())
+
+    stats = {"users": 0, "games": 0, "included": 0}
+    start = time.perf_counter()
+    for uid in user_ids:
+        # Una sesión por usuario: cada perfil se confirma por separado
+        async with SessionLocal() as db:
+            counts = await rebuild_user_profile(db, uid, fetch_missing=fetch_missing)
+        stats["users"] += 1
+        stats["games"] += counts["games"]
+        stats["included"] += counts["included"]
+        if stats["users"] % 100 == 0:
+            logger.info("Perfiles: %d/%d (%.1fs)", stats["users"], len(user_ids), time.perf_counter() - start)
+    return stats
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        stats = await rebuild_all(args.user_id or None, fetch_missing=args.fetch_missing)
+        print(stats)
+    finally:
+        await close_rawg_client()
+        await engine.dispose()
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    parser = argparse.ArgumentParser(description="Reconstruye los perfiles de gustos de los usuarios")
+    parser.add_argument("--user-id", type=int, action="append", help="solo estos usuarios (repetible)")
+    parser.add_argument("--fetch-missing", action="store_true",
+                        help="pide a RAWG (y guarda en el catálogo) los juegos que no están en game_catalog")
+    asyncio.run(_main(parser.parse_args()))
@@ -0,0 +1,32 @@
+from sqlalchemy import Column, Integer, String
+from app.core.database import Base
+
+# Diccionarios internados de nombres de RAWG -> id entero pequeño.
+# game_catalog guarda arrays de estos ids (genre_ids, tag_ids, platform_ids, developer_ids).
+
+class CatalogGenre(Base):
+    __tablename__ = "catalog_genres"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class CatalogTag(Base):
+    __tablename__ = "catalog_tags"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class CatalogPlatform(Base):
+    __tablename__ = "catalog_platforms"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
+
+
+class CatalogDeveloper(Base):
+    __tablename__ = "catalog_developers"
+
+    id = Column(Integer, primary_key=True)
+    name = Column(String, unique=True, nullable=False)
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class CrawlerCheckpoint(Base):
+    __tablename__ = "crawler_checkpoints"
+
+    # Nombre del proceso, p.ej. "catalog:full" o "catalog:incremental"
+    name = Column(String, primary_key=True)
+
+    # Estado libre del proceso (cursor de ventana, última fecha de actualización...)
+    state = Column(JSONB, nullable=False, default=dict)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
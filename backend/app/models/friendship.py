@@ -7,7 +7,7 @@ from typing import Optional
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy import (
     Integer, ForeignKey, DateTime, func,
-    CheckConstraint, UniqueConstraint, Enum as SAEnum
+    CheckConstraint, UniqueConstraint, Index, text, Enum as SAEnum
 )
 
 from app.core.database import Base
@@ -62,4 +62,15 @@ class Friendship(Base):
         # Par siempre ordenado y único
         CheckConstraint("user_id_a < user_id_b", name="chk_pair_sorted"),
         UniqueConstraint("user_id_a", "user_id_b", name="uq_friendships_pair_sorted"),
+        # Amigos aceptados de un usuario desde cada lado del par (index-only scan)
+        Index(
+            "ix_friendships_a_accepted", "user_id_a",
+            postgresql_include=["user_id_b"],
+            postgresql_where=text("status = 'accepted'"),
+        ),
+        Index(
+            "ix_friendships_b_accepted", "user_id_b",
+            postgresql_include=["user_id_a"],
+            postgresql_where=text("status = 'accepted'"),
+        ),
     )
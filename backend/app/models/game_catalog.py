@@ -1,7 +1,14 @@
-from sqlalchemy import Column, BigInteger, Integer, String, Float
+from sqlalchemy import Column, BigInteger, Integer, String, Float, Index, DateTime, func, text
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import relationship
 from ..core.database import Base
 
+# Texto de búsqueda: nombre, géneros, tags y plataformas. Debe coincidir exactamente con la
+# expresión del índice ix_game_catalog_search_trgm para que las consultas lo usen.
+SEARCH_DOCUMENT = (
+    "(name || ' ' || coalesce(genres, '') || ' ' || coalesce(tags, '') || ' ' || coalesce(platforms, ''))"
+)
+
 class GameCatalog(Base):
     __tablename__ = "game_catalog"
 
@@ -13,6 +20,42 @@ class GameCatalog(Base):
     tags = Column(String, nullable=True)        # "Pixel Graphics;Souls-like"
     platforms = Column(String, nullable=True)   # "PC;PlayStation 5"
 
+    # mismas listas como arrays de ids internados (catalog_genres/tags/platforms),
+    # indexadas con GIN para filtrar con && / @> sin partir cadenas
+    genre_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
+    tag_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
+    platform_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
+    # los desarrolladores solo vienen en el detalle de RAWG, no en los listados
+    developer_ids = Column(ARRAY(Integer), nullable=False, server_default="{}")
+
     # opcional, para popularidad / cold-start
     metacritic = Column(Integer, nullable=True)
     rating = Column(Float, nullable=True)       # rating global RAWG si lo usas
+
+    # datos de preview para servir búsquedas sin llamar a RAWG
+    release_year = Column(Integer, nullable=True)
+    background_image = Column(String, nullable=True)
+
+    # control de cambios para los upserts masivos
+    content_hash = Column(String(32), nullable=True)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        # Índice trigram (pg_trgm) para búsqueda por similitud y prefijo sobre el nombre
+        Index(
+            "ix_game_catalog_name_trgm", "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        # Trigram sobre nombre + géneros + tags + plataformas (búsqueda por cualquiera de ellos)
+        Index("ix_game_catalog_search_trgm", text(f"{SEARCH_DOCUMENT} gin_trgm_ops"), postgresql_using="gin"),
+        Index("ix_game_catalog_genre_ids", "genre_ids", postgresql_using="gin"),
+        Index("ix_game_catalog_tag_ids", "tag_ids", postgresql_using="gin"),
+        Index("ix_game_catalog_platform_ids", "platform_ids", postgresql_using="gin"),
+        # Índice cubriente para el ranking de populares (index-only scan)
+        Index(
+            "ix_game_catalog_popularity",
+            metacritic.desc().nullslast(), rating.desc().nullslast(),
+            postgresql_include=["game_rawg_id"],
+        ),
+    )
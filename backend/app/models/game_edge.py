@@ -0,0 +1,18 @@
+from sqlalchemy import Column, BigInteger, SmallInteger, DateTime, Index, func
+from app.core.database import Base
+
+class GameEdge(Base):
+    """Arista del grafo de juegos: `dst` aparece en /games/{src}/suggested de RAWG."""
+    __tablename__ = "game_edges"
+
+    src_rawg_id = Column(BigInteger, primary_key=True)
+    dst_rawg_id = Column(BigInteger, primary_key=True)
+
+    # Posición en la lista de sugeridos (0 = primero)
+    rank = Column(SmallInteger, nullable=False)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_game_edges_dst", "dst_rawg_id"),
+    )
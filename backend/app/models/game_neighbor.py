@@ -0,0 +1,17 @@
+from sqlalchemy import Column, BigInteger, Integer, Float, Index
+from app.core.database import Base
+
+class GameNeighbor(Base):
+    """Vecinos item-item de filtrado colaborativo (los genera app.jobs.item_cf)."""
+    __tablename__ = "game_neighbors"
+
+    game_rawg_id = Column(BigInteger, primary_key=True)
+    neighbor_rawg_id = Column(BigInteger, primary_key=True)
+
+    # Similitud coseno con shrinkage y nº de usuarios que tienen ambos juegos
+    similarity = Column(Float, nullable=False)
+    support = Column(Integer, nullable=False)
+
+    __table_args__ = (
+        Index("ix_game_neighbors_game_sim", "game_rawg_id", similarity.desc()),
+    )
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, String, LargeBinary, DateTime, func
+from app.core.database import Base
+
+class RawgResponse(Base):
+    __tablename__ = "rawg_responses"
+
+    # Clave lógica del recurso, p.ej. "detail:3498", "genres", "popular:1:10"
+    key = Column(String, primary_key=True)
+
+    # Payload JSON ya formateado; comprimido con zlib si es grande
+    payload = Column(LargeBinary, nullable=False)
+    encoding = Column(String(8), nullable=False, default="json")  # "json" | "zlib"
+
+    fetched_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, UniqueConstraint
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, Boolean, UniqueConstraint, Index
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from app.core.database import Base
@@ -23,6 +23,13 @@ class UserGame(Base):
 
     __table_args__ = (
         UniqueConstraint("user_id", "game_rawg_id", name="uq_user_games_user_game"),
+        # Bibliotecas de los amigos para la puntuación social sin tocar la tabla
+        Index(
+            "ix_user_games_user_social", "user_id",
+            postgresql_include=["game_rawg_id", "status", "score", "added_at"],
+        ),
+        # Copias de un juego concreto (título e imagen de la página social)
+        Index("ix_user_games_game", "game_rawg_id"),
     )
 
     user = relationship("User", back_populates="games")
\ No newline at end of file
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class UserProfile(Base):
+    __tablename__ = "user_profiles"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # Afinidad firmada sin normalizar: {"<id de catalog_genres/tags>": suma}
+    genre_aff = Column(JSONB, nullable=False, default=dict)
+    tag_aff = Column(JSONB, nullable=False, default=dict)
+
+    # Normas L2 de cada vector (para normalizar al leer sin recalcular)
+    genre_norm = Column(Float, nullable=False, default=0.0)
+    tag_norm = Column(Float, nullable=False, default=0.0)
+
+    # Aportación actual de cada juego: {"<game_rawg_id>": {"w": afinidad firmada,
+    # "g": [ids de géneros], "t": [ids de tags]}}, con los términos usados al sumarla.
+    # Permite restar exactamente lo que se sumó aunque el catálogo cambie después, y
+    # saber qué juegos están incluidos (los que no tenían términos quedan fuera).
+    games = Column(JSONB, nullable=False, default=dict)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now(), nullable=False)
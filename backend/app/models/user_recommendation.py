@@ -0,0 +1,16 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, func
+from sqlalchemy.dialects.postgresql import JSONB
+from app.core.database import Base
+
+class UserRecommendation(Base):
+    """Recomendaciones precalculadas por app.jobs.recs_precompute (o recalculadas bajo demanda)."""
+    __tablename__ = "user_recommendations"
+
+    user_id = Column(Integer, ForeignKey("users.id", ondelete="CASCADE"), primary_key=True)
+
+    # Lista de GamePreview serializados, ya ordenada ({id, title, imageUrl, year})
+    items = Column(JSONB, nullable=False, default=list)
+    top_k = Column(Integer, nullable=False)
+    source = Column(String, nullable=False)   # modo con el que se calcularon, p.ej. "catalog"
+
+    generated_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
@@ -0,0 +1,40 @@
+"""
+Parte de CPU del precálculo de recomendaciones, pensada para ejecutarse en un
+ProcessPoolExecutor: solo recibe y devuelve estructuras simples (picklables) y
+no toca la base de datos ni el event loop.
+"""
+from typing import Any, Dict, List, Tuple
+
+from app.recommender.scoring import rank_candidates
+
+# (user_id, g_aff, juegos del usuario, clave del pool de candidatos)
+UserTask = Tuple[int, Dict[str, float], List[int], Tuple[Any, ...]]
+
+
+def _preview(c: Dict[str, Any]) -> Dict[str, Any]:
+    """Mismo contenido que GamePreview (ver app.api.recommendations._preview_from_candidate)."""
+    gid = int(c["id"])
+    return {
+        "id": gid,
+        "title": str(c.get("name") or f"RAWG-{gid}"),
+        "imageUrl": str(c.get("background_image") or ""),
+        "year": int(c.get("released") or 0),
+    }
+
+
+def rank_users(
+    tasks: List[UserTask],
+    pools: Dict[Tuple[Any, ...], List[Dict[str, Any]]],
+    top_k: int,
+) -> List[Tuple[int, List[Dict[str, Any]]]]:
+    """
+    Top-k de cada usuario sobre su pool compartido (usuarios con los mismos géneros
+    dominantes comparten pool), excluyendo sus juegos. Sin perfil -> orden del pool.
+    """
+    out = []
+    for user_id, g_aff, owned_ids, pool_key in tasks:
+        owned = set(owned_ids)
+        candidates = [c for c in pools.get(pool_key, []) if int(c["id"]) not in owned]
+        ranked = rank_candidates(candidates, g_aff, top_k) if g_aff else candidates[:top_k]
+        out.append((user_id, [_preview(c) for c in ranked]))
+    return out
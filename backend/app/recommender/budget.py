@@ -0,0 +1,73 @@
+"""
+Presupuesto de latencia de una petición de recomendaciones.
+
+  - `deadline`: plazo total desde que entra la petición (None = sin plazo).
+  - `stage(nombre)`: mide una etapa; las duraciones salen en la cabecera Server-Timing.
+  - `degrade(motivo)`: el resultado se calculó con datos parciales (p.ej. detalles de
+    RAWG que no llegaron a tiempo); se avisa con la cabecera X-Recs-Degraded.
+
+El presupuesto de la petición en curso vive en una ContextVar para que los modos del
+recomendador lo lean sin cambiar su firma; fuera de una petición hay uno sin plazo.
+"""
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, Iterator, List, Optional
+
+
+class Budget:
+    def __init__(self, deadline: Optional[float]):
+        self.started = time.perf_counter()
+        self.deadline = deadline
+        self.timings: Dict[str, float] = {}
+        self.degraded_reasons: List[str] = []
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def remaining(self, reserve: float = 0.0) -> Optional[float]:
+        """Segundos que quedan descontando `reserve` (no negativo); None si no hay plazo."""
+        if self.deadline is None:
+            return None
+        return max(0.0, self.deadline - self.elapsed() - reserve)
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            # Una etapa repetida (p.ej. un modo que cae a otro) acumula
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - start
+
+    def degrade(self, reason: str) -> None:
+        if reason not in self.degraded_reasons:
+            self.degraded_reasons.append(reason)
+
+    @property
+    def degraded(self) -> bool:
+        return bool(self.degraded_reasons)
+
+    def server_timing(self) -> str:
+        """Valor de Server-Timing: una métrica por etapa y el total, en milisegundos."""
+        parts = [f"{name};dur={secs * 1000:.1f}" for name, secs in self.timings.items()]
+        parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current: ContextVar[Optional[Budget]] = ContextVar("recs_budget", default=None)
+
+
+def start_budget(deadline: Optional[float]) -> Budget:
+    """Crea el presupuesto de la petición en curso."""
+    budget = Budget(deadline)
+    _current.set(budget)
+    return budget
+
+
+def current_budget() -> Budget:
+    budget = _current.get()
+    if budget is None:
+        # Fuera de una petición (jobs, scripts): sin plazo
+        budget = start_budget(None)
+    return budget
@@ -0,0 +1,93 @@
+"""
+Caché de listas finales de recomendaciones.
+
+Clave = (usuario, generación del usuario, parámetros de la consulta). Cada cambio
+en los juegos del usuario (hooks en crud/user_game.py y crud/review.py) sube su
+generación, así que las entradas anteriores dejan de ser alcanzables de inmediato
+(y el LRU las expulsa); un cálculo que empezó antes del cambio guarda su resultado
+con la generación vieja y nunca llega a servirse. Además cada entrada tiene TTL.
+
+Las generaciones salen de un reloj global creciente y se guardan en un LRU acotado
+(tantos usuarios como entradas tiene la caché). Un usuario sin generación guardada
+usa el suelo: el valor del reloj cuando se expulsó la última, que es mayor o igual
+que cualquier generación expulsada, así que nunca se vuelve a una anterior a una
+invalidación (como mucho se pierden entradas aún válidas).
+
+Los resultados de cold-start (usuarios sin juegos) se guardan una sola vez para
+todos, salvo en los modos que dependen del usuario aunque no tenga juegos (amigos,
+fila precalculada, pipelines con recuperadores personales): esos van por usuario.
+
+La caché es por proceso: con varios workers, la invalidación solo llega al que
+atendió la escritura y en los demás la entrada dura como mucho RECS_CACHE_TTL.
+"""
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+
+
+class RecommendationCache:
+    def __init__(self, max_entries: int, ttl: float, cold_start_ttl: float):
+        self.ttl = ttl
+        self.cold_start_ttl = cold_start_ttl
+        # Se cuenta por entradas (size=1), no por bytes
+        self._cache = TTLCache(max_entries=max_entries, max_bytes=max_entries)
+        self._max_generations = max_entries
+        self._generation: "OrderedDict[int, int]" = OrderedDict()
+        self._clock = 0
+        self._floor = 0
+        self.invalidations = 0
+
+    def _current_generation(self, user_id: int) -> int:
+        gen = self._generation.get(user_id)
+        if gen is None:
+            return self._floor
+        self._generation.move_to_end(user_id)
+        return gen
+
+    def _user_key(self, user_id: int, params: Tuple[Any, ...]) -> Hashable:
+        return ("user", user_id, self._current_generation(user_id)) + params
+
+    def get(self, user_id: int, params: Tuple[Any, ...]) -> Optional[List[Any]]:
+        return self._cache.get(self._user_key(user_id, params))
+
+    def key_for(self, user_id: int, params: Tuple[Any, ...]) -> Hashable:
+        """Clave a usar al guardar: se toma antes de calcular para no guardar con una generación nueva."""
+        return self._user_key(user_id, params)
+
+    def set(self, key: Hashable, items: List[Any]) -> None:
+        self._cache.set(key, items, ttl=self.ttl)
+
+    def get_cold_start(self, params: Tuple[Any, ...]) -> Optional[List[Any]]:
+        return self._cache.get(("cold",) + params)
+
+    def set_cold_start(self, params: Tuple[Any, ...], items: List[Any]) -> None:
+        self._cache.set(("cold",) + params, items, ttl=self.cold_start_ttl)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._clock += 1
+        self._generation[user_id] = self._clock
+        self._generation.move_to_end(user_id)
+        while len(self._generation) > self._max_generations:
+            self._generation.popitem(last=False)
+            self._floor = self._clock
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            **self._cache.stats(), "invalidations": self.invalidations, "ttl": self.ttl,
+            "generations": len(self._generation),
+        }
+
+
+recommendation_cache = RecommendationCache(
+    max_entries=settings.RECS_CACHE_MAX_ENTRIES,
+    ttl=settings.RECS_CACHE_TTL,
+    cold_start_ttl=settings.RECS_COLD_START_TTL,
+)
+
+
+def invalidate_user_recommendations(user_id: int) -> None:
+    """Hook de escritura: llamar tras confirmar cualquier cambio en los user_games del usuario."""
+    recommendation_cache.invalidate_user(user_id)
@@ -0,0 +1,499 @@
+"""
+Copia compacta en memoria de game_catalog para el recomendador.
+
+En vez de dicts de RAWG por candidato, el catálogo se guarda por columnas:
+  - game_ids (ordenado), year, rating, metacritic: un array NumPy por columna.
+  - géneros y tags de cada juego en CSR (indptr + índices) sobre los ids internados
+    de catalog_genres / catalog_tags, con el entero más pequeño que quepa.
+  - listas invertidas género -> filas, ordenadas por rating, para sacar candidatos
+    sin recorrer el catálogo.
+  - nombres e imágenes como un único bloque de bytes UTF-8 más offsets (las imágenes
+    sin el prefijo común de RAWG).
+Con 500k juegos ocupa unas decenas de MB. `GameRow` (con __slots__) es la vista de
+una fila para las consultas puntuales.
+
+El job app.jobs.catalog_store publica cada instantánea (.npy) como versión nueva del
+enlace CATALOG_STORE_PATH (app.recommender.snapshot); los workers la abren
+con mmap, así que comparten sus páginas. Cada worker la completa con un segmento
+delta pequeño en memoria con las filas cuyo updated_at es posterior a la instantánea
+(`CatalogStore.refresh`); las filas del delta tapan a las de la base.
+"""
+import asyncio
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, vstack
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.models.game_catalog import GameCatalog
+from app.recommender.scoring import CandidateMatrix
+from app.recommender.snapshot import publish_snapshot, resolve_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Segundos que se releen por detrás de la marca de updated_at en cada refresco
+REFRESH_OVERLAP = 60
+
+# Casi todas las imágenes de RAWG empiezan así; se guarda solo el resto
+IMAGE_PREFIX = "https://media.rawg.io/media/"
+
+_ARRAYS = (
+    "game_ids", "year", "rating", "metacritic",
+    "genre_indptr", "genre_indices", "tag_indptr", "tag_indices",
+    "genre_post_indptr", "genre_post_rows",
+    "name_offsets", "name_bytes", "image_offsets", "image_bytes",
+)
+
+# (game_rawg_id, name, background_image, release_year, rating, metacritic, genre_ids, tag_ids)
+CatalogRow = Tuple[int, str, Optional[str], Optional[int], Optional[float], Optional[int], Sequence[int], Sequence[int]]
+
+
+class GameRow:
+    """Vista de una fila del catálogo compacto."""
+    __slots__ = ("game_id", "name", "image", "year", "rating", "metacritic", "genre_ids", "tag_ids")
+
+    def __init__(self, game_id, name, image, year, rating, metacritic, genre_ids, tag_ids):
+        self.game_id = game_id
+        self.name = name
+        self.image = image
+        self.year = year
+        self.rating = rating
+        self.metacritic = metacritic
+        self.genre_ids = genre_ids
+        self.tag_ids = tag_ids
+
+    def __repr__(self) -> str:
+        return f"GameRow({self.game_id}, {self.name!r})"
+
+
+def _small_int_dtype(max_value: int) -> np.dtype:
+    return np.dtype(np.uint16) if max_value < 2**16 else np.dtype(np.int32)
+
+
+def _pack_strings(values: Sequence[str]) -> Tuple[np.ndarray, np.ndarray]:
+    encoded = [v.encode("utf-8") for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8).copy()
+
+
+def _csr(lists: Sequence[Sequence[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    indptr = np.zeros(len(lists) + 1, dtype=np.int32)
+    np.cumsum([len(x) for x in lists], out=indptr[1:])
+    flat = [int(t) for x in lists for t in x]
+    return indptr, np.asarray(flat, dtype=_small_int_dtype(max(flat, default=0)))
+
+
+@dataclass
+class CatalogSegment:
+    game_ids: np.ndarray          # fila -> game_rawg_id (ordenado)
+    year: np.ndarray              # int16, 0 si falta
+    rating: np.ndarray            # float32, NaN si falta
+    metacritic: np.ndarray        # int16, 0 si falta
+    genre_indptr: np.ndarray
+    genre_indices: np.ndarray
+    tag_indptr: np.ndarray
+    tag_indices: np.ndarray
+    genre_post_indptr: np.ndarray  # género -> tramo de genre_post_rows
+    genre_post_rows: np.ndarray    # filas de cada género, de mayor a menor rating
+    name_offsets: np.ndarray
+    name_bytes: np.ndarray
+    image_offsets: np.ndarray
+    image_bytes: np.ndarray
+    watermark: Optional[str]       # updated_at máximo (ISO) de las filas incluidas
+    built_at: float
+    _genre_matrix: Optional[csr_matrix] = field(default=None, repr=False)
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def rows_of(self, game_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(filas, posiciones en `game_ids`) de los juegos presentes en el segmento."""
+        ids = np.asarray(game_ids, dtype=np.int64)
+        if len(self) == 0 or ids.size == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.game_ids, ids), len(self) - 1)
+        found = np.flatnonzero(self.game_ids[pos] == ids)
+        return pos[found], found
+
+    def genres_of(self, row: int) -> np.ndarray:
+        return self.genre_indices[self.genre_indptr[row]:self.genre_indptr[row + 1]]
+
+    def tags_of(self, row: int) -> np.ndarray:
+        return self.tag_indices[self.tag_indptr[row]:self.tag_indptr[row + 1]]
+
+    def _string(self, offsets: np.ndarray, blob: np.ndarray, row: int) -> str:
+        return bytes(blob[offsets[row]:offsets[row + 1]]).decode("utf-8")
+
+    def row(self, i: int) -> GameRow:
+        image = self._string(self.image_offsets, self.image_bytes, i)
+        if image and "://" not in image:
+            image = IMAGE_PREFIX + image
+        rating = float(self.rating[i])
+        return GameRow(
+            game_id=int(self.game_ids[i]),
+            name=self._string(self.name_offsets, self.name_bytes, i),
+            image=image,
+            year=int(self.year[i]),
+            # float32 -> los dos decimales de RAWG
+            rating=None if np.isnan(rating) else round(rating, 2),
+            metacritic=int(self.metacritic[i]) or None,
+            genre_ids=self.genres_of(i).tolist(),
+            tag_ids=self.tags_of(i).tolist(),
+        )
+
+    def rows_with_genres(self, genre_ids: Sequence[int], limit: Optional[int] = None) -> np.ndarray:
+        """
+        Filas con alguno de los géneros (sin repetir), de mayor a menor rating como las
+        listas invertidas; con `limit`, solo las `limit` primeras. Con un género es un
+        tramo de su lista; con varios se unen las `limit` primeras de cada una.
+        """
+        n_genres = len(self.genre_post_indptr) - 1
+        parts = [
+            self.genre_post_rows[self.genre_post_indptr[g]:self.genre_post_indptr[g + 1]][:limit]
+            for g in dict.fromkeys(genre_ids) if 0 <= g < n_genres
+        ]
+        if not parts:
+            return np.zeros(0, dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        rows = np.unique(np.concatenate(parts))
+        # Mismo orden que las listas: rating descendente (NaN al final), empates por fila
+        rating = self.rating[rows].astype(np.float64)
+        rows = rows[np.lexsort((rows, np.where(np.isnan(rating), np.inf, -rating)))]
+        return rows[:limit]
+
+    def genre_matrix(self, width: int) -> csr_matrix:
+        """Matriz indicadora filas x géneros (columna = id de género), en el orden de cada fila."""
+        if self._genre_matrix is None or self._genre_matrix.shape[1] != width:
+            self._genre_matrix = csr_matrix(
+                (np.ones(len(self.genre_indices)), self.genre_indices.astype(np.int32), self.genre_indptr),
+                shape=(len(self), width),
+            )
+        return self._genre_matrix
+
+
+def build_catalog_segment(rows: Sequence[CatalogRow], watermark: Optional[str] = None) -> CatalogSegment:
+    rows = sorted(rows, key=lambda r: r[0])
+    n = len(rows)
+    rating = np.asarray([np.nan if r[4] is None else r[4] for r in rows], dtype=np.float32)
+    genre_indptr, genre_indices = _csr([r[6] or [] for r in rows])
+    tag_indptr, tag_indices = _csr([r[7] or [] for r in rows])
+
+    # Listas invertidas por género, cada una de mayor a menor rating (NaN al final)
+    by_rating = np.argsort(np.where(np.isnan(rating), np.inf, -rating.astype(np.float64)), kind="stable")
+    rank = np.empty(n, dtype=np.int64)
+    rank[by_rating] = np.arange(n)
+    entry_rows = np.repeat(np.arange(n, dtype=np.int64), np.diff(genre_indptr))
+    entry_genres = genre_indices.astype(np.int64)
+    order = np.lexsort((rank[entry_rows], entry_genres))
+    n_genres = int(entry_genres.max()) + 1 if entry_genres.size else 0
+    post_indptr = np.zeros(n_genres + 1, dtype=np.int32)
+    np.cumsum(np.bincount(entry_genres, minlength=n_genres), out=post_indptr[1:])
+
+    name_offsets, name_bytes = _pack_strings([r[1] or "" for r in rows])
+    images = [
+        (r[2] or "")[len(IMAGE_PREFIX):] if (r[2] or "").startswith(IMAGE_PREFIX) else (r[2] or "")
+        for r in rows
+    ]
+    image_offsets, image_bytes = _pack_strings(images)
+
+    return CatalogSegment(
+        game_ids=np.asarray([r[0] for r in rows], dtype=np.int64),
+        year=np.asarray([r[3] or 0 for r in rows], dtype=np.int16),
+        rating=rating,
+        metacritic=np.asarray([r[5] or 0 for r in rows], dtype=np.int16),
+        genre_indptr=genre_indptr,
+        genre_indices=genre_indices,
+        tag_indptr=tag_indptr,
+        tag_indices=tag_indices,
+        genre_post_indptr=post_indptr,
+        genre_post_rows=entry_rows[order].astype(np.int32),
+        name_offsets=name_offsets,
+        name_bytes=name_bytes,
+        image_offsets=image_offsets,
+        image_bytes=image_bytes,
+        watermark=watermark,
+        built_at=time.time(),
+    )
+
+
+def segment_nbytes(seg: CatalogSegment) -> int:
+    return sum(getattr(seg, name).nbytes for name in _ARRAYS)
+
+
+# =========================
+# Disco (mmap)
+# =========================
+
+def save_catalog_segment(seg: CatalogSegment, path: str) -> None:
+    """Publica la instantánea como nueva versión de `path` (app.recommender.snapshot)."""
+    def write(directory: str) -> None:
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), getattr(seg, name))
+        with open(os.path.join(directory, "meta.json"), "w") as fh:
+            json.dump({"watermark": seg.watermark, "built_at": seg.built_at, "games": len(seg)}, fh)
+
+    publish_snapshot(path, write)
+
+
+def load_catalog_segment(path: str) -> CatalogSegment:
+    with open(os.path.join(path, "meta.json")) as fh:
+        meta = json.load(fh)
+    arrays = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+    return CatalogSegment(**arrays, watermark=meta["watermark"], built_at=meta["built_at"])
+
+
+# =========================
+# Lectura de la BD
+# =========================
+
+_ROW_COLUMNS = (
+    GameCatalog.game_rawg_id, GameCatalog.name, GameCatalog.background_image,
+    GameCatalog.release_year, GameCatalog.rating, GameCatalog.metacritic,
+    GameCatalog.genre_ids, GameCatalog.tag_ids, GameCatalog.updated_at,
+)
+
+
+async def read_catalog_rows(
+    db: AsyncSession, since: Optional[str] = None, chunk_size: int = 20000,
+) -> Tuple[List[CatalogRow], Optional[str]]:
+    """Filas del catálogo (todas o las de updated_at > since) y el updated_at máximo visto."""
+    q = select(*_ROW_COLUMNS)
+    if since is not None:
+        q = q.where(GameCatalog.updated_at > datetime.fromisoformat(since))
+    rows: List[CatalogRow] = []
+    watermark = since
+    result = await db.stream(q.execution_options(yield_per=chunk_size))
+    async for part in result.partitions(chunk_size):
+        for r in part:
+            rows.append((
+                int(r.game_rawg_id), r.name, r.background_image, r.release_year,
+                r.rating, r.metacritic, r.genre_ids or [], r.tag_ids or [],
+            ))
+            stamp = r.updated_at.isoformat()
+            if watermark is None or stamp > watermark:
+                watermark = stamp
+    return rows, watermark
+
+
+# =========================
+# Almacén del proceso: base (mmap) + delta
+# =========================
+
+@dataclass
+class CandidatePool:
+    blocks: List[Tuple[CatalogSegment, np.ndarray]]   # filas elegidas de cada segmento
+    order: np.ndarray                                 # candidato i = elemento order[i] de la concatenación de blocks
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def rows(self) -> List[GameRow]:
+        flat = [(seg, int(r)) for seg, rows in self.blocks for r in rows]
+        return [flat[i][0].row(flat[i][1]) for i in self.order]
+
+    def row(self, i: int) -> GameRow:
+        """Vista del candidato i sin materializar el resto."""
+        j = int(self.order[i])
+        for seg, rows in self.blocks:
+            if j < len(rows):
+                return seg.row(int(rows[j]))
+            j -= len(rows)
+        raise IndexError(i)
+
+class CatalogStore:
+    def __init__(self, path: str, refresh_interval: float):
+        self.path = path
+        self.refresh_interval = refresh_interval
+        self.base: Optional[CatalogSegment] = None
+        self.delta: Optional[CatalogSegment] = None
+        self._base_version: Optional[Tuple[str, float]] = None   # (directorio resuelto, mtime)
+        self._shadowed_count = 0
+        self._delta_rows: Dict[int, CatalogRow] = {}
+        self._watermark: Optional[str] = None
+        self._shadowed: Optional[np.ndarray] = None   # filas de la base tapadas por el delta
+        self._checked_at = 0.0
+        self._lock = asyncio.Lock()
+
+        # Contadores
+        self.refreshes = 0
+        self.delta_rows_applied = 0
+
+    @property
+    def ready(self) -> bool:
+        return self.base is not None
+
+    def _segments(self) -> List[Tuple[CatalogSegment, Optional[np.ndarray]]]:
+        out: List[Tuple[CatalogSegment, Optional[np.ndarray]]] = []
+        if self.base is not None:
+            out.append((self.base, self._shadowed))
+        if self.delta is not None:
+            out.append((self.delta, None))
+        return out
+
+    # ---------- Refresco ----------
+
+    async def refresh(self, db: AsyncSession, force: bool = False) -> bool:
+        """
+        Reabre la instantánea si el job la ha regenerado y aplica las filas cambiadas
+        desde la última marca. Como mucho una vez cada `refresh_interval` segundos.
+        Devuelve si el almacén está disponible.
+        """
+        if not force and time.time() - self._checked_at < self.refresh_interval:
+            return self.ready
+        async with self._lock:
+            if not force and time.time() - self._checked_at < self.refresh_interval:
+                return self.ready
+            self._checked_at = time.time()
+            # El enlace se resuelve una sola vez: meta.json y los arrays salen del mismo
+            # directorio aunque el job lo cambie mientras tanto
+            version = resolve_snapshot(self.path)
+            if version is None:
+                return self.ready
+            if self.base is None or version != self._base_version:
+                try:
+                    base = load_catalog_segment(version[0])
+                except Exception:
+                    # Instantánea incompleta o corrupta: se sigue con la base actual
+                    logger.exception("No se pudo cargar la instantánea del catálogo %s", version[0])
+                    if self.base is None:
+                        return False
+                else:
+                    self.base = base
+                    self._base_version = version
+                    self._watermark = self.base.watermark
+                    self._delta_rows = {}
+                    self.delta = None
+
+            # Con solapamiento: una transacción lenta puede confirmar filas con un updated_at
+            # anterior a la marca; releerlas es idempotente (el delta va por game_rawg_id)
+            since = self._watermark
+            if since is not None:
+                since = (datetime.fromisoformat(since) - timedelta(seconds=REFRESH_OVERLAP)).isoformat()
+            rows, watermark = await read_catalog_rows(db, since=since)
+            if rows or self.delta is None:
+                for r in rows:
+                    self._delta_rows[r[0]] = r
+                self._watermark = max(filter(None, [self._watermark, watermark]), default=None)
+                self.delta = build_catalog_segment(list(self._delta_rows.values()), watermark) if self._delta_rows else None
+                shadow = np.zeros(len(self.base), dtype=bool)
+                if self.delta is not None:
+                    shadow[self.base.rows_of(self.delta.game_ids)[0]] = True
+                self._shadowed = shadow
+                self._shadowed_count = int(shadow.sum())
+                self.delta_rows_applied += len(rows)
+            self.refreshes += 1
+            return True
+
+    # ---------- Consultas ----------
+
+    def lookup(self, game_id: int) -> Optional[GameRow]:
+        for seg, shadowed in reversed(self._segments()):
+            rows, _ = seg.rows_of([game_id])
+            if rows.size and (shadowed is None or not shadowed[rows[0]]):
+                return seg.row(int(rows[0]))
+        return None
+
+    def lookup_many(self, game_ids: Sequence[int]) -> Dict[int, GameRow]:
+        out: Dict[int, GameRow] = {}
+        for seg, _ in reversed(self._segments()):
+            missing = [g for g in game_ids if g not in out]
+            rows, _ = seg.rows_of(missing)
+            for r in rows:
+                out[int(seg.game_ids[r])] = seg.row(int(r))
+        return out
+
+    def genres_by_game(self, game_ids: Sequence[int]) -> Dict[int, List[int]]:
+        """Como crud.game_catalog.get_catalog_genre_ids, sin consultar la BD."""
+        out: Dict[int, List[int]] = {}
+        for seg, _ in reversed(self._segments()):
+            rows, _ = seg.rows_of([g for g in game_ids if g not in out])
+            for r in rows:
+                out[int(seg.game_ids[r])] = seg.genres_of(int(r)).tolist()
+        return out
+
+    def candidates(
+        self, genre_ids: Sequence[int], exclude_ids: Sequence[int] = (), limit: int = 2000,
+    ) -> "CandidatePool":
+        """
+        Como crud.game_catalog.list_catalog_candidates: juegos con algún género de
+        `genre_ids`, los `limit` de mayor rating entre todos los segmentos.
+        """
+        exclude = np.asarray(list(exclude_ids), dtype=np.int64)
+        picked: List[Tuple[CatalogSegment, np.ndarray]] = []
+        for seg, shadowed in self._segments():
+            # Las listas ya van por rating: basta con las primeras, dejando margen para
+            # las filas que se van a quitar (tapadas por el delta o excluidas)
+            margin = exclude.size + (self._shadowed_count if shadowed is not None else 0)
+            rows = seg.rows_with_genres(genre_ids, limit + margin)
+            if shadowed is not None and rows.size:
+                rows = rows[~shadowed[rows]]
+            if exclude.size and rows.size:
+                rows = rows[~np.isin(seg.game_ids[rows], exclude)]
+            picked.append((seg, rows))
+        if not picked:
+            return CandidatePool(blocks=[], order=np.zeros(0, dtype=np.int64))
+
+        # Orden global entre segmentos (sobre como mucho `limit` filas de cada uno):
+        # rating descendente (sin rating al final); empates por segmento y fila
+        ratings = np.concatenate([seg.rating[rows].astype(np.float64) for seg, rows in picked])
+        ratings = np.where(np.isnan(ratings), -np.inf, ratings)
+        seg_of = np.concatenate([np.full(len(rows), i) for i, (_, rows) in enumerate(picked)])
+        pos = np.concatenate([np.arange(len(rows)) for _, rows in picked])
+        keep = np.lexsort((pos, seg_of, -ratings))[:limit]
+
+        # Bloques por segmento (en el orden de la concatenación) y permutación al orden global
+        kept = np.sort(keep)
+        blocks = [(seg, rows[pos[kept[seg_of[kept] == i]]]) for i, (seg, rows) in enumerate(picked)]
+        return CandidatePool(blocks=blocks, order=np.searchsorted(kept, keep))
+
+    def candidate_matrix(self, pool: "CandidatePool", genre_names: Dict[int, str]) -> CandidateMatrix:
+        """
+        Matriz de app.recommender.scoring para el pool (en el orden del pool), directamente
+        desde los CSR: columna = id de género, vocabulario = nombre de cada id.
+        """
+        width = max(
+            [max(genre_names) + 1 if genre_names else 1]
+            + [int(seg.genre_indices.max()) + 1 for seg, _ in pool.blocks if len(seg.genre_indices)]
+        )
+        vocab = {genre_names.get(g, f"#{g}"): g for g in range(width)}
+        blocks = [seg.genre_matrix(width)[rows] for seg, rows in pool.blocks if rows.size]
+        matrix = vstack(blocks, format="csr")[pool.order] if blocks else csr_matrix((0, width))
+        metacritic = np.concatenate(
+            [seg.metacritic[rows].astype(np.float64) for seg, rows in pool.blocks] or [np.zeros(0)]
+        )[pool.order]
+        shooter = [g for name, g in vocab.items() if name.lower() == "shooter"]
+        has_shooter = (
+            np.asarray(matrix[:, shooter].sum(axis=1)).ravel() > 0 if shooter
+            else np.zeros(matrix.shape[0], dtype=bool)
+        )
+        return CandidateMatrix(
+            vocab=vocab,
+            genres=matrix,
+            n_genres=np.diff(matrix.indptr),
+            metacritic=metacritic,
+            has_shooter=has_shooter,
+        )
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready,
+            "base_games": len(self.base) if self.base is not None else 0,
+            "base_bytes": segment_nbytes(self.base) if self.base is not None else 0,
+            "delta_games": len(self.delta) if self.delta is not None else 0,
+            "watermark": self._watermark,
+            "refreshes": self.refreshes,
+            "delta_rows_applied": self.delta_rows_applied,
+        }
+
+
+catalog_store = CatalogStore(settings.CATALOG_STORE_PATH, settings.CATALOG_STORE_REFRESH_INTERVAL)
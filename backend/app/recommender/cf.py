@@ -0,0 +1,131 @@
+"""
+Filtrado colaborativo item-item sobre la matriz usuario x juego de user_games.
+
+  - X (CSR, usuarios x juegos) con el peso de interacción de cada juego del usuario.
+  - Similitud coseno entre columnas (o coseno ajustado: cada fila centrada en su media).
+  - Shrinkage por soporte: sim * n / (n + λ), con n = usuarios que tienen ambos juegos,
+    para que pares vistos por dos usuarios no pesen como pares vistos por doscientos.
+  - Solo se guardan los N mejores vecinos de cada juego.
+
+La matriz item-item se calcula por bloques de columnas para acotar la memoria.
+"""
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Sequence
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+
+from app.recommender.scoring import build_candidate_matrix, score_candidates, top_k_indices
+
+
+@dataclass
+class InteractionMatrix:
+    matrix: csr_matrix       # (n_usuarios, n_juegos)
+    user_ids: np.ndarray     # fila -> user_id
+    game_ids: np.ndarray     # columna -> game_rawg_id
+
+
+def build_interaction_matrix(users: np.ndarray, games: np.ndarray, weights: np.ndarray) -> InteractionMatrix:
+    """Matriz dispersa a partir de tripletas (user_id, game_rawg_id, peso); los pares repetidos se suman."""
+    user_ids, rows = np.unique(users, return_inverse=True)
+    game_ids, cols = np.unique(games, return_inverse=True)
+    m = csr_matrix(
+        (weights.astype(np.float64), (rows, cols)),
+        shape=(len(user_ids), len(game_ids)),
+    )
+    m.sum_duplicates()
+    return InteractionMatrix(matrix=m, user_ids=user_ids, game_ids=game_ids)
+
+
+def _center_rows(x: csr_matrix) -> csr_matrix:
+    """Resta a cada fila la media de sus valores no nulos (coseno ajustado)."""
+    x = x.copy()
+    counts = np.diff(x.indptr)
+    sums = np.asarray(x.sum(axis=1)).ravel()
+    means = np.divide(sums, counts, out=np.zeros(x.shape[0]), where=counts > 0)
+    x.data -= np.repeat(means, counts)
+    return x
+
+
+def item_neighbors(
+    im: InteractionMatrix,
+    n_neighbors: int,
+    shrinkage: float,
+    min_support: int = 1,
+    adjusted: bool = False,
+    block_size: int = 2048,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Genera {"game_rawg_id", "neighbor_rawg_id", "similarity", "support"} con los
+    `n_neighbors` vecinos de similitud positiva de cada juego.
+    """
+    x = _center_rows(im.matrix) if adjusted else im.matrix
+    # Soporte: co-ocurrencias sobre el patrón de no nulos original
+    b = im.matrix.copy()
+    b.data = np.ones_like(b.data)
+
+    norms = np.sqrt(np.asarray(x.multiply(x).sum(axis=0)).ravel())
+    inv = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    xn = (x @ diags(inv)).tocsc()
+    xt = xn.T.tocsr()
+    bc = b.tocsc()
+    bt = bc.T.tocsr()
+
+    n_items = x.shape[1]
+    for start in range(0, n_items, block_size):
+        stop = min(n_items, start + block_size)
+        sim = (xt @ xn[:, start:stop]).tocsc()
+        sup = (bt @ bc[:, start:stop]).tocsc()
+        sim.sort_indices()
+        sup.sort_indices()
+
+        for local in range(stop - start):
+            j = start + local
+            s_rows = sim.indices[sim.indptr[local]:sim.indptr[local + 1]]
+            s_vals = sim.data[sim.indptr[local]:sim.indptr[local + 1]]
+            c_rows = sup.indices[sup.indptr[local]:sup.indptr[local + 1]]
+            c_vals = sup.data[sup.indptr[local]:sup.indptr[local + 1]]
+            if s_rows.size == 0:
+                continue
+
+            # Soporte de cada entrada de similitud (ambos vectores van ordenados por fila)
+            pos = np.searchsorted(c_rows, s_rows)
+            pos = np.minimum(pos, max(0, c_rows.size - 1))
+            support = np.where(c_rows[pos] == s_rows, c_vals[pos], 0.0) if c_rows.size else np.zeros_like(s_vals)
+
+            shrunk = s_vals * support / (support + shrinkage)
+            keep = (s_rows != j) & (support >= min_support) & (shrunk > 0)
+            if not keep.any():
+                continue
+            rows, vals, sups = s_rows[keep], shrunk[keep], support[keep]
+            top = top_k_indices(vals, n_neighbors)
+            gid = int(im.game_ids[j])
+            for t in top:
+                yield {
+                    "game_rawg_id": gid,
+                    "neighbor_rawg_id": int(im.game_ids[rows[t]]),
+                    "similarity": float(vals[t]),
+                    "support": int(sups[t]),
+                }
+
+
+def rank_blended(
+    candidates: Sequence[Dict[str, Any]],
+    g_aff: Dict[str, float],
+    cf_scores: Dict[int, float],
+    cf_weight: float,
+    k: int,
+) -> List[Dict[str, Any]]:
+    """
+    Mezcla la puntuación CF (normalizada por su máximo absoluto) con la afinidad
+    por géneros de app.recommender.scoring y devuelve los k mejores candidatos.
+    """
+    if not candidates:
+        return []
+    cf = np.array([cf_scores.get(int(c["id"]), 0.0) for c in candidates], dtype=np.float64)
+    peak = np.abs(cf).max()
+    if peak > 0:
+        cf = cf / peak
+    genre = score_candidates(build_candidate_matrix(candidates), g_aff)
+    blended = cf_weight * cf + (1.0 - cf_weight) * genre
+    return [candidates[i] for i in top_k_indices(blended, k)]
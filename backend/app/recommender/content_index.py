@@ -0,0 +1,283 @@
+"""
+Índice de similitud de contenido sobre el catálogo.
+
+  - Cada juego es un vector TF-IDF disperso sobre géneros, tags y desarrolladores
+    (ids internados del catálogo, cada campo en su tramo de columnas), normalizado L2.
+  - Vecinos aproximados con LSH de proyecciones aleatorias (SimHash): `tables`
+    tablas de `bits` bits; la consulta mira su cubo y los que difieren en un bit
+    (multi-probe) y reordena los candidatos con el coseno exacto.
+  - Hasta `exact_max_items` juegos se hace fuerza bruta: un producto disperso de la
+    matriz entera (sin copiar filas del mmap) y los excluidos se anulan en las
+    puntuaciones. Es exacta pero más lenta que el LSH (del orden de 10 ms frente a
+    6 ms con 200k juegos); el umbral decide cuánta latencia se cambia por exactitud.
+
+Se publica como instantánea versionada de ficheros .npy (app.recommender.snapshot) que
+se abren con mmap, así que los workers comparten las páginas del índice sin
+reconstruirlo ni copiarlo.
+"""
+import json
+import logging
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from app.recommender.scoring import top_k_indices
+from app.recommender.snapshot import publish_snapshot, resolve_snapshot
+
+logger = logging.getLogger(__name__)
+
+# Campos del vector, en el orden de sus tramos de columnas
+FIELDS = ("genres", "tags", "developers")
+
+_ARRAYS = ("game_ids", "data", "indices", "indptr", "idf", "planes", "codes", "order")
+
+
+@dataclass
+class ContentIndex:
+    game_ids: np.ndarray        # fila -> game_rawg_id (ordenado, para buscar con searchsorted)
+    matrix: csr_matrix          # (n_juegos, n_términos) TF-IDF normalizado L2
+    idf: np.ndarray             # idf de cada columna
+    offsets: Dict[str, int]     # primera columna de cada campo
+    planes: np.ndarray          # (n_términos, tables * bits) hiperplanos aleatorios
+    codes: np.ndarray           # (tables, n_juegos) códigos ordenados de cada tabla
+    order: np.ndarray           # (tables, n_juegos) fila de cada código ordenado
+    tables: int
+    bits: int
+    built_at: float
+    exact_max_items: int = 250_000
+
+    def __len__(self) -> int:
+        return self.matrix.shape[0]
+
+    # ---------- Vectores de consulta ----------
+
+    def row_of(self, game_id: int) -> Optional[int]:
+        i = int(np.searchsorted(self.game_ids, game_id))
+        return i if i < len(self.game_ids) and self.game_ids[i] == game_id else None
+
+    def profile_vector(self, weights: Dict[str, Dict[Any, float]]) -> np.ndarray:
+        """
+        Vector denso a partir de afinidades por campo ({"genres": {id: peso}, ...},
+        p.ej. las de user_profiles), ponderado por idf y normalizado L2.
+        """
+        q = np.zeros(self.matrix.shape[1], dtype=np.float64)
+        for field, aff in weights.items():
+            start, stop = self._span(field)
+            for term_id, w in aff.items():
+                col = start + int(term_id)
+                if start <= col < stop:
+                    q[col] += w * self.idf[col]
+        norm = np.linalg.norm(q)
+        return q / norm if norm > 0 else q
+
+    def _span(self, field: str) -> Tuple[int, int]:
+        i = FIELDS.index(field)
+        stop = self.offsets[FIELDS[i + 1]] if i + 1 < len(FIELDS) else self.matrix.shape[1]
+        return self.offsets[field], stop
+
+    # ---------- Búsqueda ----------
+
+    def _codes_for(self, q: np.ndarray) -> np.ndarray:
+        # Solo las filas de los términos presentes: q tiene decenas de no nulos, planes miles de filas
+        nz = np.flatnonzero(q)
+        bits = (q[nz] @ self.planes[nz]) > 0
+        weights = np.left_shift(np.uint64(1), np.arange(self.bits, dtype=np.uint64))
+        return bits.reshape(self.tables, self.bits).astype(np.uint64) @ weights
+
+    def _candidates(self, q: np.ndarray, multiprobe: bool) -> np.ndarray:
+        found = []
+        flips = np.left_shift(np.uint64(1), np.arange(self.bits, dtype=np.uint64))
+        for t, code in enumerate(self._codes_for(q)):
+            probes = np.concatenate([[code], code ^ flips]) if multiprobe else np.array([code])
+            lo = np.searchsorted(self.codes[t], probes, side="left")
+            hi = np.searchsorted(self.codes[t], probes, side="right")
+            for a, b in zip(lo, hi):
+                if b > a:
+                    found.append(self.order[t][a:b])
+        return np.unique(np.concatenate(found)) if found else np.zeros(0, dtype=np.int64)
+
+    def query(
+        self,
+        q: np.ndarray,
+        k: int,
+        exclude_ids: Sequence[int] = (),
+        multiprobe: bool = True,
+    ) -> List[Tuple[int, float]]:
+        """Los k juegos más parecidos a `q` (vector denso normalizado): [(game_rawg_id, coseno)]."""
+        if len(self) == 0 or not np.any(q):
+            return []
+        exclude = np.asarray(list(exclude_ids), dtype=np.int64)
+        if len(self) <= self.exact_max_items:
+            # Toda la matriz de una vez: indexar filas copiaría el CSR entero fuera del mmap
+            scores = np.asarray(self.matrix @ q).ravel()
+            if exclude.size:
+                pos = np.minimum(np.searchsorted(self.game_ids, exclude), len(self) - 1)
+                scores[pos[self.game_ids[pos] == exclude]] = 0.0
+            best = top_k_indices(scores, k)
+            return [(int(self.game_ids[i]), float(scores[i])) for i in best if scores[i] > 0]
+
+        rows = self._candidates(q, multiprobe)
+        if exclude.size:
+            rows = rows[~np.isin(self.game_ids[rows], exclude)]
+        if rows.size == 0:
+            return []
+        scores = self.matrix[rows] @ q
+        best = top_k_indices(scores, k)
+        return [(int(self.game_ids[rows[i]]), float(scores[i])) for i in best if scores[i] > 0]
+
+    def similar_to(self, game_id: int, k: int, exclude_ids: Sequence[int] = ()) -> List[Tuple[int, float]]:
+        row = self.row_of(game_id)
+        if row is None:
+            return []
+        q = self.matrix[row].toarray().ravel()
+        return self.query(q, k, exclude_ids=[game_id, *exclude_ids])
+
+    def near_profile(
+        self, weights: Dict[str, Dict[Any, float]], k: int, exclude_ids: Sequence[int] = (),
+    ) -> List[Tuple[int, float]]:
+        return self.query(self.profile_vector(weights), k, exclude_ids=exclude_ids)
+
+
+# =========================
+# Construcción
+# =========================
+
+def build_content_index(
+    rows: Sequence[Tuple[int, Sequence[int], Sequence[int], Sequence[int]]],
+    field_weights: Dict[str, float] | None = None,
+    tables: int = 16,
+    bits: int = 12,
+    seed: int = 0,
+) -> ContentIndex:
+    """
+    `rows` = (game_rawg_id, genre_ids, tag_ids, developer_ids). TF binario por término,
+    idf suavizado log((1+N)/(1+df)) + 1 y peso opcional por campo.
+    """
+    field_weights = field_weights or {}
+    rows = sorted(rows, key=lambda r: r[0])
+    n = len(rows)
+
+    # Tramo de columnas de cada campo: de 0 al id máximo visto
+    offsets: Dict[str, int] = {}
+    width = 0
+    for f, field in enumerate(FIELDS):
+        offsets[field] = width
+        width += max((max(r[f + 1]) for r in rows if r[f + 1]), default=-1) + 1
+    width = max(width, 1)
+
+    indptr = [0]
+    indices: List[int] = []
+    data: List[float] = []
+    for r in rows:
+        cols = {}
+        for f, field in enumerate(FIELDS):
+            for term_id in r[f + 1]:
+                cols[offsets[field] + int(term_id)] = field_weights.get(field, 1.0)
+        indices.extend(cols.keys())
+        data.extend(cols.values())
+        indptr.append(len(indices))
+
+    m = csr_matrix(
+        (np.asarray(data, dtype=np.float64), np.asarray(indices, dtype=np.int64), np.asarray(indptr, dtype=np.int64)),
+        shape=(n, width),
+    )
+    # índices int32 (como los deja scipy): así al cargar con mmap no hay conversión ni copia
+    m.indices = m.indices.astype(np.int32)
+    m.indptr = m.indptr.astype(np.int32 if m.nnz < 2**31 else np.int64)
+    m.sort_indices()
+    df = np.bincount(m.indices, minlength=width)
+    idf = np.log((1.0 + n) / (1.0 + df)) + 1.0
+    m.data *= idf[m.indices]
+    norms = np.sqrt(np.asarray(m.multiply(m).sum(axis=1)).ravel())
+    m.data /= np.repeat(np.where(norms > 0, norms, 1.0), np.diff(m.indptr))
+
+    rng = np.random.default_rng(seed)
+    planes = rng.standard_normal((width, tables * bits)).astype(np.float32)
+    weights = np.left_shift(np.uint64(1), np.arange(bits, dtype=np.uint64))
+    codes = np.zeros((tables, n), dtype=np.uint64)
+    for start in range(0, n, 50_000):
+        proj = np.asarray(m[start:start + 50_000] @ planes) > 0
+        codes[:, start:start + 50_000] = (
+            proj.reshape(-1, tables, bits).astype(np.uint64) @ weights
+        ).T
+    order = np.argsort(codes, axis=1, kind="stable").astype(np.int64)
+    codes = np.take_along_axis(codes, order, axis=1)
+
+    return ContentIndex(
+        game_ids=np.asarray([r[0] for r in rows], dtype=np.int64),
+        matrix=m, idf=idf, offsets=offsets, planes=planes,
+        codes=codes, order=order, tables=tables, bits=bits, built_at=time.time(),
+    )
+
+
+# =========================
+# Disco (mmap)
+# =========================
+
+def save_content_index(index: ContentIndex, path: str) -> None:
+    """Publica el índice como nueva versión de `path` (app.recommender.snapshot)."""
+    arrays = {
+        "game_ids": index.game_ids,
+        "data": index.matrix.data,
+        "indices": index.matrix.indices,
+        "indptr": index.matrix.indptr,
+        "idf": index.idf,
+        "planes": index.planes,
+        "codes": index.codes,
+        "order": index.order,
+    }
+    meta = {
+        "shape": list(index.matrix.shape),
+        "offsets": index.offsets,
+        "tables": index.tables,
+        "bits": index.bits,
+        "built_at": index.built_at,
+    }
+
+    def write(directory: str) -> None:
+        for name in _ARRAYS:
+            np.save(os.path.join(directory, f"{name}.npy"), arrays[name])
+        with open(os.path.join(directory, "meta.json"), "w") as fh:
+            json.dump(meta, fh)
+
+    publish_snapshot(path, write)
+
+
+def load_content_index(path: str, exact_max_items: int = 250_000) -> ContentIndex:
+    with open(os.path.join(path, "meta.json")) as fh:
+        meta = json.load(fh)
+    a = {name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r") for name in _ARRAYS}
+    matrix = csr_matrix((a["data"], a["indices"], a["indptr"]), shape=tuple(meta["shape"]), copy=False)
+    return ContentIndex(
+        game_ids=a["game_ids"], matrix=matrix, idf=a["idf"], offsets=meta["offsets"],
+        planes=a["planes"], codes=a["codes"], order=a["order"],
+        tables=meta["tables"], bits=meta["bits"], built_at=meta["built_at"],
+        exact_max_items=exact_max_items,
+    )
+
+
+# Índice cargado en este proceso y la versión (directorio, mtime de meta.json) de la que sale
+_loaded: Optional[ContentIndex] = None
+_loaded_version: Optional[Tuple[str, float]] = None
+
+
+def get_content_index(path: str, exact_max_items: int = 250_000) -> Optional[ContentIndex]:
+    """Índice del proceso; se vuelve a abrir si el job ha publicado otro. None si no existe."""
+    global _loaded, _loaded_version
+    # El enlace se resuelve una sola vez: meta.json y los arrays salen del mismo directorio
+    version = resolve_snapshot(path)
+    if version is None:
+        return _loaded
+    if _loaded is None or version != _loaded_version:
+        try:
+            index = load_content_index(version[0], exact_max_items)
+        except Exception:
+            # Versión incompleta o corrupta: se sigue con el índice actual
+            logger.exception("No se pudo cargar el índice de contenido %s", version[0])
+            return _loaded
+        _loaded, _loaded_version = index, version
+    return _loaded
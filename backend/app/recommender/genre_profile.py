@@ -0,0 +1,131 @@
+"""
+Perfil de géneros con el que se recomienda: {nombre de género: afinidad normalizada L2}.
+
+  - Persistido: el de user_profiles, si sigue valiendo para la biblioteca actual (`profile_covers`).
+  - En vivo: los K juegos más representativos del usuario con sus géneros del catálogo
+    (compacto si está cargado, si no game_catalog).
+
+Lo comparten el endpoint (app.api.recommendations), el precálculo en lote
+(app.jobs.recs_precompute) y la evaluación offline (benchmarks.eval_recs).
+"""
+from collections import defaultdict
+from math import sqrt
+from typing import Any, Dict, List
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.crud.catalog_term import get_term_names
+from app.crud.game_catalog import get_catalog_genre_ids
+from app.crud.user_profile import get_user_profile
+from app.models.catalog_term import CatalogGenre
+from app.models.user_game import UserGame
+from app.models.user_profile import UserProfile
+from app.recommender.catalog_store import catalog_store
+from app.recommender.profile import STATUS_WEIGHT, DEFAULT_STATUS_WEIGHT, norm_score, normalized, interaction_weight
+
+# Parámetros por defecto
+K_REPRESENTATIVE_DEFAULT = 6
+G_TOP_GENRES_DEFAULT = 2
+PAGE_SIZE = 20
+
+# Géneros usados en cold-start (cuando el usuario no tiene juegos)
+POPULAR_GENRES = ["Action", "Adventure", "Shooter", "RPG"]
+
+
+def representative_weight(ug: UserGame) -> float:
+    """Calcula el peso de un juego del usuario para decidir representatividad."""
+    return interaction_weight(ug.status, ug.score)
+
+
+def build_genre_profile(owned_details: List[Dict[str, Any]], reps: List[UserGame]) -> Dict[str, float]:
+    """
+    Construye el perfil del usuario en base a géneros.
+    Cada género recibe peso positivo si los juegos fueron bien puntuados y negativo si fueron mal puntuados.
+    """
+    status = {ug.game_rawg_id: (ug.status or "").strip().lower() for ug in reps}
+    score  = {ug.game_rawg_id: ug.score for ug in reps}
+
+    g_aff: Dict[str, float] = defaultdict(float)
+    for g in owned_details:
+        gid = g.get("id")
+        if not gid:
+            continue
+        base = STATUS_WEIGHT.get(status.get(gid, ""), DEFAULT_STATUS_WEIGHT)
+        signed = base * (norm_score(score.get(gid)) - 0.5)  # afinidad firmada [-0.5, +0.5]
+        if signed == 0:
+            continue
+        for x in g.get("genres") or []:
+            name = x["name"] if isinstance(x, dict) and "name" in x else str(x)
+            g_aff[name] += signed
+
+    # Normalización L2 sobre valores absolutos para conservar señal negativa/positiva
+    denom = sqrt(sum((abs(v) ** 2) for v in g_aff.values())) or 1.0
+    for k in list(g_aff.keys()):
+        g_aff[k] = g_aff[k] / denom
+    return g_aff
+
+
+def profile_covers(profile: UserProfile | None, ugs: List[UserGame]) -> bool:
+    """
+    Si el perfil persistido sirve para la biblioteca actual: todos sus juegos siguen en
+    ella y tiene al menos uno. Los juegos de la biblioteca que faltan son los que no
+    estaban en game_catalog al añadirlos (sin géneros conocidos, no aportarían nada);
+    app.core.catalog_writer los suma cuando llega su fila al catálogo.
+    """
+    if profile is None:
+        return False
+    games = set(profile.games or {})
+    return games <= {str(ug.game_rawg_id) for ug in ugs} and (bool(games) or not ugs)
+
+
+async def stored_genre_profile(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    genre_names: Dict[int, str] | None = None,
+) -> Dict[str, float] | None:
+    """
+    Perfil de géneros persistido en user_profiles (una fila, sin llamadas a RAWG),
+    normalizado L2 como `build_genre_profile`. Cubre todos los juegos del usuario,
+    no solo los K representativos. Devuelve None si no existe o está desfasado
+    (`profile_covers`): entonces se calcula en vivo.
+    """
+    profile = await get_user_profile(db, user_id)
+    if not profile_covers(profile, ugs):
+        return None
+    if genre_names is None:
+        genre_names = await get_term_names(db, CatalogGenre)
+    return normalized(profile.genre_aff or {}, profile.genre_norm, genre_names)
+
+
+async def catalog_genre_profile(
+    db: AsyncSession,
+    user_id: int,
+    ugs: List[UserGame],
+    k_representative: int,
+    genre_names: Dict[int, str],
+) -> Dict[str, float]:
+    """Perfil persistido o, si no está al día, representativos y sus géneros desde el catálogo."""
+    g_aff = await stored_genre_profile(db, user_id, ugs, genre_names)
+    if g_aff is not None:
+        return g_aff
+    return await live_catalog_genre_profile(db, ugs, k_representative, genre_names)
+
+
+async def live_catalog_genre_profile(
+    db: AsyncSession,
+    ugs: List[UserGame],
+    k_representative: int,
+    genre_names: Dict[int, str],
+) -> Dict[str, float]:
+    """Perfil de los K representativos con sus géneros del catálogo (compacto si está cargado)."""
+    reps = sorted(ugs, key=representative_weight, reverse=True)[:k_representative]
+    rep_ids = [int(ug.game_rawg_id) for ug in reps]
+    rep_genres = catalog_store.genres_by_game(rep_ids) if catalog_store.ready else {}
+    if len(rep_genres) < len(rep_ids):
+        rep_genres.update(await get_catalog_genre_ids(db, [g for g in rep_ids if g not in rep_genres]))
+    owned_details = [
+        {"id": int(ug.game_rawg_id), "genres": [genre_names[g] for g in rep_genres.get(int(ug.game_rawg_id), []) if g in genre_names]}
+        for ug in reps
+    ]
+    return build_genre_profile(owned_details, reps)
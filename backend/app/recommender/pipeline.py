@@ -0,0 +1,386 @@
+"""
+Pipeline de recomendación componible:
+
+  perfil -> recuperadores (concurrentes) -> fusión y deduplicado -> [enriquecido] -> ranking
+
+  - Recuperadores (`Retriever`): cada uno propone candidatos con su propia puntuación y
+    posición (página de RAWG por géneros, pool del catálogo, vecinos CF, juegos de amigos).
+    Corren a la vez, cada uno con su sesión (una AsyncSession no admite consultas
+    concurrentes; la conexión solo se toma si el recuperador consulta la BD, así que una
+    petición ocupa hasta 1 + nº de recuperadores conexiones: ver DB_POOL_SIZE), y dentro
+    del plazo de la petición: los que no llegan se descartan y la respuesta se marca
+    como degradada.
+  - Fusión: un candidato por juego, con las puntuaciones de todos los que lo propusieron;
+    se quitan los juegos del usuario.
+  - Enriquecido: géneros, metacritic y datos de la preview desde el catálogo (compacto si
+    está cargado) para los candidatos que no los traen. Los rankers que no los necesitan
+    (rrf) solo enriquecen los k elegidos.
+  - Rankers (`RANKERS`), seleccionables por petición:
+      genre: afinidad por géneros + metacritic (app.recommender.scoring), como los modos clásicos.
+      blend: mezcla de la anterior con las puntuaciones normalizadas de cada recuperador.
+      rrf:   reciprocal rank fusion de las posiciones de cada recuperador (sin géneros).
+
+`PipelineTrace` registra por etapa la duración, el nº de candidatos, errores y aciertos
+de caché; se vuelca al log y, si se pide, en la cabecera X-Recs-Debug. Las duraciones
+también van a Server-Timing a través del presupuesto de la petición.
+"""
+import asyncio
+import logging
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, Iterator, List, Sequence, Set
+
+import numpy as np
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.core.rawg import list_games_by_genres
+from app.crud.game_catalog import get_catalog_candidates_by_ids, list_catalog_candidates
+from app.crud.game_neighbor import get_cf_scores
+from app.crud.user import list_friend_recommendations
+from app.models.user_game import UserGame
+from app.recommender.budget import Budget
+from app.recommender.catalog_store import catalog_store, GameRow
+from app.recommender.profile import interaction_weight
+from app.recommender.scoring import build_candidate_matrix, score_candidates, top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Candidate:
+    game_id: int
+    # Campos en formato de candidato RAWG/catálogo: name, background_image, released,
+    # metacritic y genres (nombres), según los conozca quien lo propuso
+    info: Dict[str, Any] = field(default_factory=dict)
+    scores: Dict[str, float] = field(default_factory=dict)   # recuperador -> puntuación propia
+    ranks: Dict[str, int] = field(default_factory=dict)      # recuperador -> posición (0 = primero)
+
+
+@dataclass
+class RecsRequest:
+    user_id: int
+    ugs: List[UserGame]
+    top_k: int
+    k_representative: int
+    g_top_genres: int
+    genre_names: Dict[int, str]
+    g_aff: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def owned(self) -> Set[int]:
+        return {int(ug.game_rawg_id) for ug in self.ugs}
+
+    def top_genres(self, fallback: Sequence[str]) -> List[str]:
+        """Géneros dominantes del perfil; sin perfil, los de `fallback` (cold-start)."""
+        if not self.g_aff:
+            return list(fallback)
+        return [g for g, _ in sorted(self.g_aff.items(), key=lambda x: x[1], reverse=True)[:self.g_top_genres]]
+
+
+class PipelineTrace:
+    def __init__(self, budget: Budget):
+        self.budget = budget
+        self.stages: List[Dict[str, Any]] = []
+        self.cache: Dict[str, str] = {}
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[Dict[str, Any]]:
+        """Mide una etapa; el llamador anota en el dict devuelto (`n`, `error`...)."""
+        rec: Dict[str, Any] = {"stage": name}
+        start = time.perf_counter()
+        with self.budget.stage(name):
+            try:
+                yield rec
+            finally:
+                rec["ms"] = round((time.perf_counter() - start) * 1000, 1)
+                self.stages.append(rec)
+
+    def cache_result(self, name: str, result: str) -> None:
+        self.cache[name] = result
+
+    def summary(self) -> Dict[str, Any]:
+        return {"stages": self.stages, "cache": self.cache, "degraded": self.budget.degraded_reasons}
+
+    def header(self) -> str:
+        """Valor de X-Recs-Debug: `etapa;ms=..;n=..` por etapa y los aciertos de caché."""
+        parts = []
+        for rec in self.stages:
+            fields = [rec["stage"]] + [f"{k}={v}" for k, v in rec.items() if k != "stage"]
+            parts.append(";".join(fields))
+        if self.cache:
+            parts.append("cache;" + ";".join(f"{k}={v}" for k, v in self.cache.items()))
+        return ", ".join(parts)
+
+
+# =========================
+# Recuperadores
+# =========================
+
+class Retriever(ABC):
+    name = ""
+    # Si sus candidatos dependen del usuario (y no solo de sus juegos y perfil): entonces el
+    # resultado de cold-start no se comparte entre usuarios
+    personal = False
+
+    @abstractmethod
+    async def retrieve(self, db: AsyncSession, req: RecsRequest, limit: int, rec: Dict[str, Any]) -> List[Candidate]:
+        """Hasta `limit` candidatos en orden; `rec` es el registro de la etapa en la traza."""
+
+
+def _ranked(name: str, items: Sequence[tuple]) -> List[Candidate]:
+    """Candidatos en orden a partir de (game_id, info, puntuación)."""
+    return [
+        Candidate(game_id=int(gid), info=info, scores={name: float(score)}, ranks={name: i})
+        for i, (gid, info, score) in enumerate(items)
+    ]
+
+
+def _info_from_row(r: GameRow, genre_names: Dict[int, str]) -> Dict[str, Any]:
+    return {
+        "name": r.name, "background_image": r.image, "released": r.year, "metacritic": r.metacritic,
+        "genres": [genre_names[g] for g in r.genre_ids if g in genre_names],
+    }
+
+
+def _info_from_catalog(c: Dict[str, Any], genre_names: Dict[int, str]) -> Dict[str, Any]:
+    return {
+        "name": c["name"], "background_image": c["background_image"], "released": c["released"],
+        "metacritic": c["metacritic"], "genres": [genre_names[g] for g in c["genre_ids"] if g in genre_names],
+    }
+
+
+async def _store(db: AsyncSession):
+    if not settings.CATALOG_STORE_ENABLED:
+        return None
+    return catalog_store if await catalog_store.refresh(db) else None
+
+
+class GenrePageRetriever(Retriever):
+    """Una página de RAWG por los géneros dominantes, ordenada por rating (como el modo rawg)."""
+    name = "genre_page"
+
+    def __init__(self, page_size: int, fallback_genres: Sequence[str]):
+        self.page_size = page_size
+        self.fallback_genres = list(fallback_genres)
+
+    async def retrieve(self, db, req, limit, rec):
+        page = await list_games_by_genres(
+            req.top_genres(self.fallback_genres), page=1, page_size=min(limit, self.page_size),
+            ordering="-rating", hedge=True,
+        )
+        items = []
+        for c in page:
+            if not c.get("id"):
+                continue
+            info = {k: c.get(k) for k in ("name", "background_image", "released", "metacritic")}
+            info["genres"] = [x["name"] if isinstance(x, dict) else str(x) for x in c.get("genres") or []]
+            items.append((c["id"], info, 1.0 - len(items) / max(1, len(page))))
+        return _ranked(self.name, items)
+
+
+class CatalogRetriever(Retriever):
+    """Pool del catálogo por géneros dominantes, por rating (compacto en memoria si está cargado)."""
+    name = "catalog"
+
+    def __init__(self, fallback_genres: Sequence[str]):
+        self.fallback_genres = list(fallback_genres)
+
+    async def retrieve(self, db, req, limit, rec):
+        ids_by_name = {name: gid for gid, name in req.genre_names.items()}
+        genre_ids = [ids_by_name[g] for g in req.top_genres(self.fallback_genres) if g in ids_by_name]
+        owned = list(req.owned)
+        store = await _store(db)
+        rec["cache"] = "store" if store is not None else "db"
+        if store is not None:
+            rows = store.candidates(genre_ids, exclude_ids=owned, limit=limit).rows()
+            infos = [(r.game_id, _info_from_row(r, req.genre_names)) for r in rows]
+        else:
+            page = await list_catalog_candidates(db, genre_ids, exclude_ids=owned, limit=limit)
+            infos = [(c["id"], _info_from_catalog(c, req.genre_names)) for c in page]
+        n = max(1, len(infos))
+        return _ranked(self.name, [(gid, info, 1.0 - i / n) for i, (gid, info) in enumerate(infos)])
+
+
+class CFRetriever(Retriever):
+    """Vecinos item-item (game_neighbors) de los juegos del usuario, por suma de similitud * peso."""
+    name = "cf"
+    personal = True
+
+    async def retrieve(self, db, req, limit, rec):
+        seeds = {int(ug.game_rawg_id): interaction_weight(ug.status, ug.score) for ug in req.ugs}
+        if not seeds:
+            return []
+        scores = await get_cf_scores(db, seeds, exclude_ids=list(req.owned), limit=limit)
+        return _ranked(self.name, [(gid, {}, s) for gid, s in scores.items()])
+
+
+class FriendsRetriever(Retriever):
+    """Juegos de los amigos por puntuación social (app.crud.user.list_friend_recommendations)."""
+    name = "friends"
+    personal = True
+
+    async def retrieve(self, db, req, limit, rec):
+        rows = await list_friend_recommendations(db, req.user_id, limit=limit)
+        return _ranked(self.name, [
+            (r["id"], {"name": r["title"] or None, "background_image": r["imageUrl"], "released": r["year"] or None}, r["score"])
+            for r in rows
+        ])
+
+
+# =========================
+# Fusión, enriquecido y rankers
+# =========================
+
+def merge_candidates(groups: Sequence[List[Candidate]], owned: Set[int]) -> List[Candidate]:
+    """Un candidato por juego (orden de primera aparición) sin los del usuario."""
+    merged: Dict[int, Candidate] = {}
+    for group in groups:
+        for c in group:
+            if c.game_id in owned:
+                continue
+            seen = merged.get(c.game_id)
+            if seen is None:
+                merged[c.game_id] = c
+                continue
+            seen.scores.update(c.scores)
+            seen.ranks.update(c.ranks)
+            for k, v in c.info.items():
+                if seen.info.get(k) in (None, "", []):
+                    seen.info[k] = v
+    return list(merged.values())
+
+
+async def enrich(db: AsyncSession, cands: Sequence[Candidate], genre_names: Dict[int, str]) -> int:
+    """Completa géneros y datos de preview desde el catálogo; devuelve cuántos faltaban."""
+    missing = [c for c in cands if "genres" not in c.info]
+    if not missing:
+        return 0
+    found: Dict[int, Dict[str, Any]] = {}
+    store = await _store(db)
+    if store is not None:
+        found = {gid: _info_from_row(r, genre_names) for gid, r in store.lookup_many([c.game_id for c in missing]).items()}
+    rest = [c.game_id for c in missing if c.game_id not in found]
+    if rest:
+        for c in await get_catalog_candidates_by_ids(db, rest):
+            found[c["id"]] = _info_from_catalog(c, genre_names)
+    for c in missing:
+        info = found.get(c.game_id, {"genres": []})
+        for k, v in info.items():
+            if c.info.get(k) in (None, "", []):
+                c.info[k] = v
+    return len(missing)
+
+
+def _genre_scores(req: RecsRequest, cands: Sequence[Candidate]) -> np.ndarray:
+    return score_candidates(build_candidate_matrix([c.info for c in cands]), req.g_aff)
+
+
+def rank_genre(req: RecsRequest, cands: Sequence[Candidate], k: int) -> List[Candidate]:
+    return [cands[i] for i in top_k_indices(_genre_scores(req, cands), k)]
+
+
+def rank_blend(req: RecsRequest, cands: Sequence[Candidate], k: int) -> List[Candidate]:
+    """genre * w + (1 - w) * media de las puntuaciones de cada recuperador normalizadas por su máximo."""
+    sources = sorted({s for c in cands for s in c.scores})
+    source_score = np.zeros(len(cands), dtype=np.float64)
+    for s in sources:
+        col = np.array([c.scores.get(s, 0.0) for c in cands], dtype=np.float64)
+        peak = np.abs(col).max()
+        if peak > 0:
+            source_score += col / peak
+    if sources:
+        source_score /= len(sources)
+    w = settings.RECS_PIPELINE_BLEND_GENRE_WEIGHT
+    return [cands[i] for i in top_k_indices(w * _genre_scores(req, cands) + (1.0 - w) * source_score, k)]
+
+
+def rank_rrf(req: RecsRequest, cands: Sequence[Candidate], k: int) -> List[Candidate]:
+    """Reciprocal rank fusion: suma de 1 / (RRF_K + posición + 1) sobre los recuperadores."""
+    rrf_k = settings.RECS_PIPELINE_RRF_K
+    fused = np.array([sum(1.0 / (rrf_k + r + 1) for r in c.ranks.values()) for c in cands], dtype=np.float64)
+    return [cands[i] for i in top_k_indices(fused, k)]
+
+
+Ranker = Callable[[RecsRequest, Sequence[Candidate], int], List[Candidate]]
+
+RANKERS: Dict[str, Ranker] = {
+    "genre": rank_genre,
+    "blend": rank_blend,
+    "rrf": rank_rrf,
+}
+# Rankers que puntúan con géneros/metacritic: enriquecen todo el pool antes de ordenar
+FEATURE_RANKERS = {"genre", "blend"}
+
+
+# =========================
+# Ejecución
+# =========================
+
+ProfileFn = Callable[[AsyncSession, RecsRequest, PipelineTrace], Awaitable[Dict[str, float]]]
+
+
+async def _run_retriever(
+    retriever: Retriever,
+    req: RecsRequest,
+    trace: PipelineTrace,
+    session_factory: Callable[[], AsyncSession],
+) -> List[Candidate]:
+    reserve = settings.RECS_DEADLINE_RESERVE_MS / 1000.0
+    with trace.stage(f"retrieve_{retriever.name}") as rec:
+        try:
+            async with session_factory() as db:
+                out = await asyncio.wait_for(
+                    retriever.retrieve(db, req, settings.RECS_PIPELINE_RETRIEVER_LIMIT, rec),
+                    timeout=trace.budget.remaining(reserve),
+                )
+        except asyncio.TimeoutError:
+            trace.budget.degrade(retriever.name)
+            rec["error"] = "timeout"
+            return []
+        except Exception as e:
+            # Sin este recuperador la mezcla queda incompleta: degradada, para que no se cachee
+            logger.warning("Recuperador %s falló: %s", retriever.name, e)
+            trace.budget.degrade(retriever.name)
+            rec["error"] = type(e).__name__
+            return []
+        rec["n"] = len(out)
+        return out
+
+
+async def run_pipeline(
+    db: AsyncSession,
+    req: RecsRequest,
+    retrievers: Sequence[Retriever],
+    ranker: str,
+    profile: ProfileFn,
+    trace: PipelineTrace,
+    session_factory: Callable[[], AsyncSession] = SessionLocal,
+) -> List[Candidate]:
+    """Ejecuta perfil, recuperadores, fusión y ranking; devuelve los `req.top_k` elegidos."""
+    if req.ugs:
+        with trace.stage("profile"):
+            req.g_aff = await profile(db, req, trace)
+
+    groups = await asyncio.gather(*(_run_retriever(r, req, trace, session_factory) for r in retrievers))
+
+    with trace.stage("merge") as rec:
+        cands = merge_candidates(groups, req.owned)
+        rec["n"] = len(cands)
+        rec["dupes"] = sum(len(g) for g in groups) - len(cands)
+    if not cands:
+        return []
+
+    if ranker in FEATURE_RANKERS:
+        with trace.stage("enrich") as rec:
+            rec["n"] = await enrich(db, cands, req.genre_names)
+    with trace.stage(f"rank_{ranker}") as rec:
+        selected = RANKERS[ranker](req, cands, req.top_k)
+        rec["n"] = len(selected)
+    if ranker not in FEATURE_RANKERS:
+        with trace.stage("enrich") as rec:
+            rec["n"] = await enrich(db, selected, req.genre_names)
+    return selected
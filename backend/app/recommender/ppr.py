@@ -0,0 +1,224 @@
+"""
+PageRank personalizado (paseo aleatorio con reinicio) sobre el grafo de sugeridos.
+
+  - Nodos: juegos; aristas: game_edges (src -> dst si RAWG sugiere dst en la ficha de src),
+    con peso 1 / log2(rank + 2) para que los primeros sugeridos pesen más.
+  - El grafo se usa no dirigido por defecto: solo conocemos las aristas salientes de los
+    juegos cuya ficha se ha visitado, y sin la simetría los demás serían sumideros.
+  - P = matriz de transición (filas normalizadas). Iteración de potencia:
+        r <- α·s + (1 − α)·(Pᵀ r + masa_colgante · s)
+    con s = semillas del usuario normalizadas; la masa de los nodos sin salida vuelve a
+    las semillas. Se para cuando ‖Δr‖₁ < tol o tras max_iter iteraciones.
+
+El grafo se carga de la BD por proceso y, pasados PPR_GRAPH_TTL segundos, se recarga en
+segundo plano (con su propia sesión y la construcción en un hilo) mientras las peticiones
+siguen usando el anterior; los resultados (el top-k ya filtrado, no el vector entero) se cachean por versión del grafo,
+conjunto de semillas con sus pesos, excluidos y k.
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix, diags
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import TTLCache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.crud.game_edge import stream_game_edges
+from app.recommender.scoring import top_k_indices
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class GameGraph:
+    game_ids: np.ndarray        # nodo -> game_rawg_id (ordenado, para buscar con searchsorted)
+    transition_t: csr_matrix    # Pᵀ: columna i = distribución de salida del nodo i
+    dangling: np.ndarray        # nodos sin aristas salientes
+    built_at: float
+
+    def __len__(self) -> int:
+        return len(self.game_ids)
+
+    def nodes_of(self, game_ids: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """(nodos, posiciones en `game_ids`) de los juegos que están en el grafo."""
+        ids = np.asarray(game_ids, dtype=np.int64)
+        pos = np.searchsorted(self.game_ids, ids)
+        pos = np.minimum(pos, max(0, len(self.game_ids) - 1))
+        found = (self.game_ids[pos] == ids) if len(self.game_ids) else np.zeros(len(ids), dtype=bool)
+        return pos[found], np.flatnonzero(found)
+
+
+def build_game_graph(edges: Iterable[Tuple[int, int, int]], symmetric: bool = True) -> GameGraph:
+    """`edges` = (src, dst, rank). Las aristas repetidas (p.ej. a->b y b->a al simetrizar) se suman."""
+    edges = list(edges)
+    src, dst, rank = (np.asarray(a, dtype=np.int64) for a in zip(*edges)) if edges else (np.zeros(0, np.int64),) * 3
+    weights = 1.0 / np.log2(rank.astype(np.float64) + 2.0)
+    if symmetric:
+        src, dst = np.concatenate([src, dst]), np.concatenate([dst, src])
+        weights = np.concatenate([weights, weights])
+
+    game_ids, idx = np.unique(np.concatenate([src, dst]), return_inverse=True)
+    n = len(game_ids)
+    rows, cols = idx[:len(src)], idx[len(src):]
+    adj = csr_matrix((weights, (rows, cols)), shape=(n, n))
+    adj.sum_duplicates()
+
+    out = np.asarray(adj.sum(axis=1)).ravel()
+    inv = np.divide(1.0, out, out=np.zeros_like(out), where=out > 0)
+    transition = diags(inv) @ adj
+    return GameGraph(
+        game_ids=game_ids,
+        transition_t=transition.T.tocsr(),
+        dangling=out == 0,
+        built_at=time.time(),
+    )
+
+
+def personalized_pagerank(
+    graph: GameGraph,
+    seeds: Dict[int, float],
+    alpha: float = 0.15,
+    max_iter: int = 50,
+    tol: float = 1e-6,
+) -> Tuple[np.ndarray, int]:
+    """Vector de PageRank personalizado (suma 1) y las iteraciones hechas; ceros si ninguna semilla está en el grafo."""
+    n = len(graph)
+    r = np.zeros(n, dtype=np.float64)
+    ids = list(seeds)
+    nodes, pos = graph.nodes_of(ids)
+    if nodes.size == 0:
+        return r, 0
+
+    s = np.zeros(n, dtype=np.float64)
+    np.add.at(s, nodes, np.asarray([seeds[ids[p]] for p in pos], dtype=np.float64))
+    total = s.sum()
+    if total <= 0:
+        return r, 0
+    s /= total
+
+    r[:] = s
+    for it in range(1, max_iter + 1):
+        dangling_mass = r[graph.dangling].sum()
+        nxt = alpha * s + (1.0 - alpha) * (graph.transition_t @ r + dangling_mass * s)
+        delta = np.abs(nxt - r).sum()
+        r = nxt
+        if delta < tol:
+            return r, it
+    return r, max_iter
+
+
+def top_by_rank(
+    graph: GameGraph, r: np.ndarray, k: int, exclude_ids: Sequence[int] = (),
+) -> List[Tuple[int, float]]:
+    """Los k juegos con más masa, sin los excluidos (p.ej. los del usuario, semillas incluidas)."""
+    scores = r.copy()
+    if exclude_ids:
+        nodes, _ = graph.nodes_of(exclude_ids)
+        scores[nodes] = 0.0
+    return [(int(graph.game_ids[i]), float(scores[i])) for i in top_k_indices(scores, k) if scores[i] > 0]
+
+
+# =========================
+# Grafo y resultados del proceso
+# =========================
+
+class PersonalizedRanker:
+    def __init__(
+        self,
+        graph_ttl: float,
+        cache_ttl: float,
+        cache_max_entries: int,
+        session_factory: Callable[[], AsyncSession] = SessionLocal,
+    ):
+        self.graph_ttl = graph_ttl
+        self.cache_ttl = cache_ttl
+        self.session_factory = session_factory
+        self._graph: Optional[GameGraph] = None
+        # Hora de la última carga (también cuando no había aristas, para no consultar en cada petición)
+        self._loaded_at = 0.0
+        # Recarga en curso (como mucho una por proceso)
+        self._reloading: Optional["asyncio.Task[Any]"] = None
+        # Se cuenta por entradas (size=1), no por bytes
+        self._results = TTLCache(max_entries=cache_max_entries, max_bytes=cache_max_entries)
+        self.last_iterations = 0
+        self.reload_errors = 0
+
+    async def graph(self) -> Optional[GameGraph]:
+        """
+        Grafo del proceso. Si ha caducado se lanza la recarga en segundo plano y se devuelve
+        el actual; solo se espera a la primera carga del proceso. None si no hay aristas.
+        """
+        if time.time() - self._loaded_at >= self.graph_ttl and self._reloading is None:
+            self._reloading = asyncio.ensure_future(self._reload())
+        if self._loaded_at == 0.0 and self._reloading is not None:
+            # shield: si se cancela la petición, la carga sigue para las siguientes
+            await asyncio.shield(self._reloading)
+        return self._graph
+
+    async def _reload(self) -> None:
+        try:
+            edges: List[Tuple[int, int, int]] = []
+            async with self.session_factory() as db:
+                async for part in stream_game_edges(db):
+                    edges.extend(part)
+            # Construir el grafo es CPU pura (segundos con millones de aristas): fuera del bucle
+            graph = await asyncio.to_thread(build_game_graph, edges) if edges else None
+        except Exception:
+            # Se sigue con el grafo actual y se reintenta en la siguiente petición
+            self.reload_errors += 1
+            logger.exception("No se pudo recargar el grafo de PPR")
+        else:
+            self._graph = graph
+            self._loaded_at = time.time()
+            self._results.clear()
+        finally:
+            self._reloading = None
+
+    def _key(self, graph: GameGraph, seeds: Dict[int, float], k: int, exclude_ids: Sequence[int]) -> Hashable:
+        return (
+            graph.built_at,
+            frozenset((gid, round(w, 6)) for gid, w in seeds.items()),
+            frozenset(exclude_ids),
+            k,
+        )
+
+    async def rank(
+        self, seeds: Dict[int, float], k: int, exclude_ids: Sequence[int] = (),
+    ) -> List[Tuple[int, float]]:
+        graph = await self.graph()
+        if graph is None or not seeds:
+            return []
+        key = self._key(graph, seeds, k, exclude_ids)
+        cached = self._results.get(key)
+        if cached is not None:
+            return cached
+        r, self.last_iterations = personalized_pagerank(
+            graph, seeds, alpha=settings.PPR_ALPHA, max_iter=settings.PPR_MAX_ITER, tol=settings.PPR_TOL,
+        )
+        out = top_by_rank(graph, r, k, exclude_ids)
+        self._results.set(key, out, ttl=self.cache_ttl)
+        return out
+
+    def stats(self) -> Dict[str, object]:
+        g = self._graph
+        return {
+            **self._results.stats(),
+            "graph_nodes": len(g) if g is not None else 0,
+            "graph_edges": int(g.transition_t.nnz) if g is not None else 0,
+            "graph_built_at": g.built_at if g is not None else None,
+            "last_iterations": self.last_iterations,
+            "graph_reloading": self._reloading is not None,
+            "graph_reload_errors": self.reload_errors,
+        }
+
+
+personalized_ranker = PersonalizedRanker(
+    graph_ttl=settings.PPR_GRAPH_TTL,
+    cache_ttl=settings.PPR_CACHE_TTL,
+    cache_max_entries=settings.PPR_CACHE_MAX_ENTRIES,
+)
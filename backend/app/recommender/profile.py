@@ -0,0 +1,61 @@
+"""
+Perfil de gustos del usuario: afinidad firmada por término (género o tag).
+
+Cada juego aporta `signed_affinity(status, score)` a cada uno de sus géneros y
+tags. El perfil persistido (user_profiles) guarda las sumas sin normalizar y su
+norma L2, así que un cambio de estado o nota se aplica restando la aportación
+anterior y sumando la nueva, sin recorrer el resto de juegos.
+"""
+from math import sqrt
+from typing import Dict, Iterable, Optional
+
+# Pesos por estado de los juegos
+STATUS_WEIGHT: Dict[str, float] = {
+    "jugando": 1.0,
+    "completado": 1.0,
+    "por jugar": 0.3,
+}
+DEFAULT_STATUS_WEIGHT = 0.4
+
+# Por debajo de esto una afinidad acumulada se considera cero (ruido de sumas y restas)
+_EPSILON = 1e-9
+
+
+def norm_score(s: Optional[int]) -> float:
+    """Normaliza una puntuación [0,100] a [0,1]."""
+    return 0.0 if s is None else max(0, min(100, s)) / 100.0
+
+
+def interaction_weight(status: Optional[str], score: Optional[int]) -> float:
+    """Peso (positivo) de un juego del usuario: representatividad y valor de la matriz de CF."""
+    base = STATUS_WEIGHT.get((status or "").strip().lower(), DEFAULT_STATUS_WEIGHT)
+    return base * (0.5 + 0.5 * norm_score(score))
+
+
+def signed_affinity(status: Optional[str], score: Optional[int]) -> float:
+    """Aportación firmada de un juego, en [-0.5, +0.5] según su estado y nota."""
+    base = STATUS_WEIGHT.get((status or "").strip().lower(), DEFAULT_STATUS_WEIGHT)
+    return base * (norm_score(score) - 0.5)
+
+
+def add_terms(aff: Dict[str, float], term_ids: Iterable[int], delta: float) -> None:
+    """Suma `delta` a cada término (claves str, como en JSONB) y quita los que quedan a cero."""
+    if delta == 0:
+        return
+    for t in term_ids:
+        key = str(t)
+        v = aff.get(key, 0.0) + delta
+        if abs(v) < _EPSILON:
+            aff.pop(key, None)
+        else:
+            aff[key] = v
+
+
+def l2_norm(aff: Dict[str, float]) -> float:
+    return sqrt(sum(v * v for v in aff.values()))
+
+
+def normalized(aff: Dict[str, float], norm: float, names: Dict[int, str]) -> Dict[str, float]:
+    """Afinidades normalizadas (L2) con los ids traducidos a nombre; ids sin nombre se omiten."""
+    denom = norm or 1.0
+    return {names[int(k)]: v / denom for k, v in aff.items() if int(k) in names}
@@ -0,0 +1,58 @@
+"""
+Instantáneas en disco publicadas por un job y abiertas con mmap por los workers
+(catálogo compacto, índice de contenido).
+
+Cada versión se escribe en su propio directorio (`path`.v<ms>) y `path` es un enlace
+simbólico que se cambia a la nueva con os.replace, que es atómico: quien resuelve
+`path` siempre ve una instantánea completa, y quien la está leyendo sigue con la suya
+aunque se publique otra. Los lectores resuelven el enlace una vez (`resolve_snapshot`)
+y abren todos los ficheros desde ese directorio.
+"""
+import glob
+import os
+import shutil
+import time
+from typing import Callable, Optional, Tuple
+
+# Versiones que se conservan (la actual y la anterior, por si algún worker acaba de
+# resolver el enlace y aún no ha abierto los ficheros)
+KEEP_VERSIONS = 2
+
+
+def publish_snapshot(path: str, write: Callable[[str], None], keep: int = KEEP_VERSIONS) -> str:
+    """Llama a `write(directorio)` sobre una versión nueva y mueve el enlace `path` a ella."""
+    path = os.path.abspath(path)
+    version = f"{path}.v{int(time.time() * 1000)}"
+    os.makedirs(version)
+    write(version)
+
+    # Instantánea con el formato anterior (directorio real): se aparta como versión (solo
+    # la primera vez, y es el único momento en que `path` no existe)
+    if os.path.isdir(path) and not os.path.islink(path):
+        os.rename(path, f"{path}.v0")
+
+    link = f"{path}.link.tmp"
+    if os.path.lexists(link):
+        os.remove(link)
+    os.symlink(os.path.basename(version), link)
+    os.replace(link, path)
+
+    versions = sorted(
+        (v for v in glob.glob(f"{glob.escape(path)}.v*") if v.rsplit(".v", 1)[1].isdigit()),
+        key=lambda v: int(v.rsplit(".v", 1)[1]),
+    )
+    for old in versions[:-keep]:
+        shutil.rmtree(old, ignore_errors=True)
+    return version
+
+
+def resolve_snapshot(path: str, marker: str = "meta.json") -> Optional[Tuple[str, float]]:
+    """
+    (directorio resuelto, mtime de `marker`) de la versión publicada, o None si no hay.
+    El par identifica la versión: si cambia, hay que recargar desde ese directorio.
+    """
+    directory = os.path.realpath(path)
+    try:
+        return directory, os.stat(os.path.join(directory, marker)).st_mtime
+    except FileNotFoundError:
+        return None
@@ -0,0 +1,79 @@
+"""
+Benchmark del scoring de candidatos: bucle escalar (`_score_simple` + sort)
+frente a la versión vectorizada (app.recommender.scoring).
+
+Comprueba además que ambas devuelven exactamente el mismo top-k.
+
+Uso (desde backend/):
+    python -m benchmarks.bench_scoring
+    python -m benchmarks.bench_scoring --sizes 1000 10000 100000 --top-k 10
+"""
+import argparse
+import random
+import time
+from typing import Any, Dict, List
+
+from app.api.recommendations import _score_simple
+from app.recommender.scoring import build_candidate_matrix, score_candidates, top_k_indices
+
+GENRES = [
+    "Action", "Adventure", "RPG", "Shooter", "Strategy", "Puzzle", "Racing", "Sports",
+    "Simulation", "Platformer", "Fighting", "Indie", "Casual", "Arcade", "Family",
+    "Board Games", "Educational", "Card", "Massively Multiplayer",
+]
+
+
+def _candidates(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    out = []
+    for i in range(n):
+        genres = [{"id": 0, "name": g} for g in rng.sample(GENRES, rng.randint(0, 4))]
+        meta = rng.choice([None, rng.randint(40, 98)])
+        out.append({"id": i + 1, "name": f"Game {i}", "genres": genres, "metacritic": meta})
+    return out
+
+
+def _profile(rng: random.Random) -> Dict[str, float]:
+    g_aff = {g: rng.uniform(-0.5, 0.5) for g in rng.sample(GENRES, 6)}
+    g_aff["Shooter"] = 0.3
+    return g_aff
+
+
+def _best_of(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def run(sizes: List[int], top_k: int, repeat: int, seed: int) -> None:
+    rng = random.Random(seed)
+    print(f"{'n':>8} {'python ms':>10} {'numpy ms':>10} {'(build)':>9} {'speedup':>8}  top-k igual")
+    for n in sizes:
+        cands = _candidates(n, rng)
+        g_aff = _profile(rng)
+
+        def scalar():
+            return sorted(cands, key=lambda c: _score_simple(c, g_aff), reverse=True)[:top_k]
+
+        def vectorized():
+            cm = build_candidate_matrix(cands)
+            return [cands[i] for i in top_k_indices(score_candidates(cm, g_aff), top_k)]
+
+        same = [c["id"] for c in scalar()] == [c["id"] for c in vectorized()]
+        t_py = _best_of(scalar, repeat)
+        t_np = _best_of(vectorized, repeat)
+        t_build = _best_of(lambda: build_candidate_matrix(cands), repeat)
+        print(f"{n:>8} {t_py * 1000:>10.2f} {t_np * 1000:>10.2f} {t_build * 1000:>9.2f} "
+              f"{t_py / t_np:>7.1f}x  {'sí' if same else 'NO'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark del scoring de recomendaciones")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--top-k", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    run(args.sizes, args.top_k, args.repeat, args.seed)
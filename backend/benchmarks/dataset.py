@@ -0,0 +1,153 @@
+"""
+Datos para evaluar el recomendador sin BD ni RAWG: catálogo, usuarios y sus user_games.
+
+  - `generate`: dataset sintético con gustos latentes. Cada usuario tiene géneros
+    favoritos y uno que no le gusta; sus juegos se eligen por popularidad y afinidad,
+    y la nota depende de cuánto encaja el juego con sus gustos (más ruido), de modo
+    que haya señal que recuperar.
+  - `save` / `load`: JSON, el mismo formato que escribe benchmarks.snapshot con una
+    instantánea anonimizada de la BD.
+
+Uso (desde backend/):
+    python -m benchmarks.dataset --games 5000 --users 300 --out data/bench_dataset.json
+"""
+import argparse
+import json
+import math
+import random
+from dataclasses import asdict, dataclass, field
+from typing import Any, Dict, List, Optional
+
+GENRES = [
+    "Action", "Adventure", "RPG", "Shooter", "Strategy", "Puzzle", "Racing", "Sports",
+    "Simulation", "Platformer", "Fighting", "Indie", "Casual", "Arcade", "Family",
+    "Board Games", "Educational", "Card", "Massively Multiplayer",
+]
+
+STATUSES = ["completado", "jugando", "por jugar", "abandonado"]
+STATUS_PROBS = [0.45, 0.2, 0.25, 0.1]
+
+
+@dataclass
+class Dataset:
+    genres: Dict[int, str]
+    tags: Dict[int, str]
+    developers: Dict[int, str]
+    # {"id", "name", "genre_ids", "tag_ids", "developer_ids", "rating", "metacritic", "year", "suggested"}
+    games: List[Dict[str, Any]]
+    # {"user_id", "library_size", "games": [{"game_rawg_id", "status", "score"}]}
+    users: List[Dict[str, Any]]
+    meta: Dict[str, Any] = field(default_factory=dict)
+
+    def game_index(self) -> Dict[int, Dict[str, Any]]:
+        return {g["id"]: g for g in self.games}
+
+
+def _weighted_sample(rng: random.Random, items: List[int], weights: List[float], k: int) -> List[int]:
+    """k elementos distintos con probabilidad proporcional al peso (Efraimidis-Spirakis)."""
+    keyed = [(rng.random() ** (1.0 / w), it) for it, w in zip(items, weights) if w > 0]
+    keyed.sort(reverse=True)
+    return [it for _, it in keyed[:k]]
+
+
+def generate(
+    n_games: int = 5000,
+    n_users: int = 300,
+    library_sizes: Optional[List[int]] = None,
+    n_tags: int = 300,
+    n_developers: int = 1500,
+    n_suggested: int = 10,
+    seed: int = 0,
+) -> Dataset:
+    rng = random.Random(seed)
+    library_sizes = library_sizes or [5, 20, 100]
+    genres = {i: g for i, g in enumerate(GENRES)}
+    tags = {i: f"tag-{i}" for i in range(n_tags)}
+    developers = {i: f"dev-{i}" for i in range(n_developers)}
+
+    # Popularidad de géneros y de juegos (Zipf); tags y desarrolladores agrupados por género
+    genre_pop = [1.0 / (r + 1) ** 0.8 for r in range(len(GENRES))]
+    tags_of_genre = {g: rng.sample(range(n_tags), 25) for g in genres}
+    devs_of_genre = {g: rng.sample(range(n_developers), 80) for g in genres}
+
+    games: List[Dict[str, Any]] = []
+    popularity: List[float] = []
+    for i in range(n_games):
+        gid = 1000 + i * 7  # ids dispersos, como en RAWG
+        gs = _weighted_sample(rng, list(genres), genre_pop, rng.choice([1, 1, 2, 2, 3]))
+        tag_pool = [t for g in gs for t in tags_of_genre[g]]
+        games.append({
+            "id": gid,
+            "name": f"Game {i}",
+            "genre_ids": gs,
+            "tag_ids": sorted(set(rng.sample(tag_pool, min(len(tag_pool), rng.randint(3, 10))))),
+            "developer_ids": [rng.choice(devs_of_genre[gs[0]])],
+            "rating": round(min(5.0, max(0.0, rng.gauss(3.6, 0.7))), 2) if rng.random() > 0.05 else None,
+            "metacritic": rng.randint(45, 97) if rng.random() > 0.4 else None,
+            "year": rng.randint(1995, 2025),
+            "suggested": [],
+        })
+        popularity.append(1.0 / (rng.random() * n_games + 1) ** 0.6)
+
+    # Sugeridos: juegos populares que comparten el género principal
+    by_genre: Dict[int, List[int]] = {}
+    for idx, g in enumerate(games):
+        by_genre.setdefault(g["genre_ids"][0], []).append(idx)
+    for idx, g in enumerate(games):
+        pool = [j for j in by_genre[g["genre_ids"][0]] if j != idx]
+        picks = _weighted_sample(rng, pool, [popularity[j] for j in pool], n_suggested)
+        g["suggested"] = [games[j]["id"] for j in picks]
+
+    users: List[Dict[str, Any]] = []
+    for u in range(n_users):
+        size = library_sizes[u % len(library_sizes)]
+        liked = _weighted_sample(rng, list(genres), genre_pop, rng.randint(2, 3))
+        disliked = rng.choice([g for g in genres if g not in liked])
+        taste = {g: rng.uniform(0.6, 1.0) for g in liked}
+        taste[disliked] = -0.8
+
+        def match(game: Dict[str, Any]) -> float:
+            return sum(taste.get(x, 0.0) for x in game["genre_ids"]) / math.sqrt(len(game["genre_ids"]))
+
+        weights = [p * math.exp(2.5 * match(g)) for p, g in zip(popularity, games)]
+        owned = _weighted_sample(rng, list(range(n_games)), weights, min(size, n_games))
+        ugs = []
+        for j in owned:
+            status = rng.choices(STATUSES, STATUS_PROBS)[0]
+            score = None
+            if rng.random() > 0.2:
+                score = int(max(0, min(100, rng.gauss(60 + 30 * match(games[j]), 12))))
+            ugs.append({"game_rawg_id": games[j]["id"], "status": status, "score": score})
+        users.append({"user_id": u + 1, "library_size": size, "games": ugs})
+
+    return Dataset(
+        genres=genres, tags=tags, developers=developers, games=games, users=users,
+        meta={"source": "synthetic", "seed": seed, "games": n_games, "users": n_users, "library_sizes": library_sizes},
+    )
+
+
+def save(ds: Dataset, path: str) -> None:
+    with open(path, "w") as fh:
+        json.dump(asdict(ds), fh)
+
+
+def load(path: str) -> Dataset:
+    with open(path) as fh:
+        raw = json.load(fh)
+    # JSON guarda las claves de los diccionarios como texto
+    for key in ("genres", "tags", "developers"):
+        raw[key] = {int(k): v for k, v in raw[key].items()}
+    return Dataset(**raw)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Genera un dataset sintético para benchmarks.eval_recs")
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--library-sizes", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+    ds = generate(args.games, args.users, args.library_sizes, seed=args.seed)
+    save(ds, args.out)
+    print({"games": len(ds.games), "users": len(ds.users), "out": args.out})
@@ -0,0 +1,440 @@
+"""
+Evaluación offline y benchmark de latencia del recomendador.
+
+Para cada usuario con algún juego bien puntuado (nota >= --min-score) se aparta uno
+de ellos (leave-one-out) y se recomienda con el resto; el apartado es el único
+relevante. Métricas por pipeline, globales y por tamaño de biblioteca:
+  - precision@k, recall@k (= hit rate con un solo relevante), NDCG@k,
+  - coverage: juegos distintos recomendados / tamaño del catálogo.
+
+Pipelines (las mismas piezas que los modos de /recommendations, sin BD):
+  - rawg: detalles de los K representativos y una página de candidatos del RAWG local
+    (benchmarks.rawg_stub) a través del cliente compartido, perfil de géneros y scoring.
+  - catalog: perfil y pool de candidatos desde el catálogo compacto en memoria.
+  - cf: vecinos item-item ajustados sobre los datos de entrenamiento, mezclados con géneros.
+  - content: perfil firmado de géneros y tags contra el índice TF-IDF.
+  - ppr: PageRank personalizado sobre el grafo de sugeridos.
+  - popular: los mejor valorados que el usuario no tiene (referencia).
+
+Cada etapa se perfila (reloj, CPU y, con --trace-alloc, pico de memoria) y todo se
+escribe en un JSON con claves ordenadas para poder compararlo entre versiones
+(--baseline imprime las diferencias con un informe anterior).
+
+Uso (desde backend/):
+    python -m benchmarks.eval_recs --out data/bench_report.json
+    python -m benchmarks.eval_recs --games 20000 --users 1000 --library-sizes 5 20 100 500
+    python -m benchmarks.eval_recs --dataset data/snapshot.json --baseline data/bench_report.json
+    python -m benchmarks.eval_recs --status-weight "por jugar=0.5" --pipelines rawg catalog
+"""
+import os
+
+# Antes de importar app: sin almacén de RAWG en BD y sin cuota (el RAWG es local)
+os.environ.setdefault("RAWG_STORE_ENABLED", "false")
+os.environ.setdefault("RAWG_RATE_LIMIT_PER_SEC", "1000000")
+os.environ.setdefault("RAWG_RATE_BURST", "1000000")
+
+import argparse
+import asyncio
+import json
+import math
+import platform
+import random
+import subprocess
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+
+from app.core.config import settings
+from app.core.rawg import get_game_details, list_games_by_genres
+import app.models.user  # noqa: F401  (registra User para la relación de UserGame)
+from app.models.user_game import UserGame
+from app.recommender.catalog_store import CatalogStore, build_catalog_segment
+from app.recommender.cf import build_interaction_matrix, item_neighbors, rank_blended
+from app.recommender.content_index import build_content_index
+from app.recommender.genre_profile import (
+    PAGE_SIZE, K_REPRESENTATIVE_DEFAULT, G_TOP_GENRES_DEFAULT, build_genre_profile, representative_weight,
+)
+from app.recommender.ppr import build_game_graph, personalized_pagerank, top_by_rank
+from app.recommender.profile import STATUS_WEIGHT, add_terms, interaction_weight, signed_affinity
+from app.recommender.scoring import score_candidates, rank_candidates, top_k_indices
+from benchmarks.dataset import Dataset, generate, load
+from benchmarks.profiling import StageProfiler
+from benchmarks.rawg_stub import RawgStub, installed
+
+PIPELINES = ("rawg", "catalog", "cf", "content", "ppr", "popular")
+
+# Bucket de las etapas de ajuste (se hacen una vez, no por usuario)
+FIT = 0
+
+
+@dataclass
+class Case:
+    user_id: int
+    bucket: int              # tamaño de biblioteca del usuario
+    train: List[UserGame]
+    held_out: int
+
+
+def leave_one_out(ds: Dataset, min_score: int, rng: random.Random, max_users: Optional[int]) -> List[Case]:
+    cases = []
+    for u in ds.users:
+        relevant = [g for g in u["games"] if g["score"] is not None and g["score"] >= min_score]
+        if len(u["games"]) < 2 or not relevant:
+            continue
+        held = rng.choice(relevant)
+        train = [
+            UserGame(user_id=u["user_id"], game_rawg_id=g["game_rawg_id"], status=g["status"], score=g["score"])
+            for g in u["games"] if g is not held
+        ]
+        cases.append(Case(u["user_id"], u.get("library_size") or len(u["games"]), train, held["game_rawg_id"]))
+    return cases[:max_users] if max_users else cases
+
+
+# =========================
+# Modelos ajustados sobre el entrenamiento
+# =========================
+
+class Context:
+    def __init__(self, ds: Dataset, cases: List[Case], prof: StageProfiler):
+        self.ds = ds
+        self.prof = prof
+        self.games = ds.game_index()
+        self.genre_names = ds.genres
+        self.genre_ids_by_name = {n: g for g, n in ds.genres.items()}
+
+        with prof.stage("catalog", "fit", FIT):
+            self.store = CatalogStore(path="", refresh_interval=0)
+            self.store.base = build_catalog_segment([
+                (g["id"], g["name"], None, g.get("year"), g.get("rating"), g.get("metacritic"),
+                 g["genre_ids"], g["tag_ids"])
+                for g in ds.games
+            ])
+
+        with prof.stage("cf", "fit", FIT):
+            users, games, weights = [], [], []
+            for c in cases:
+                for ug in c.train:
+                    users.append(c.user_id)
+                    games.append(ug.game_rawg_id)
+                    weights.append(interaction_weight(ug.status, ug.score))
+            im = build_interaction_matrix(np.asarray(users), np.asarray(games), np.asarray(weights))
+            self.neighbors: Dict[int, List[tuple]] = defaultdict(list)
+            for row in item_neighbors(im, settings.CF_NEIGHBORS, settings.CF_SHRINKAGE, settings.CF_MIN_SUPPORT):
+                self.neighbors[row["game_rawg_id"]].append((row["neighbor_rawg_id"], row["similarity"]))
+
+        with prof.stage("content", "fit", FIT):
+            self.content = build_content_index(
+                [(g["id"], g["genre_ids"], g["tag_ids"], g["developer_ids"]) for g in ds.games],
+                tables=settings.CONTENT_INDEX_TABLES, bits=settings.CONTENT_INDEX_BITS,
+            )
+
+        with prof.stage("ppr", "fit", FIT):
+            self.graph = build_game_graph(
+                (g["id"], dst, rank) for g in ds.games for rank, dst in enumerate(g["suggested"])
+            )
+
+        with prof.stage("popular", "fit", FIT):
+            rated = [g for g in ds.games if g.get("rating") is not None]
+            self.popular = [g["id"] for g in sorted(rated, key=lambda g: -g["rating"])]
+
+
+# =========================
+# Pipelines
+# =========================
+
+def _owned(case: Case) -> set:
+    return {int(ug.game_rawg_id) for ug in case.train}
+
+
+def _top_genre_ids(ctx: Context, g_aff: Dict[str, float]) -> List[int]:
+    top = [k for k, _ in sorted(g_aff.items(), key=lambda x: x[1], reverse=True)[:G_TOP_GENRES_DEFAULT]]
+    return [ctx.genre_ids_by_name[g] for g in top if g in ctx.genre_ids_by_name]
+
+
+def _catalog_profile(ctx: Context, case: Case) -> Dict[str, float]:
+    reps = sorted(case.train, key=representative_weight, reverse=True)[:K_REPRESENTATIVE_DEFAULT]
+    rep_genres = ctx.store.genres_by_game([int(ug.game_rawg_id) for ug in reps])
+    details = [
+        {"id": ug.game_rawg_id, "genres": [ctx.genre_names[g] for g in rep_genres.get(int(ug.game_rawg_id), [])]}
+        for ug in reps
+    ]
+    return build_genre_profile(details, reps)
+
+
+async def rawg_pipeline(ctx: Context, case: Case, k: int) -> List[int]:
+    p, b = ctx.prof, case.bucket
+    owned = _owned(case)
+    reps = sorted(case.train, key=representative_weight, reverse=True)[:K_REPRESENTATIVE_DEFAULT]
+
+    async def get_det(gid: int) -> Dict[str, Any]:
+        try:
+            return await get_game_details(gid)
+        except Exception:
+            return {"id": gid, "genres": []}
+
+    with p.stage("rawg", "details", b):
+        details = await asyncio.gather(*(get_det(int(ug.game_rawg_id)) for ug in reps))
+    with p.stage("rawg", "profile", b):
+        g_aff = build_genre_profile(details, reps)
+    if not g_aff:
+        return []
+    top_genres = [k_ for k_, _ in sorted(g_aff.items(), key=lambda x: x[1], reverse=True)[:G_TOP_GENRES_DEFAULT]]
+    with p.stage("rawg", "candidates", b):
+        page = await list_games_by_genres(top_genres, page=1, page_size=PAGE_SIZE, ordering="-rating")
+        candidates = [c for c in page if int(c["id"]) not in owned]
+    with p.stage("rawg", "score", b):
+        ranked = rank_candidates(candidates, g_aff, k)
+    return [int(c["id"]) for c in ranked]
+
+
+async def catalog_pipeline(ctx: Context, case: Case, k: int) -> List[int]:
+    p, b = ctx.prof, case.bucket
+    with p.stage("catalog", "profile", b):
+        g_aff = _catalog_profile(ctx, case)
+    if not g_aff:
+        return []
+    with p.stage("catalog", "candidates", b):
+        pool = ctx.store.candidates(_top_genre_ids(ctx, g_aff), exclude_ids=list(_owned(case)),
+                                    limit=settings.RECS_CATALOG_CANDIDATES)
+    with p.stage("catalog", "score", b):
+        best = top_k_indices(score_candidates(ctx.store.candidate_matrix(pool, ctx.genre_names), g_aff), k)
+        return [pool.row(int(i)).game_id for i in best]
+
+
+async def cf_pipeline(ctx: Context, case: Case, k: int) -> List[int]:
+    p, b = ctx.prof, case.bucket
+    owned = _owned(case)
+    with p.stage("cf", "neighbors", b):
+        scores: Dict[int, float] = defaultdict(float)
+        for ug in case.train:
+            w = representative_weight(ug)
+            for nbr, sim in ctx.neighbors.get(int(ug.game_rawg_id), []):
+                if nbr not in owned:
+                    scores[nbr] += sim * w
+        top = sorted(scores.items(), key=lambda x: -x[1])[:settings.RECS_CATALOG_CANDIDATES]
+    if not top:
+        return await catalog_pipeline(ctx, case, k)
+    with p.stage("cf", "profile", b):
+        g_aff = _catalog_profile(ctx, case)
+    with p.stage("cf", "score", b):
+        cf_scores = dict(top)
+        candidates = [
+            {"id": gid, "genres": [ctx.genre_names[g] for g in ctx.games[gid]["genre_ids"]],
+             "metacritic": ctx.games[gid].get("metacritic")}
+            for gid in cf_scores
+        ]
+        ranked = rank_blended(candidates, g_aff, cf_scores, settings.RECS_CF_WEIGHT, k)
+    return [c["id"] for c in ranked]
+
+
+async def content_pipeline(ctx: Context, case: Case, k: int) -> List[int]:
+    p, b = ctx.prof, case.bucket
+    with p.stage("content", "profile", b):
+        genre_aff: Dict[str, float] = {}
+        tag_aff: Dict[str, float] = {}
+        for ug in case.train:
+            g = ctx.games.get(int(ug.game_rawg_id))
+            if g is None:
+                continue
+            delta = signed_affinity(ug.status, ug.score)
+            add_terms(genre_aff, g["genre_ids"], delta)
+            add_terms(tag_aff, g["tag_ids"], delta)
+    with p.stage("content", "query", b):
+        near = ctx.content.near_profile({"genres": genre_aff, "tags": tag_aff}, k, exclude_ids=list(_owned(case)))
+    return [gid for gid, _ in near]
+
+
+async def ppr_pipeline(ctx: Context, case: Case, k: int) -> List[int]:
+    p, b = ctx.prof, case.bucket
+    liked = [ug for ug in case.train if ug.score is not None and ug.score >= settings.PPR_MIN_SCORE]
+    seeds_ugs = liked or sorted(case.train, key=representative_weight, reverse=True)[:K_REPRESENTATIVE_DEFAULT]
+    seeds = {int(ug.game_rawg_id): representative_weight(ug) for ug in seeds_ugs}
+    with p.stage("ppr", "walk", b):
+        r, _ = personalized_pagerank(ctx.graph, seeds, settings.PPR_ALPHA, settings.PPR_MAX_ITER, settings.PPR_TOL)
+    with p.stage("ppr", "top", b):
+        return [gid for gid, _ in top_by_rank(ctx.graph, r, k, list(_owned(case)))]
+
+
+async def popular_pipeline(ctx: Context, case: Case, k: int) -> List[int]:
+    owned = _owned(case)
+    with ctx.prof.stage("popular", "top", case.bucket):
+        out = []
+        for gid in ctx.popular:
+            if gid not in owned:
+                out.append(gid)
+                if len(out) == k:
+                    break
+    return out
+
+
+RUNNERS: Dict[str, Callable[[Context, Case, int], Awaitable[List[int]]]] = {
+    "rawg": rawg_pipeline,
+    "catalog": catalog_pipeline,
+    "cf": cf_pipeline,
+    "content": content_pipeline,
+    "ppr": ppr_pipeline,
+    "popular": popular_pipeline,
+}
+
+
+# =========================
+# Métricas
+# =========================
+
+def _metrics(hits: List[Optional[int]], recs: List[List[int]], k: int, n_games: int) -> Dict[str, Any]:
+    """`hits[i]` = posición (0..k-1) del relevante en la lista i, o None."""
+    n = len(hits)
+    if n == 0:
+        return {"users": 0}
+    found = [h for h in hits if h is not None]
+    distinct = {gid for r in recs for gid in r}
+    return {
+        "users": n,
+        f"precision@{k}": round(len(found) / (n * k), 5),
+        f"recall@{k}": round(len(found) / n, 5),
+        f"ndcg@{k}": round(sum(1.0 / math.log2(h + 2) for h in found) / n, 5),
+        "coverage": round(len(distinct) / n_games, 5),
+        "empty": sum(1 for r in recs if not r),
+    }
+
+
+async def evaluate(ctx: Context, cases: List[Case], pipelines: List[str], k: int) -> Dict[str, Any]:
+    quality: Dict[str, Any] = {}
+    for name in pipelines:
+        runner = RUNNERS[name]
+        by_bucket: Dict[int, List[tuple]] = defaultdict(list)
+        # Un usuario cada vez: el tiempo de CPU de una etapa no se mezcla con el de otro usuario
+        for case in cases:
+            with ctx.prof.stage(name, "total", case.bucket):
+                recs = (await runner(ctx, case, k))[:k]
+            hit = recs.index(case.held_out) if case.held_out in recs else None
+            by_bucket[case.bucket].append((hit, recs))
+
+        every = [x for rows in by_bucket.values() for x in rows]
+        quality[name] = {
+            "all": _metrics([h for h, _ in every], [r for _, r in every], k, len(ctx.ds.games)),
+            "by_library_size": {
+                str(bucket): _metrics([h for h, _ in rows], [r for _, r in rows], k, len(ctx.ds.games))
+                for bucket, rows in sorted(by_bucket.items())
+            },
+        }
+    return quality
+
+
+# =========================
+# Informe
+# =========================
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def compare(old: Dict[str, Any], new: Dict[str, Any]) -> List[str]:
+    """Diferencias de calidad y de latencia total (p50) entre dos informes."""
+    lines = []
+    for name, q in sorted(new.get("quality", {}).items()):
+        before = old.get("quality", {}).get(name, {}).get("all", {})
+        for metric, value in sorted(q["all"].items()):
+            if isinstance(value, float) and metric in before:
+                lines.append(f"{name:>8} {metric:>14}: {before[metric]:.5f} -> {value:.5f} ({value - before[metric]:+.5f})")
+    for name, stages in sorted(new.get("profile", {}).items()):
+        for bucket, entry in sorted(stages.get("total", {}).items()):
+            prev = old.get("profile", {}).get(name, {}).get("total", {}).get(bucket)
+            if prev:
+                a, b = prev["wall_ms_p50"], entry["wall_ms_p50"]
+                lines.append(f"{name:>8} total p50 [{bucket:>4}]: {a:.3f} -> {b:.3f} ms ({(b / a - 1) * 100 if a else 0:+.1f}%)")
+    return lines
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    for item in args.status_weight or []:
+        status, _, weight = item.partition("=")
+        STATUS_WEIGHT[status.strip().lower()] = float(weight)
+
+    t0 = time.perf_counter()
+    ds = load(args.dataset) if args.dataset else generate(
+        args.games, args.users, args.library_sizes, seed=args.seed,
+    )
+    t_data = time.perf_counter() - t0
+    cases = leave_one_out(ds, args.min_score, random.Random(args.seed), args.max_users)
+
+    prof = StageProfiler(trace_alloc=args.trace_alloc)
+    prof.start()
+    try:
+        ctx = Context(ds, cases, prof)
+        stub = RawgStub(ds, latency_ms=args.rawg_latency_ms, jitter_ms=args.rawg_jitter_ms, seed=args.seed)
+        async with installed(stub):
+            quality = await evaluate(ctx, cases, args.pipelines, args.k)
+    finally:
+        prof.stop()
+
+    return {
+        "meta": {
+            "commit": _git_commit(),
+            "created_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "dataset": {**ds.meta, "games": len(ds.games), "users": len(ds.users)},
+            "cases": len(cases),
+            "k": args.k,
+            "min_score": args.min_score,
+            "seed": args.seed,
+            "status_weight": dict(STATUS_WEIGHT),
+            "trace_alloc": args.trace_alloc,
+            "rawg_stub": {
+                "latency_ms": args.rawg_latency_ms, "jitter_ms": args.rawg_jitter_ms, "requests": stub.requests,
+            },
+            "dataset_s": round(t_data, 2),
+            "total_s": round(time.perf_counter() - t0, 2),
+        },
+        "quality": quality,
+        "profile": prof.report(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Evaluación offline y benchmark de latencia del recomendador")
+    parser.add_argument("--dataset", help="JSON de benchmarks.dataset / benchmarks.snapshot (si no, sintético)")
+    parser.add_argument("--games", type=int, default=5000)
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--library-sizes", type=int, nargs="+", default=[5, 20, 100])
+    parser.add_argument("--max-users", type=int, default=None)
+    parser.add_argument("--pipelines", nargs="+", choices=PIPELINES, default=list(PIPELINES))
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--min-score", type=int, default=70, help="nota mínima del juego apartado")
+    parser.add_argument("--status-weight", nargs="*", help='pesos por estado a probar, p.ej. "por jugar=0.5"')
+    parser.add_argument("--rawg-latency-ms", type=float, default=0.0)
+    parser.add_argument("--rawg-jitter-ms", type=float, default=0.0)
+    parser.add_argument("--trace-alloc", action="store_true", help="pico de memoria por etapa (más lento)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="ruta del informe JSON (si no, por la salida estándar)")
+    parser.add_argument("--baseline", help="informe anterior con el que comparar")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, sort_keys=True, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w") as fh:
+            fh.write(text + "\n")
+    else:
+        print(text)
+
+    if args.baseline:
+        with open(args.baseline) as fh:
+            for line in compare(json.load(fh), report):
+                print(line)
+    else:
+        for name, q in report["quality"].items():
+            print(f"{name:>8}: " + ", ".join(f"{m}={v}" for m, v in q["all"].items()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Perfil por etapa: tiempo de reloj, tiempo de CPU del proceso y pico de memoria
+reservada (tracemalloc) de cada ejecución, agregados por (pipeline, etapa, tamaño
+de biblioteca).
+
+tracemalloc ralentiza todo el proceso, así que se activa solo cuando se piden
+asignaciones; el reloj y la CPU de esa pasada no son comparables con los de una sin él.
+"""
+import time
+import tracemalloc
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Tuple
+
+Key = Tuple[str, str, int]
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q / 100.0 * len(ordered)))]
+
+
+class StageProfiler:
+    def __init__(self, trace_alloc: bool = False):
+        self.trace_alloc = trace_alloc
+        self._wall: Dict[Key, List[float]] = defaultdict(list)
+        self._cpu: Dict[Key, List[float]] = defaultdict(list)
+        self._alloc: Dict[Key, List[int]] = defaultdict(list)
+
+    def start(self) -> None:
+        if self.trace_alloc and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def stop(self) -> None:
+        if self.trace_alloc and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+    @contextmanager
+    def stage(self, pipeline: str, name: str, bucket: int) -> Iterator[None]:
+        key = (pipeline, name, bucket)
+        if self.trace_alloc:
+            base = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        wall, cpu = time.perf_counter(), time.process_time()
+        try:
+            yield
+        finally:
+            self._wall[key].append(time.perf_counter() - wall)
+            self._cpu[key].append(time.process_time() - cpu)
+            if self.trace_alloc:
+                self._alloc[key].append(max(0, tracemalloc.get_traced_memory()[1] - base))
+
+    def report(self) -> Dict[str, Any]:
+        """{pipeline: {etapa: {tamaño: métricas}}} con tiempos en ms y memoria en KB."""
+        out: Dict[str, Any] = {}
+        for key in sorted(self._wall):
+            pipeline, name, bucket = key
+            wall = [x * 1000 for x in self._wall[key]]
+            cpu = [x * 1000 for x in self._cpu[key]]
+            entry = {
+                "runs": len(wall),
+                "wall_ms_p50": round(_percentile(wall, 50), 3),
+                "wall_ms_p95": round(_percentile(wall, 95), 3),
+                "wall_ms_mean": round(sum(wall) / len(wall), 3),
+                "cpu_ms_mean": round(sum(cpu) / len(cpu), 3),
+            }
+            if self._alloc.get(key):
+                alloc = [x / 1024 for x in self._alloc[key]]
+                entry["alloc_peak_kb_mean"] = round(sum(alloc) / len(alloc), 1)
+                entry["alloc_peak_kb_max"] = round(max(alloc), 1)
+            out.setdefault(pipeline, {}).setdefault(name, {})[str(bucket)] = entry
+        return out
@@ -0,0 +1,110 @@
+"""
+RAWG local para los benchmarks: un httpx.MockTransport que responde desde un Dataset
+las rutas que usa el recomendador (/games/{id}, sus screenshots/movies/suggested y
+/games?genres=...), con latencia simulada opcional.
+
+Se instala como transporte del cliente compartido de app.core.rawg, así que las
+peticiones pasan por caché, single-flight y gobernador igual que en producción.
+"""
+import asyncio
+import random
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from app.core import rawg
+from benchmarks.dataset import Dataset
+
+
+class RawgStub:
+    def __init__(self, ds: Dataset, latency_ms: float = 0.0, jitter_ms: float = 0.0,
+                 slow_ratio: float = 0.0, slow_ms: float = 0.0, seed: int = 0):
+        self.ds = ds
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        # Fracción de peticiones rezagadas y su latencia (para probar plazos y hedging)
+        self.slow_ratio = slow_ratio
+        self.slow_ms = slow_ms
+        self._rng = random.Random(seed)
+        self._games = ds.game_index()
+        self._genre_ids = {name.lower(): gid for gid, name in ds.genres.items()}
+        self.requests = 0
+
+    # ---------- Formato RAWG ----------
+
+    def _list_item(self, g: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            "id": g["id"],
+            "name": g["name"],
+            "released": f"{g['year']}-01-01" if g.get("year") else None,
+            "background_image": f"https://media.rawg.io/media/games/{g['id']}.jpg",
+            "rating": g.get("rating") or 0,
+            "metacritic": g.get("metacritic"),
+            "genres": [{"id": x, "name": self.ds.genres[x]} for x in g["genre_ids"]],
+            "tags": [{"id": x, "name": self.ds.tags[x]} for x in g["tag_ids"]],
+        }
+
+    def _detail(self, g: Dict[str, Any]) -> Dict[str, Any]:
+        return {
+            **self._list_item(g),
+            "description_raw": "",
+            "developers": [{"id": x, "name": self.ds.developers[x]} for x in g["developer_ids"]],
+            "publishers": [],
+            "platforms": [],
+        }
+
+    # ---------- Transporte ----------
+
+    async def _delay(self) -> None:
+        ms = self.latency_ms + self._rng.uniform(0, self.jitter_ms)
+        if self.slow_ratio and self._rng.random() < self.slow_ratio:
+            ms += self.slow_ms
+        if ms > 0:
+            await asyncio.sleep(ms / 1000.0)
+
+    async def handle(self, request: httpx.Request) -> httpx.Response:
+        self.requests += 1
+        await self._delay()
+        parts = request.url.path.rstrip("/").split("/")
+        # /api/games[/{id}[/{recurso}]]
+        if parts[-1] == "games":
+            return httpx.Response(200, json={"results": self._list(request.url.params)})
+        if parts[-2] == "games" and parts[-1].isdigit():
+            g = self._games.get(int(parts[-1]))
+            return httpx.Response(200, json=self._detail(g)) if g else httpx.Response(404, json={"detail": "Not found."})
+        if parts[-3] == "games" and parts[-2].isdigit():
+            g = self._games.get(int(parts[-2]))
+            if g is None:
+                return httpx.Response(404, json={"detail": "Not found."})
+            if parts[-1] == "suggested":
+                return httpx.Response(200, json={"results": [self._list_item(self._games[x]) for x in g["suggested"] if x in self._games]})
+            return httpx.Response(200, json={"results": []})
+        return httpx.Response(404, json={"detail": "Not found."})
+
+    def _list(self, params: httpx.QueryParams) -> List[Dict[str, Any]]:
+        wanted = {self._genre_ids[x] for x in (params.get("genres") or "").split(",") if x in self._genre_ids}
+        games = [g for g in self.ds.games if not wanted or wanted & set(g["genre_ids"])]
+        ordering = params.get("ordering") or "-rating"
+        key = ordering.lstrip("-")
+        games.sort(key=lambda g: (g.get(key) is None, -(g.get(key) or 0)) if ordering.startswith("-") else (g.get(key) or 0))
+        page, size = int(params.get("page", 1)), int(params.get("page_size", 20))
+        return [self._list_item(g) for g in games[(page - 1) * size: page * size]]
+
+
+@asynccontextmanager
+async def installed(stub: RawgStub) -> AsyncIterator[RawgStub]:
+    """Sustituye el cliente compartido de RAWG por uno servido por `stub` mientras dura el bloque."""
+    await rawg.close_rawg_client()
+    rawg._client = httpx.AsyncClient(
+        base_url=rawg.RAWG_API_BASE_URL,
+        transport=httpx.MockTransport(stub.handle),
+    )
+    try:
+        yield stub
+    finally:
+        await rawg.close_rawg_client()
+
+
+def stub_stats(stub: Optional[RawgStub]) -> Dict[str, Any]:
+    return {"requests": stub.requests if stub else 0, "client": rawg.get_rawg_stats()}
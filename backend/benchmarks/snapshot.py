@@ -0,0 +1,115 @@
+"""
+Instantánea anonimizada de la BD en el formato de benchmarks.dataset, para evaluar
+el recomendador con datos reales sin tocar la BD durante el benchmark.
+
+  - catálogo: game_catalog (ids de géneros, tags y desarrolladores) y los nombres
+    de cada término; los sugeridos salen de game_edges.
+  - usuarios: user_games con los user_id sustituidos por números consecutivos en
+    orden aleatorio (no se exporta nada de la tabla users). `library_size` es el
+    menor de --bins que cubre la biblioteca real, para agrupar métricas por tamaño.
+
+Uso (desde backend/):
+    python -m benchmarks.snapshot --out data/snapshot.json
+    python -m benchmarks.snapshot --out data/snapshot.json --max-users 2000 --bins 5 20 100 500
+"""
+import argparse
+import asyncio
+import bisect
+import random
+from collections import defaultdict
+from typing import Dict, List, Optional
+
+from sqlalchemy import select
+
+from app.core.database import SessionLocal, engine
+from app.crud.catalog_term import get_term_names
+from app.crud.game_edge import stream_game_edges
+from app.models.catalog_term import CatalogDeveloper, CatalogGenre, CatalogTag
+from app.models.game_catalog import GameCatalog
+from app.models.user_game import UserGame
+from benchmarks.dataset import Dataset, save
+
+READ_CHUNK = 20000
+
+
+async def export(bins: List[int], min_games: int, max_users: Optional[int], seed: int) -> Dataset:
+    rng = random.Random(seed)
+    async with SessionLocal() as db:
+        genres = await get_term_names(db, CatalogGenre)
+        tags = await get_term_names(db, CatalogTag)
+        developers = await get_term_names(db, CatalogDeveloper)
+
+        suggested: Dict[int, List[tuple]] = defaultdict(list)
+        async for chunk in stream_game_edges(db):
+            for src, dst, rank in chunk:
+                suggested[src].append((rank, dst))
+
+        games = []
+        result = await db.stream(
+            select(
+                GameCatalog.game_rawg_id, GameCatalog.name, GameCatalog.genre_ids, GameCatalog.tag_ids,
+                GameCatalog.developer_ids, GameCatalog.rating, GameCatalog.metacritic, GameCatalog.release_year,
+            ).execution_options(yield_per=READ_CHUNK)
+        )
+        async for part in result.partitions(READ_CHUNK):
+            for r in part:
+                gid = int(r.game_rawg_id)
+                games.append({
+                    "id": gid,
+                    "name": r.name,
+                    "genre_ids": list(r.genre_ids or []),
+                    "tag_ids": list(r.tag_ids or []),
+                    "developer_ids": list(r.developer_ids or []),
+                    "rating": r.rating,
+                    "metacritic": r.metacritic,
+                    "year": r.release_year,
+                    "suggested": [dst for _, dst in sorted(suggested.get(gid, []))],
+                })
+
+        libraries: Dict[int, List[dict]] = defaultdict(list)
+        result = await db.stream(
+            select(UserGame.user_id, UserGame.game_rawg_id, UserGame.status, UserGame.score)
+            .execution_options(yield_per=READ_CHUNK)
+        )
+        async for part in result.partitions(READ_CHUNK):
+            for r in part:
+                libraries[r.user_id].append(
+                    {"game_rawg_id": int(r.game_rawg_id), "status": r.status, "score": r.score}
+                )
+
+    owners = [uid for uid, ugs in libraries.items() if len(ugs) >= min_games]
+    rng.shuffle(owners)
+    if max_users:
+        owners = owners[:max_users]
+    bins = sorted(bins)
+    users = []
+    for n, uid in enumerate(owners, start=1):
+        size = len(libraries[uid])
+        users.append({
+            "user_id": n,
+            "library_size": bins[min(len(bins) - 1, bisect.bisect_left(bins, size))],
+            "games": libraries[uid],
+        })
+
+    return Dataset(
+        genres=genres, tags=tags, developers=developers, games=games, users=users,
+        meta={"source": "snapshot", "seed": seed, "games": len(games), "users": len(users), "library_sizes": bins},
+    )
+
+
+async def _main(args: argparse.Namespace) -> None:
+    try:
+        ds = await export(args.bins, args.min_games, args.max_users, args.seed)
+        save(ds, args.out)
+        print({"games": len(ds.games), "users": len(ds.users), "out": args.out})
+    finally:
+        await engine.dispose()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exporta una instantánea anonimizada para benchmarks.eval_recs")
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--bins", type=int, nargs="+", default=[5, 20, 100, 500])
+    parser.add_argument("--min-games", type=int, default=2)
+    parser.add_argument("--max-users", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=0)
+    asyncio.run(_main(parser.parse_args()))
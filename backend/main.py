@@ -1,12 +1,34 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from app.core.init_db import init_db
-from app.api import users, user_games, auth, rawg, friends, review, recommendations
-
-app = FastAPI()
+from app.core.rawg import start_rawg_client, close_rawg_client
+from app.core.rawg_store import close_rawg_store
+from app.core.catalog_writer import catalog_writer
+from app.core.db_metrics import DbRouteMiddleware
+from app.jobs.catalog_crawler import start_catalog_crawler, stop_catalog_crawler
+from app.api import users, user_games, auth, rawg, friends, review, recommendations, stats
 
-@app.on_event("startup")
-async def startup():
+@asynccontextmanager
+async def lifespan(app: FastAPI):
     await init_db()
+    # Cliente HTTP de RAWG compartido por todas las peticiones
+    await start_rawg_client()
+    # Volcado diferido de juegos vistos al catálogo
+    catalog_writer.start()
+    # Refresco incremental del catálogo en segundo plano (si está activado)
+    start_catalog_crawler()
+    try:
+        yield
+    finally:
+        await stop_catalog_crawler()
+        await catalog_writer.stop()
+        await close_rawg_store()
+        await close_rawg_client()
+
+app = FastAPI(lifespan=lifespan)
+# Etiqueta las consultas lentas con la ruta que las originó
+app.add_middleware(DbRouteMiddleware)
 
 app.include_router(users.router)
 app.include_router(user_games.router)
@@ -15,8 +37,9 @@ app.include_router(rawg.router, prefix="/rawg", tags=["rawg"])
 app.include_router(friends.router)
 app.include_router(review.router)
 app.include_router(recommendations.router)
+app.include_router(stats.router)
 
 
 @app.get("/")
 def root():
-    return {"message": "PlayTracker API"}
\ No newline at end of file
+    return {"message": "PlayTracker API"}